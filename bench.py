@@ -0,0 +1,412 @@
+"""Benchmark MiniPaint dengan trace input sintetis; hasil JSON dan perbandingan baseline.
+
+Skenario "core" jalan tanpa Tk. Skenario "app" membuat MiniPaint sungguhan
+dan butuh display (di server: `xvfb-run python bench.py`); tanpa display
+skenario itu dilaporkan sebagai skipped.
+
+Contoh:
+    python bench.py -o hasil.json
+    python bench.py --baseline baseline.json --threshold 0.15
+    python bench.py --journal ~/.minipaint/journal/sesi-....mpj   (sesi nyata sebagai trace)
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+import numpy as np
+import PIL
+from PIL import Image, ImageDraw
+
+import colors
+import core
+import fill
+import journal
+import mipmap
+import rasterops
+import spatial
+import tilestore
+
+SCENARIOS = {}
+
+
+def scenario(name, needs_tk=False):
+    def register(fn):
+        SCENARIOS[name] = (fn, needs_tk)
+        return fn
+    return register
+
+
+class Timer:
+    """Mengumpulkan latensi per operasi (detik)."""
+
+    def __init__(self):
+        self.samples = []
+
+    def __call__(self, fn, *args):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        self.samples.append(time.perf_counter() - t0)
+        return result
+
+
+def random_shapes(count, size, seed=0):
+    rng = np.random.default_rng(seed)
+    w, h = size
+    shapes = []
+    for i, (x, y) in enumerate(rng.integers(0, (w - 60, h - 60), (count, 2)).tolist()):
+        if i % 3 == 0:
+            pts = core.make_star(x, y, x + 50, y + 50)
+            shapes.append(core.Shape("star", pts, "blue", 2))
+        else:
+            shapes.append(core.Shape("rect", [(x, y), (x + 40, y + 30)], "black", 2))
+    return shapes
+
+
+def spiral(count, cx=400, cy=300):
+    # Trace freehand sintetis: spiral dengan langkah ~1 px seperti mouse cepat
+    t = np.linspace(0, 40 * math.pi, count)
+    r = 5 + t * 2
+    return np.stack([cx + r * np.cos(t), cy + r * np.sin(t)], axis=1).round().tolist()
+
+
+# --- Skenario core (tanpa Tk) ---
+
+@scenario("flood_fill_800x600")
+def bench_fill_small(timer):
+    return _fill(timer, (800, 600))
+
+
+@scenario("flood_fill_1920x1080")
+def bench_fill_hd(timer):
+    return _fill(timer, (1920, 1080))
+
+
+@scenario("flood_fill_3840x2160")
+def bench_fill_4k(timer):
+    return _fill(timer, (3840, 2160))
+
+
+def _fill(timer, size, repeat=5):
+    # Fill hampir seluruh kanvas yang berisi beberapa outline shape
+    for i in range(repeat):
+        image = Image.new("RGB", size, "white")
+        draw = ImageDraw.Draw(image)
+        for shape in random_shapes(200, size, seed=i):
+            core.draw_shape(draw, shape)
+        timer(fill.flood_fill, image, 1, 1, (255, 0, 0))
+
+
+@scenario("shape_rotate_10k")
+def bench_rotate(timer):
+    shapes = random_shapes(10000, (4000, 4000))
+    for shape in shapes:
+        timer(shape.rotate, 15)
+
+
+@scenario("select_hit_test_5k")
+def bench_hit_test(timer):
+    index = spatial.GridIndex()
+    for shape in random_shapes(5000, (4000, 3000)):
+        index.insert(shape)
+    rng = np.random.default_rng(1)
+    for x, y in rng.integers(0, (4000, 3000), (2000, 2)).tolist():
+        timer(index.hit_test, x, y)
+
+
+@scenario("render_document_10k")
+def bench_render(timer):
+    doc = {"width": 2000, "height": 1500, "shapes": random_shapes(10000, (2000, 1500))}
+    for _ in range(3):
+        timer(core.render_document, doc)
+
+
+@scenario("raster_ops_3840x2160")
+def bench_raster_ops(timer):
+    # Filter paralel per tile (rasterops) pada raster 4K berisi noise
+    raster = tilestore.TiledRaster(3840, 2160)
+    raster.paste(Image.effect_noise((3840, 2160), 60).convert("RGB"), (0, 0))
+    timer(rasterops.map_tiles, raster, rasterops.invert)
+    timer(rasterops.map_tiles, raster, rasterops.brightness(1.2))
+    timer(rasterops.map_tiles, raster, *rasterops.blur(2))
+    timer(rasterops.resize, raster, 1920, 1080)
+
+
+@scenario("mip_pan_16k")
+def bench_mip_pan(timer):
+    # Pan view zoom 1/8 (1000x700 pixel layar) di atas raster 16k; tiap 10 frame ada edit kecil
+    raster = tilestore.TiledRaster(16384, 16384)
+    noise = Image.effect_noise((1024, 1024), 60).convert("RGB")
+    for y in range(0, 16384, 2048):
+        for x in range(0, 16384, 2048):
+            raster.paste(noise, (x, y))
+    pyramid = mipmap.Pyramid(raster)
+    zoom = 1 / 8
+    w, h = 1000 / zoom, 700 / zoom
+    for i in range(120):
+        x, y = (i * 67) % (16384 - w), (i * 41) % (16384 - h)
+        if i % 10 == 9:
+            raster.paste(noise.crop((0, 0, 64, 64)), (int(x) + 100, int(y) + 100))
+            pyramid.invalidate((int(x) + 100, int(y) + 100, int(x) + 164, int(y) + 164))
+        timer(pyramid.render, (x, y, x + w, y + h), zoom, (1000, 700))
+
+
+@scenario("color_ops_2048")
+def bench_color_ops(timer):
+    # Operasi warna perseptual pada image 4 MP: LUT dibangun sekali (cold), lalu dipakai ulang (warm)
+    rng = np.random.default_rng(3)
+    arr = np.asarray(Image.radial_gradient("L").resize((2048, 2048)).convert("RGB")).copy()
+    arr[..., 1] = np.asarray(Image.linear_gradient("L").resize((2048, 2048)))
+    arr[..., 2] = arr[..., 2] // 2 + rng.integers(0, 60, (2048, 2048), dtype=np.uint8)
+    colors._match_table.cache_clear()
+    colors._quantize_lut.cache_clear()
+    for _ in range(3):
+        timer(lambda: colors.replace_color((120, 130, 60), (255, 0, 0), 12)(arr))
+    for _ in range(3):
+        palette = timer(colors.extract_palette, arr, 16)
+    for _ in range(3):
+        timer(lambda: colors.quantizer(palette)(arr))
+    image = Image.fromarray(arr)
+    for _ in range(3):
+        timer(fill.find_region, image, 1024, 1024, (255, 0, 0), 8, 4, "lab")
+
+
+@scenario("journal_replay_2k")
+def bench_journal_replay(timer):
+    # Journal sintetis (shape, geser, fill, undo/redo) ditulis lewat Journal lalu di-replay headless
+    with tempfile.TemporaryDirectory() as tmp:
+        raster = tilestore.TiledRaster(4000, 3000)
+        writer = journal.Journal.create(tmp, raster)
+        rng = np.random.default_rng(2)
+        for i, shape in enumerate(random_shapes(1500, raster.size)):
+            writer.log("add", uid=shape.uid, shape=shape.to_dict(), rasterize=True)
+            if i % 5 == 4:
+                dx, dy = rng.integers(-40, 40, 2).tolist()
+                writer.log("translate", uids=[shape.uid], dx=dx, dy=dy)
+            if i % 15 == 14:
+                x, y = rng.integers(0, raster.size).tolist()
+                writer.log("fill", x=x, y=y, color=[255, 0, 0], tolerance=0, connectivity=4,
+                           box=[x - 400, y - 300, x + 400, y + 300])
+            if i % 30 == 29:
+                writer.log("undo")
+                writer.log("redo")
+        writer.close()
+        _replay(timer, writer.path)
+
+
+def _replay(timer, path):
+    replayer, ops = journal.load(path)
+    for op in ops:
+        timer(replayer.apply, op)
+    timer(replayer.viewport.flush)
+
+
+# --- Skenario app (MiniPaint di Tk sungguhan) ---
+
+def make_app():
+    import tkinter as tk
+    import grafkom
+    root = tk.Tk()
+    root.geometry("1000x760")
+    # Journal di direktori sementara: ikut terukur, tapi tidak meninggalkan orphan di ~/.minipaint
+    app = grafkom.MiniPaint(root, journal_dir=tempfile.mkdtemp(prefix="minipaint-bench-"))
+    root.update()
+    return root, app
+
+
+def close_app(root, app):
+    # Journal ditutup sebelum destroy; tanpa ini run berikutnya menemukan "sesi crash"
+    if app.journal:
+        app.journal.close(remove=True)
+        app.journal = None
+    root.destroy()
+    shutil.rmtree(app.journal_dir, ignore_errors=True)
+
+
+def event(app, x, y):
+    return types.SimpleNamespace(x=x, y=y, widget=app.canvas, state=0)
+
+
+def settle(app):
+    # sync_scene membagi kerja per frame; jalankan sisanya sekarang
+    while "scene" in app.frames.pending:
+        app.frames.flush("scene")
+
+
+@scenario("freehand_stroke_10k", needs_tk=True)
+def bench_freehand(timer):
+    root, app = make_app()
+    try:
+        app.set_mode("free")
+        points = spiral(10000)
+        app.on_click(event(app, *points[0]))
+        for i, (x, y) in enumerate(points[1:]):
+            timer(app.on_drag, event(app, x, y))
+            if i % 16 == 0:
+                root.update()  # Biarkan frame scheduler berjalan seperti di event loop asli
+        timer(app.on_release, event(app, *points[-1]))
+    finally:
+        close_app(root, app)
+
+
+@scenario("drag_shape_5k_scene", needs_tk=True)
+def bench_drag(timer):
+    root, app = make_app()
+    try:
+        for shape in random_shapes(5000, (app.width, app.height)):
+            app.add_shape(shape)
+        app.redraw_all()
+        settle(app)
+        target = app.shapes[-1]
+        x0, y0, x1, y1 = target.bbox
+        app.set_mode("select")
+        x, y = x0, (y0 + y1) / 2
+        app.on_click(event(app, x, y))
+        for step in range(500):
+            timer(app.on_drag, event(app, x + step, y + step * 0.5))
+            timer(app.frames.flush, "drag")
+            root.update_idletasks()
+        app.on_release(event(app, x + 500, y + 250))
+    finally:
+        close_app(root, app)
+
+
+@scenario("redraw_all_5k", needs_tk=True)
+def bench_redraw(timer):
+    root, app = make_app()
+    try:
+        for shape in random_shapes(5000, (app.width, app.height)):
+            app.shapes.append(shape)
+        app.index.sync(app.shapes)
+        for _ in range(20):
+            timer(lambda: (app.redraw_all(), settle(app)))
+            app.scene.sync([])  # Paksa item dibuat ulang pada putaran berikutnya
+            root.update_idletasks()
+    finally:
+        close_app(root, app)
+
+
+@scenario("undo_redo_500", needs_tk=True)
+def bench_undo_redo(timer):
+    root, app = make_app()
+    try:
+        for shape in random_shapes(500, (app.width, app.height)):
+            app.add_shape(shape)
+        for _ in range(500):
+            timer(app.undo)
+        for _ in range(500):
+            timer(app.redo)
+    finally:
+        close_app(root, app)
+
+
+def tk_available():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.destroy()
+        return None
+    except Exception as e:  # ImportError atau TclError (tidak ada display)
+        return str(e) or type(e).__name__
+
+
+def run(name, fn, memory):
+    gc.collect()
+    timer = Timer()
+    start = time.perf_counter()
+    fn(timer)
+    wall = time.perf_counter() - start
+    samples = np.array(timer.samples)
+    result = {"ops": len(samples), "wall_s": wall,
+              "throughput_ops_s": len(samples) / samples.sum() if samples.sum() else 0.0,
+              "p50_ms": float(np.percentile(samples, 50)) * 1000,
+              "p95_ms": float(np.percentile(samples, 95)) * 1000,
+              "p99_ms": float(np.percentile(samples, 99)) * 1000,
+              "max_ms": float(samples.max()) * 1000}
+    if memory:
+        # Putaran terpisah: tracemalloc memperlambat, jadi tidak dipakai untuk angka waktu
+        gc.collect()
+        tracemalloc.start()
+        fn(Timer())
+        result["peak_mem_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Bandingkan p95 dan throughput; kembalikan daftar regresi."""
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "skipped" in cur or "skipped" in base:
+            continue
+        p95 = cur["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        tput = 1 - cur["throughput_ops_s"] / base["throughput_ops_s"] if base["throughput_ops_s"] else 0.0
+        flag = p95 > threshold or tput > threshold
+        print(f"{name:<24} p95 {p95:+7.1%}  throughput {-tput:+7.1%}  {'REGRESI' if flag else 'ok'}",
+              file=sys.stderr)
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark MiniPaint.")
+    parser.add_argument("-o", "--out", help="tulis hasil JSON ke file ini (default: stdout)")
+    parser.add_argument("-k", "--filter", default="", help="hanya skenario yang namanya mengandung teks ini")
+    parser.add_argument("--baseline", help="file JSON hasil sebelumnya untuk dibandingkan")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="batas regresi relatif untuk p95 dan throughput (default 0.10)")
+    parser.add_argument("--no-memory", action="store_true", help="lewati pengukuran peak memory")
+    parser.add_argument("--journal", action="append", default=[],
+                        help="replay journal sesi (.mpj) sebagai skenario tambahan; boleh berulang")
+    args = parser.parse_args(argv)
+    for path in args.journal:
+        SCENARIOS["journal:" + os.path.basename(path)] = (lambda timer, path=path: _replay(timer, path), False)
+
+    no_tk = None
+    results = {}
+    for name, (fn, needs_tk) in SCENARIOS.items():
+        if args.filter not in name:
+            continue
+        if needs_tk:
+            if no_tk is None:
+                no_tk = tk_available() or ""
+            if no_tk:
+                results[name] = {"skipped": f"Tk tidak tersedia: {no_tk}"}
+                print(f"{name}: skipped", file=sys.stderr)
+                continue
+        results[name] = run(name, fn, not args.no_memory)
+        r = results[name]
+        print(f"{name}: {r['ops']} ops, {r['throughput_ops_s']:.0f} ops/s, p95 {r['p95_ms']:.2f} ms",
+              file=sys.stderr)
+
+    report = {"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                       "numpy": np.__version__, "pillow": PIL.__version__,
+                       "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+              "results": results}
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""Operasi warna perseptual (CIE Lab, D65) pada array RGB; tidak mengimpor tkinter.
+
+Jarak warna memakai Delta E 1976 (jarak Euclid di Lab). Supaya cepat pada
+image jutaan pixel, Lab tidak dihitung per pixel: setiap operasi membuat
+LUT di ruang RGB yang di-cache per warna/palet, lalu tiap pixel cukup
+dipetakan lewat beberapa np.take.
+
+- match_table(rgb, tolerance): LUT boolean warna yang dE-nya <= tolerance,
+  hanya seluas kotak RGB yang pasti memuat bola Lab itu.
+- extract_palette(): median-cut lalu beberapa iterasi k-means (berbobot) di
+  Lab, atas histogram 15 bit (bukan atas pixel).
+- quantizer(palette): LUT 18 bit (6 bit per channel) -> warna palet terdekat.
+"""
+import math
+from functools import lru_cache
+
+import numpy as np
+
+WHITE = np.array([0.95047, 1.0, 1.08883])  # D65
+RGB_TO_XYZ = np.array([[0.4124564, 0.3575761, 0.1804375],
+                       [0.2126729, 0.7151522, 0.0721750],
+                       [0.0193339, 0.1191920, 0.9503041]])
+XYZ_TO_RGB = np.linalg.inv(RGB_TO_XYZ)
+_EPS = (6 / 29) ** 3
+_K = 3 * (6 / 29) ** 2
+
+_c = np.arange(256) / 255
+LINEAR = np.where(_c <= 0.04045, _c / 12.92, ((_c + 0.055) / 1.055) ** 2.4).astype(np.float32)  # sRGB 8 bit -> linear
+del _c
+
+
+def rgb_to_lab(rgb):
+    """Array (..., 3) uint8 -> Lab float32 dengan bentuk yang sama."""
+    lin = LINEAR[np.asarray(rgb, dtype=np.uint8)]
+    xyz = lin @ (RGB_TO_XYZ / WHITE[:, None]).T.astype(np.float32)
+    f = np.where(xyz > _EPS, np.cbrt(xyz), xyz / _K + 4 / 29)
+    lab = np.empty_like(f)
+    lab[..., 0] = 116 * f[..., 1] - 16
+    lab[..., 1] = 500 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200 * (f[..., 1] - f[..., 2])
+    return lab
+
+
+def _finv(f):
+    return np.where(f > 6 / 29, f ** 3, _K * (f - 4 / 29))
+
+
+def _encode(v):
+    # Linear -> sRGB 0..255 (float), dibatasi ke gamut
+    v = np.clip(v, 0.0, 1.0)
+    return 255 * np.where(v <= 0.0031308, v * 12.92, 1.055 * v ** (1 / 2.4) - 0.055)
+
+
+def rgb_bounds(rgb, tolerance, parts=16):
+    """Kotak RGB inklusif [(lo, hi)] x 3 yang pasti memuat semua warna dengan dE <= tolerance dari rgb.
+
+    Kubus Lab di sekitar bola dipecah parts^3 kotak kecil; kotak yang
+    menyentuh bola dibawa balik ke XYZ (monoton per sumbu) lalu ke RGB
+    linear dengan aritmetika interval, dan yang seluruhnya di luar gamut
+    dibuang. Gabungannya konservatif tetapi jauh lebih sempit dari satu
+    interval besar.
+    """
+    center = rgb_to_lab(np.array(rgb, dtype=np.uint8)).astype(np.float64)
+    t = float(tolerance)
+    edges = np.linspace(-t, t, parts + 1)
+    lo = np.stack(np.meshgrid(edges[:-1], edges[:-1], edges[:-1], indexing="ij"), axis=-1).reshape(-1, 3)
+    hi = lo + 2 * t / parts
+    near = np.maximum(lo, np.minimum(0, hi))  # Titik kotak yang paling dekat ke pusat bola
+    keep = np.einsum("ij,ij->i", near, near) <= t * t
+    lo, hi = lo[keep] + center, hi[keep] + center
+    fy = ((lo[:, 0] + 16) / 116, (hi[:, 0] + 16) / 116)
+    fx = (fy[0] + lo[:, 1] / 500, fy[1] + hi[:, 1] / 500)
+    fz = (fy[0] - hi[:, 2] / 200, fy[1] - lo[:, 2] / 200)
+    xyz_lo = np.stack([_finv(fx[0]), _finv(fy[0]), _finv(fz[0])], axis=1) * WHITE
+    xyz_hi = np.stack([_finv(fx[1]), _finv(fy[1]), _finv(fz[1])], axis=1) * WHITE
+    pos, neg = np.maximum(XYZ_TO_RGB, 0), np.minimum(XYZ_TO_RGB, 0)
+    rgb_lo = xyz_lo @ pos.T + xyz_hi @ neg.T
+    rgb_hi = xyz_hi @ pos.T + xyz_lo @ neg.T
+    inside = ((rgb_hi >= 0) & (rgb_lo <= 1)).all(axis=1)
+    if not inside.any():
+        inside[:] = True  # Tidak terjadi untuk warna 8 bit; jaga-jaga pembulatan
+    lo = np.floor(_encode(rgb_lo[inside].min(axis=0))).astype(int) - 1
+    hi = np.ceil(_encode(rgb_hi[inside].max(axis=0))).astype(int) + 1
+    return [(max(a, 0), min(b, 255)) for a, b in zip(lo.tolist(), hi.tolist())]
+
+
+def _split(arr):
+    """(R | G << 8, B) dari array (..., 3) uint8, masing-masing satu dimensi.
+
+    R dan G dibaca sekaligus sebagai uint16 little-endian lewat view
+    ber-stride 3 byte, jadi indeks LUT cukup dua gather, bukan tiga.
+    """
+    arr = np.ascontiguousarray(arr)
+    n = arr.size // 3
+    rg = np.ndarray((n,), dtype="<u2", buffer=arr, strides=(3,))
+    return rg, arr.reshape(n, 3)[:, 2]
+
+
+class MatchTable:
+    """Warna dalam jarak tolerance (dE) dari rgb, sebagai LUT yang hanya menutupi rgb_bounds().
+
+    Indeks LUT dihitung dari tabel R|G (65536 entri) dan tabel B; nilai di
+    luar kotak dipetakan ke bidang 0 yang selalu False, jadi tidak perlu
+    cabang per pixel.
+    """
+
+    def __init__(self, rgb, tolerance):
+        (r0, r1), (g0, g1), (b0, b1) = rgb_bounds(rgb, tolerance)
+        dr, dg, db = r1 - r0 + 1, g1 - g0 + 1, b1 - b0 + 1
+        target = rgb_to_lab(np.array(rgb, dtype=np.uint8))
+        lut = np.zeros((dr + 1, dg + 1, db + 1), dtype=bool)
+        gb = np.stack(np.meshgrid(np.arange(g0, g1 + 1), np.arange(b0, b1 + 1), indexing="ij"), axis=-1)
+        plane = np.empty((dg, db, 3), dtype=np.uint8)
+        plane[..., 1:] = gb
+        for i, r in enumerate(range(r0, r1 + 1)):
+            plane[..., 0] = r
+            d = rgb_to_lab(plane) - target
+            lut[i + 1, 1:, 1:] = np.einsum("...i,...i->...", d, d) <= tolerance * tolerance
+        self.lut = lut.ravel()
+        maps = []
+        for lo, hi, stride in ((r0, r1, (dg + 1) * (db + 1)), (g0, g1, db + 1), (b0, b1, 1)):
+            m = np.zeros(256, dtype=np.int32)
+            m[lo:hi + 1] = np.arange(1, hi - lo + 2) * stride
+            maps.append(m)
+        # Indeks 0 pada salah satu sumbu = di luar kotak; jumlah indeksnya tetap jatuh di bidang False
+        self.rg = (maps[0][None, :] + maps[1][:, None]).ravel()  # [G, R] -> R | G << 8
+        self.b = maps[2]
+        self.nbytes = self.lut.nbytes + self.rg.nbytes
+
+    def mask(self, arr):
+        """Mask boolean (h, w) pixel arr yang cocok."""
+        rg, b = _split(arr)
+        flat = self.rg[rg]
+        flat += self.b[b]
+        return self.lut[flat].reshape(arr.shape[:-1])
+
+
+@lru_cache(maxsize=16)
+def _match_table(rgb, tolerance):
+    return MatchTable(rgb, tolerance)
+
+
+def match_table(rgb, tolerance):
+    # Di-cache per (warna, toleransi): fill/replace berulang dengan warna yang sama tidak membangun LUT lagi
+    return _match_table(tuple(int(v) for v in rgb[:3]), float(tolerance))
+
+
+def color_mask(arr, rgb, tolerance=0):
+    # Seperti fill.color_mask, tetapi tolerance dalam dE Lab
+    return match_table(rgb, tolerance).mask(arr)
+
+
+def replace_color(src, dst, tolerance=0):
+    # Untuk rasterops.map_tiles: warna dalam dE <= tolerance dari src diganti dst
+    table = match_table(src, tolerance)
+
+    def apply(arr):
+        out = arr.copy()
+        out[table.mask(arr)] = dst
+        return out
+    return apply
+
+
+# --- Palet ---
+
+def histogram(arr, out=None, step=1):
+    """Tambahkan pixel arr ke histogram 15 bit; baris out = (jumlah, sum R, sum G, sum B) per bin.
+
+    step > 1 hanya mengambil setiap step pixel per sumbu (cukup untuk palet).
+    """
+    arr = arr[::step, ::step].reshape(-1, 3)
+    idx = (arr[:, 0] >> 3).astype(np.int32) << 10
+    idx |= (arr[:, 1] >> 3).astype(np.int32) << 5
+    idx |= arr[:, 2] >> 3
+    if out is None:
+        out = np.zeros((4, 1 << 15))
+    out[0] += np.bincount(idx, minlength=1 << 15)
+    for c in range(3):
+        out[c + 1] += np.bincount(idx, weights=arr[:, c], minlength=1 << 15)
+    return out
+
+
+def raster_histogram(raster, step=2):
+    # Histogram seluruh TiledRaster; area tanpa tile dihitung sebagai warna latar (bobot sesuai step)
+    t = raster.tile
+    out = np.zeros((4, 1 << 15))
+    covered = 0
+    for (tx, ty), slot in raster.tiles.items():
+        w, h = min(t, raster.width - tx * t), min(t, raster.height - ty * t)
+        if w > 0 and h > 0:
+            histogram(raster.slots[slot][:h, :w], out, step)
+            covered += -(-w // step) * -(-h // step)
+    rest = -(-raster.width // step) * -(-raster.height // step) - covered
+    if rest:
+        bg = np.array(raster.background, dtype=np.float64)
+        r, g, b = (int(v) >> 3 for v in raster.background)
+        out[:, (r << 10) | (g << 5) | b] += np.concatenate([[rest], bg * rest])
+    return out
+
+
+def _nearest(lab, centers):
+    # Indeks center terdekat untuk setiap baris lab (dihitung per potongan supaya memori kecil)
+    result = np.empty(len(lab), dtype=np.int32)
+    c2 = np.einsum("ij,ij->i", centers, centers)
+    for i in range(0, len(lab), 16384):
+        part = lab[i:i + 16384]
+        d = c2[None, :] - 2 * part @ centers.T
+        result[i:i + 16384] = d.argmin(axis=1)
+    return result
+
+
+def _median_cut(lab, weights, k):
+    boxes = [np.arange(len(lab))]
+    while len(boxes) < k:
+        # Pecah kotak dengan rentang terbesar (dikali bobot supaya area luas diprioritaskan)
+        spans = [np.ptp(lab[b], axis=0) if len(b) > 1 else np.zeros(3) for b in boxes]
+        scores = [s.max() * math.sqrt(weights[b].sum()) for s, b in zip(spans, boxes)]
+        i = int(np.argmax(scores))
+        if scores[i] <= 0:
+            break
+        box, axis = boxes.pop(i), int(spans[i].argmax())
+        order = box[np.argsort(lab[box, axis], kind="stable")]
+        cum = np.cumsum(weights[order])
+        cut = min(max(int(np.searchsorted(cum, cum[-1] / 2)), 1), len(order) - 1)
+        boxes += [order[:cut], order[cut:]]
+    return boxes
+
+
+def palette_from_histogram(hist, k, iterations=8):
+    """Palet hingga k warna RGB (urut dari yang paling banyak) dari histogram().
+
+    Median-cut memberi titik awal, k-means berbobot di Lab merapikannya.
+    Warna palet = rata-rata RGB asli anggota cluster, jadi warna datar
+    (mis. putih murni) tetap persis.
+    """
+    used = np.flatnonzero(hist[0])
+    weights = hist[0, used]
+    means = hist[1:, used].T / weights[:, None]
+    lab = rgb_to_lab(np.rint(means).astype(np.uint8)).astype(np.float64)
+    boxes = _median_cut(lab, weights, k)
+    centers = np.array([np.average(lab[b], axis=0, weights=weights[b]) for b in boxes])
+    labels = np.repeat(np.arange(len(boxes)), [len(b) for b in boxes])[np.argsort(np.concatenate(boxes))]
+    for _ in range(iterations):
+        mass = np.bincount(labels, weights=weights, minlength=len(centers))
+        live = mass > 0
+        for c in range(3):
+            sums = np.bincount(labels, weights=weights * lab[:, c], minlength=len(centers))
+            centers[live, c] = sums[live] / mass[live]
+        new = _nearest(lab, centers)
+        if np.array_equal(new, labels):
+            break
+        labels = new
+    mass = np.bincount(labels, weights=weights, minlength=len(centers))
+    rgb = np.stack([np.bincount(labels, weights=hist[c + 1, used], minlength=len(centers)) for c in range(3)], axis=1)
+    keep = np.flatnonzero(mass > 0)
+    keep = keep[np.argsort(-mass[keep], kind="stable")]
+    palette = []
+    for i in keep.tolist():
+        color = tuple(int(v) for v in np.rint(rgb[i] / mass[i]).tolist())
+        if color not in palette:
+            palette.append(color)
+    return palette
+
+
+def extract_palette(arr, k=16, step=2):
+    """Palet hingga k warna dominan dari array RGB."""
+    return palette_from_histogram(histogram(arr, step=step), k)
+
+
+_v = np.arange(65536, dtype=np.int32)
+CELL_RG = ((_v & 255) >> 2 << 12) | (_v >> 10 << 6)  # R | G << 8 -> bagian indeks sel 6 bit
+CELL_B = np.arange(256, dtype=np.int32) >> 2
+del _v
+
+
+def _cells(arr):
+    rg, b = _split(arr)
+    idx = CELL_RG[rg]
+    idx += CELL_B[b]
+    return idx.reshape(arr.shape[:-1])
+
+
+@lru_cache(maxsize=8)
+def _quantize_lut(palette):
+    # Pusat setiap sel 6 bit -> warna palet terdekat (dE), dikemas RGBX supaya satu take per pixel
+    levels = np.arange(64, dtype=np.uint8) * 4 + 2
+    grid = np.stack(np.meshgrid(levels, levels, levels, indexing="ij"), axis=-1).reshape(-1, 3)
+    pal = np.array(palette, dtype=np.uint8)
+    lut = np.zeros((len(grid), 4), dtype=np.uint8)
+    lut[:, :3] = pal[_nearest(rgb_to_lab(grid).astype(np.float64), rgb_to_lab(pal).astype(np.float64))]
+    # Warna palet sendiri selalu dipetakan ke dirinya (pusat sel bisa lebih dekat ke warna lain)
+    lut[_cells(pal), :3] = pal
+    return lut.view(np.uint32).ravel()
+
+
+def quantizer(palette):
+    """Fungsi array RGB -> array yang setiap pixelnya diganti warna palet terdekat (untuk map_tiles).
+
+    Pixel dipetakan per sel 6 bit per channel; LUT di-cache per palet.
+    """
+    lut = _quantize_lut(tuple(tuple(int(v) for v in c) for c in palette))
+
+    def apply(arr):
+        out = lut[_cells(arr)]
+        return out.view(np.uint8).reshape(out.shape + (4,))[..., :3]
+    return apply
@@ -0,0 +1,439 @@
+"""Inti headless: geometri Shape, pembuat titik shape, dan rasterizer PIL.
+
+Modul ini tidak mengimpor tkinter sehingga bisa dipakai di server/CI dan
+oleh worker CLI render.py.
+"""
+import functools
+import json
+import math
+
+import numpy as np
+
+import spatial
+
+POLYGON_TYPES = ("triangle", "star", "hexagon", "pentagon", "parallelogram", "trapezoid", "rhombus")
+# Dipanggang ke raster saat dibuat (fill berhenti di outline-nya); garis dan teks hanya vektor
+BAKED_TYPES = frozenset(("rect", "oval", "ellipse", "stroke") + POLYGON_TYPES)
+
+class ShapeStore:
+    """Koordinat semua shape dalam satu array float64 (N x 2) yang kontigu.
+
+    Setiap Shape menyimpan offset dan jumlah titiknya di array ini. Slot yang
+    dilepas (shape dihapus dari memori) dipakai ulang oleh shape baru dengan
+    jumlah titik yang sama.
+    """
+
+    def __init__(self, capacity=1024):
+        self.coords = np.zeros((capacity, 2), dtype=np.float64)
+        self.size = 0
+        self.free = {}  # jumlah titik -> list offset yang bisa dipakai ulang
+
+    def alloc(self, count):
+        slots = self.free.get(count)
+        if slots:
+            return slots.pop()
+        if self.size + count > len(self.coords):
+            grown = np.zeros((max(len(self.coords) * 2, self.size + count), 2), dtype=np.float64)
+            grown[:self.size] = self.coords[:self.size]
+            self.coords = grown
+        offset = self.size
+        self.size += count
+        return offset
+
+    def release(self, offset, count):
+        self.free.setdefault(count, []).append(offset)
+
+    def point_index(self, shapes):
+        # Index baris semua titik milik shapes, untuk operasi batch
+        offsets = np.fromiter((s.offset for s in shapes), dtype=np.intp, count=len(shapes))
+        counts = np.fromiter((s.count for s in shapes), dtype=np.intp, count=len(shapes))
+        starts = np.cumsum(counts) - counts
+        return np.repeat(offsets - starts, counts) + np.arange(counts.sum()), counts
+
+    def bounds(self, shapes):
+        # bbox gabungan semua titik shapes (seleksi banyak shape)
+        pts = self.coords[self.point_index(shapes)[0]]
+        x0, y0 = pts.min(axis=0).tolist()
+        x1, y1 = pts.max(axis=0).tolist()
+        return x0, y0, x1, y1
+
+    def centroid(self, shapes):
+        # Pivot bersama untuk rotasi/skala seleksi: rata-rata semua titik
+        return tuple(self.coords[self.point_index(shapes)[0]].mean(axis=0).tolist())
+
+    def translate(self, shapes, dx, dy):
+        idx, _ = self.point_index(shapes)
+        self.coords[idx] += (dx, dy)
+        Shape.touch_all(shapes)
+
+    def rotate(self, shapes, angle_deg, pivot=None):
+        # pivot None: setiap shape diputar terhadap titik beratnya sendiri
+        self._linear(shapes, rotation(angle_deg)[:, :2], pivot)
+
+    def scale(self, shapes, sx, sy, pivot=None):
+        self._linear(shapes, scaling(sx, sy)[:, :2], pivot)
+
+    def _linear(self, shapes, m, pivot):
+        # Titik float64 tidak pernah dibulatkan, jadi transformasi berulang tidak mengubah bentuk
+        idx, counts = self.point_index(shapes)
+        pts = self.coords[idx]
+        center = self._pivots(pts, counts, pivot)
+        self.coords[idx] = (pts - center) @ m.T + center
+        Shape.touch_all(shapes)
+
+    @staticmethod
+    def _pivots(pts, counts, pivot):
+        if pivot is not None:
+            return np.asarray(pivot, dtype=np.float64)
+        starts = np.cumsum(counts) - counts
+        centers = np.add.reduceat(pts, starts, axis=0) / counts[:, None]
+        return np.repeat(centers, counts, axis=0)
+
+
+@functools.lru_cache(maxsize=512)
+def _cos_sin(angle_deg):
+    # Kelipatan 90 derajat dibuat eksak (cos 90 = 0, bukan 6e-17); sudut tombol/keyboard selalu sama
+    quarter, rest = divmod(angle_deg, 90)
+    if rest == 0:
+        return ((1.0, 0.0), (0.0, 1.0), (-1.0, 0.0), (0.0, -1.0))[int(quarter) % 4]
+    a = math.radians(angle_deg)
+    return math.cos(a), math.sin(a)
+
+
+def rotation(angle_deg, pivot=(0, 0)):
+    """Matriks affine 2x3 rotasi angle_deg terhadap pivot (searah jarum jam di layar, y ke bawah)."""
+    c, s = _cos_sin(angle_deg)
+    px, py = pivot
+    return np.array([[c, -s, px - c * px + s * py], [s, c, py - s * px - c * py]])
+
+
+def scaling(sx, sy, pivot=(0, 0)):
+    px, py = pivot
+    return np.array([[sx, 0.0, px - sx * px], [0.0, sy, py - sy * py]])
+
+
+class LiveTransform:
+    """Transformasi interaktif (mis. drag handle rotasi) untuk sekumpulan shape.
+
+    Titik awal disalin sekali; setiap frame titik = titik awal x matriks 2x3
+    total, bukan rotasi kecil yang ditumpuk, jadi tidak ada error kumulatif
+    dan tidak ada alokasi array baru per frame.
+    """
+
+    def __init__(self, shapes):
+        self.shapes = list(shapes)
+        self.idx, _ = Shape.store.point_index(self.shapes)
+        self.base = Shape.store.coords[self.idx]
+        self.out = np.empty_like(self.base)
+
+    def set(self, matrix):
+        np.matmul(self.base, matrix[:, :2].T, out=self.out)
+        self.out += matrix[:, 2]
+        Shape.store.coords[self.idx] = self.out
+        Shape.touch_all(self.shapes)
+
+
+class Shape:
+    __slots__ = ("type", "color", "width", "line_type", "text", "uid",
+                 "offset", "count", "version", "_bbox", "_bbox_version")
+
+    store = ShapeStore()
+    next_uid = 1  # uid stabil per shape, dipakai format dokumen untuk autosave
+
+    def __init__(self, shape_type, points, color, width, line_type="solid", text=None):
+        self.uid = Shape.next_uid
+        Shape.next_uid += 1
+        self.type = shape_type
+        self.color = color
+        self.width = width
+        self.line_type = line_type
+        self.text = text
+        self.count = 0
+        self.version = 0
+        self._bbox = None
+        self._bbox_version = -1
+        self.points = points
+
+    def __del__(self):
+        try:
+            if self.count:
+                self.store.release(self.offset, self.count)
+        except Exception:
+            pass  # Saat interpreter dimatikan
+
+    @property
+    def points(self):
+        o = self.offset
+        return [tuple(p) for p in self.store.coords[o:o + self.count].tolist()]
+
+    @points.setter
+    def points(self, points):
+        if len(points) != self.count:
+            if self.count:
+                self.store.release(self.offset, self.count)
+            self.offset = self.store.alloc(len(points))
+            self.count = len(points)
+        self.store.coords[self.offset:self.offset + self.count] = points
+        self.version += 1
+
+    @property
+    def flat(self):
+        # Koordinat datar [x0, y0, x1, y1, ...] untuk canvas.coords
+        o = self.offset
+        return self.store.coords[o:o + self.count].ravel().tolist()
+
+    def screen_flat(self, scale):
+        # Seperti flat, dikali zoom view (pixel layar per unit dokumen)
+        if scale == 1:
+            return self.flat
+        o = self.offset
+        return (self.store.coords[o:o + self.count] * scale).ravel().tolist()
+
+    @classmethod
+    def from_arrays(cls, uids, types, colors, widths, line_types, texts, counts, coords):
+        """Buat banyak shape sekaligus (untuk loader dokumen); titik disalin ke satu blok store."""
+        base = cls.store.alloc(len(coords))
+        cls.store.coords[base:base + len(coords)] = coords
+        offsets = (np.cumsum(counts) - counts + base).tolist()
+        shapes = []
+        for uid, t, c, w, lt, text, offset, count in zip(uids, types, colors, widths, line_types, texts,
+                                                        offsets, counts.tolist()):
+            s = cls.__new__(cls)
+            s.uid, s.type, s.color, s.width, s.line_type, s.text = uid, t, c, w, lt, text
+            s.offset, s.count, s.version = offset, count, 1
+            s._bbox, s._bbox_version = None, -1
+            shapes.append(s)
+        if shapes:
+            cls.next_uid = max(cls.next_uid, max(uids) + 1)
+        return shapes
+
+    @staticmethod
+    def touch_all(shapes):
+        for s in shapes:
+            s.version += 1
+
+    def draw(self, canvas, scale=1.0):
+        # Dispatch lewat tabel per tipe (DRAW), bukan rantai if/elif; scale = zoom view
+        draw = DRAW.get(self.type)
+        return draw(canvas, self, scale) if draw else None
+
+    @property
+    def bbox(self):
+        # Di-cache sampai geometri berubah (version naik)
+        if self._bbox_version != self.version:
+            o = self.offset
+            pts = self.store.coords[o:o + self.count]
+            x0, y0 = pts.min(axis=0).tolist()
+            x1, y1 = pts.max(axis=0).tolist()
+            self._bbox = (x0, y0, x1, y1)
+            self._bbox_version = self.version
+        return self._bbox
+
+    def is_clicked(self, x, y):
+        margin = 5
+        x0, y0, x1, y1 = self.bbox
+        return x0-margin <= x <= x1+margin and y0-margin <= y <= y1+margin
+
+    def contains(self, x, y, margin=5):
+        # Hit-test sesuai geometri shape, bukan hanya bbox
+        if not self.is_clicked(x, y):
+            return False
+        tol = self.width / 2 + margin
+        if self.type in ("line", "stroke"):
+            return spatial.polyline_distance(x, y, self.points) <= tol
+        elif self.type in ("oval", "ellipse"):
+            x0, y0, x1, y1 = self.bbox
+            rx, ry = (x1 - x0) / 2 + tol, (y1 - y0) / 2 + tol
+            nx, ny = (x - (x0 + x1) / 2) / rx, (y - (y0 + y1) / 2) / ry
+            return nx * nx + ny * ny <= 1
+        elif self.type in POLYGON_TYPES:
+            return (spatial.point_in_polygon(x, y, self.points)
+                    or spatial.polyline_distance(x, y, self.points, closed=True) <= tol)
+        return True
+
+    def translate(self, dx, dy):
+        o = self.offset
+        self.store.coords[o:o + self.count] += (dx, dy)
+        self.version += 1
+
+    def rotate(self, angle_deg):
+        # Terhadap titik berat sendiri; tanpa pembulatan supaya rotasi berulang tidak merusak bentuk
+        o = self.offset
+        pts = self.store.coords[o:o + self.count]
+        center = pts.mean(axis=0)
+        pts -= center
+        pts[:] = pts @ rotation(angle_deg)[:, :2].T
+        pts += center
+        self.version += 1
+
+    def to_dict(self):
+        d = {"type": self.type, "points": self.points, "color": self.color, "width": self.width}
+        if self.line_type != "solid":
+            d["line_type"] = self.line_type
+        if self.text:
+            d["text"] = self.text
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["type"], [tuple(p) for p in d["points"]], d["color"], d["width"],
+                   d.get("line_type", "solid"), d.get("text"))
+
+
+LINE_OPTIONS = {"solid": {}, "dashed": {"dash": (8, 4)}, "arrow": {"arrow": "last"}}
+
+
+def _width(s, k):
+    # Tebal garis ikut zoom, minimal satu pixel layar
+    return max(s.width * k, 1)
+
+
+def _draw_line(canvas, s, k):
+    options = LINE_OPTIONS.get(s.line_type)
+    if options is not None:
+        return canvas.create_line(s.screen_flat(k), fill=s.color, width=_width(s, k), **options)
+
+
+def _draw_stroke(canvas, s, k):
+    return canvas.create_line(s.screen_flat(k), fill=s.color, width=_width(s, k), capstyle="round",
+                              joinstyle="round")
+
+
+def _draw_rect(canvas, s, k):
+    return canvas.create_rectangle(s.screen_flat(k), outline=s.color, width=_width(s, k))
+
+
+def _draw_oval(canvas, s, k):
+    return canvas.create_oval(s.screen_flat(k), outline=s.color, width=_width(s, k))
+
+
+def _draw_polygon(canvas, s, k):
+    return canvas.create_polygon(s.screen_flat(k), outline=s.color, fill="", width=_width(s, k))
+
+
+def _draw_text(canvas, s, k):
+    if s.text:
+        x, y = s.screen_flat(k)[:2]
+        size = max(1, round(max(10, s.width*3) * k))
+        return canvas.create_text(x, y, text=s.text, fill=s.color, font=("Arial", size))
+
+
+# Fungsi gambar canvas per tipe shape; ellipse diperlakukan sama dengan oval
+DRAW = {"line": _draw_line, "stroke": _draw_stroke, "rect": _draw_rect, "oval": _draw_oval,
+        "ellipse": _draw_oval, "text": _draw_text}
+DRAW.update(dict.fromkeys(POLYGON_TYPES, _draw_polygon))
+
+
+@functools.lru_cache(maxsize=None)
+def unit_polygon(sides):
+    """Titik poligon beraturan di lingkaran satuan (y ke bawah), titik pertama di atas."""
+    angle = math.pi / 2 + np.arange(sides) * (2 * math.pi / sides)
+    template = np.stack([np.cos(angle), -np.sin(angle)], axis=1)
+    template.flags.writeable = False  # Dibagi semua pemanggil lewat cache
+    return template
+
+
+@functools.lru_cache(maxsize=None)
+def unit_star(points=5, ratio=0.5):
+    # Bintang: sudut luar di radius 1 dan sudut dalam di radius ratio, bergantian
+    template = unit_polygon(points * 2) * np.where(np.arange(points * 2) % 2, ratio, 1.0)[:, None]
+    template.flags.writeable = False
+    return template
+
+
+def _place(template, x0, y0, x1, y1):
+    # Template satuan diskalakan ke lingkaran terbesar di dalam kotak drag, satu operasi affine
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    r = min(abs(x1 - x0), abs(y1 - y0)) / 2
+    return [tuple(p) for p in (template * r + (cx, cy)).tolist()]
+
+
+def make_star(x0, y0, x1, y1):
+    return _place(unit_star(), x0, y0, x1, y1)
+
+
+def make_polygon(x0, y0, x1, y1, sides):
+    return _place(unit_polygon(sides), x0, y0, x1, y1)
+
+
+def make_parallelogram(x0, y0, x1, y1):
+    # Parallelogram dengan offset 1/4 lebar
+    dx = (x1 - x0) / 4
+    return [
+        (x0 + dx, y0),
+        (x1, y0),
+        (x1 - dx, y1),
+        (x0, y1)
+    ]
+
+def make_trapezoid(x0, y0, x1, y1):
+    # Trapezoid dengan sisi atas lebih pendek
+    dx = abs(x1 - x0) / 4
+    return [
+        (x0 + dx, y0),
+        (x1 - dx, y0),
+        (x1, y1),
+        (x0, y1)
+    ]
+
+def make_rhombus(x0, y0, x1, y1):
+    # Rhombus (belah ketupat)
+    mx = (x0 + x1) / 2
+    my = (y0 + y1) / 2
+    return [
+        (mx, y0),
+        (x1, my),
+        (mx, y1),
+        (x0, my)
+    ]
+
+
+def draw_polyline(draw, pts, color, width):
+    # Satu panggilan line dengan sambungan bulat, plus tutup bulat di kedua ujung
+    draw.line(pts, fill=color, width=width, joint="curve")
+    r = width / 2
+    if width > 2:
+        for x, y in (pts[0], pts[-1]):
+            draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+
+
+def draw_shape(draw, shape, origin=(0, 0)):
+    """Gambar shape ke ImageDraw; origin = posisi image di koordinat dokumen."""
+    ox, oy = origin
+    pts = [(x - ox, y - oy) for x, y in shape.points]
+    if shape.type in ("rect", "oval", "ellipse"):
+        # PIL menolak kotak terbalik (drag ke kiri/atas)
+        (x0, y0), (x1, y1) = pts
+        pts = [(min(x0, x1), min(y0, y1)), (max(x0, x1), max(y0, y1))]
+    if shape.type == "rect":
+        draw.rectangle(pts, outline=shape.color, width=shape.width)
+    elif shape.type == "oval" or shape.type == "ellipse":
+        draw.ellipse(pts, outline=shape.color, width=shape.width)
+    elif shape.type in POLYGON_TYPES:
+        draw.polygon(pts, outline=shape.color, width=shape.width)
+    elif shape.type == "line":
+        draw.line(pts, fill=shape.color, width=shape.width)
+    elif shape.type == "stroke":
+        draw_polyline(draw, pts, shape.color, shape.width)
+    # Untuk text, abaikan (tidak perlu diisi)
+
+
+def load_document(path):
+    """Baca dokumen JSON: {"width", "height", "background", "shapes": [...]}."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    data["shapes"] = [Shape.from_dict(d) for d in data.get("shapes", [])]
+    return data
+
+
+def save_document(path, shapes, size, background="white"):
+    data = {"width": size[0], "height": size[1], "background": background,
+            "shapes": [s.to_dict() for s in shapes]}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def render_document(doc):
+    # Rasterisasi seluruh dokumen ke image baru, dengan AA dan gaya yang sama seperti canvas Tk
+    import sprites
+    return sprites.render(doc["shapes"], (doc["width"], doc["height"]), doc.get("background", "white"))
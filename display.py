@@ -0,0 +1,79 @@
+"""Tampilan raster di canvas sebagai grid tile PhotoImage yang diperbarui per region."""
+import math
+import tkinter as tk
+
+from PIL import ImageTk
+
+
+class TiledDisplay:
+    """Menampilkan PIL image sebagai tile PhotoImage yang persisten.
+
+    Hanya tile yang beririsan dengan region yang di-refresh yang di-paste ulang, jadi
+    goresan kecil tidak lagi menyalin seluruh bitmap ke Tk.
+    """
+
+    def __init__(self, canvas, tile=128):
+        self.canvas = canvas
+        self.tile = tile
+        self.tiles = {}  # (tx, ty) -> (PhotoImage, item id)
+        self.size = None
+        self.origin = (0, 0)  # Posisi image di koordinat dokumen/canvas
+        self.preview = None
+
+    def _rebuild(self, image):
+        for photo, item in self.tiles.values():
+            self.canvas.delete(item)
+        self.tiles = {}
+        self.size = image.size
+        t = self.tile
+        w, h = image.size
+        ox, oy = self.origin
+        for ty in range(0, (h + t - 1) // t):
+            for tx in range(0, (w + t - 1) // t):
+                box = (tx * t, ty * t, min((tx + 1) * t, w), min((ty + 1) * t, h))
+                photo = ImageTk.PhotoImage(image.crop(box))
+                item = self.canvas.create_image(ox + box[0], oy + box[1], anchor=tk.NW, image=photo,
+                                                tags="background")
+                self.tiles[tx, ty] = (photo, item)
+        self.canvas.tag_lower("background")
+
+    def refresh_all(self, image, origin=None):
+        if origin is not None and origin != self.origin:
+            self.origin = origin
+            self._rebuild(image)
+        elif image.size != self.size:
+            self._rebuild(image)
+        else:
+            ox, oy = self.origin
+            self.refresh(image, (ox, oy, ox + image.width, oy + image.height))
+
+    def refresh(self, image, bbox=None):
+        """Kirim region bbox (eksklusif, koordinat dokumen) ke Tk."""
+        if image.size != self.size:
+            self.refresh_all(image)
+            return
+        if bbox is None:
+            return
+        w, h = image.size
+        ox, oy = self.origin
+        x0, y0 = max(int(bbox[0]) - ox, 0), max(int(bbox[1]) - oy, 0)
+        x1, y1 = min(int(math.ceil(bbox[2])) - ox, w), min(int(math.ceil(bbox[3])) - oy, h)
+        if x0 >= x1 or y0 >= y1:
+            return
+        t = self.tile
+        for ty in range(y0 // t, (y1 - 1) // t + 1):
+            for tx in range(x0 // t, (x1 - 1) // t + 1):
+                photo, item = self.tiles[tx, ty]
+                box = (tx * t, ty * t, min((tx + 1) * t, w), min((ty + 1) * t, h))
+                photo.paste(image.crop(box))
+
+    def show_preview(self, image, origin):
+        # Gambar sementara (mis. preview saat load) di atas tile background
+        self.preview = ImageTk.PhotoImage(image)
+        self.canvas.delete("preview")
+        self.canvas.create_image(*origin, anchor=tk.NW, image=self.preview, tags="preview")
+
+    def hide_preview(self):
+        if self.preview:
+            self.canvas.delete("preview")
+            self.preview = None
@@ -0,0 +1,352 @@
+"""Format dokumen native (.mpd): stream record berisi shape dan tile raster.
+
+Layout file: MAGIC lalu record `tag (4 byte) | panjang payload (u32) | payload`,
+payload di-pad ke kelipatan 8 byte. Record dibaca berurutan dan record yang
+lebih baru menimpa yang lama, jadi autosave cukup menambahkan record di akhir
+file. Modul ini tidak mengimpor tkinter.
+"""
+import contextlib
+import gc
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+
+import core
+import tilestore
+
+MAGIC = b"MPDOC\x00\x01\x00"
+BATCH = 65536  # Shape per record SHPS
+
+HEAD = b"HEAD"  # Ukuran dokumen, warna latar, ukuran tile
+SHAPES = b"SHPS"  # Batch shape: tambah, atau timpa shape dengan uid yang sama (termasuk posisi z-nya)
+DELETE = b"DELS"  # uid shape yang dihapus
+TILE = b"TILE"  # Satu tile raster (zlib)
+CLEAR = b"RCLR"  # Semua tile raster dikosongkan
+GROUPS = b"GRPS"  # Grup shape (JSON list bertingkat berisi uid), menggantikan record GRPS sebelumnya
+META = b"META"  # Metadata JSON bebas (mis. seq journal yang sudah tercakup checkpoint)
+
+_RECORD = struct.Struct("<4sI")
+_HEAD = struct.Struct("<IIBBBxI")
+_TILE = struct.Struct("<ii")
+_BATCH = struct.Struct("<II")
+
+
+def _write_record(f, tag, payload):
+    f.write(_RECORD.pack(tag, len(payload)))
+    f.write(payload)
+    pad = -len(payload) % 8
+    if pad:
+        f.write(b"\0" * pad)
+
+
+def encode_shapes(snap, sel):
+    """Record SHPS untuk shape snap.shapes[sel]: kolom numpy + tabel string + blok koordinat.
+
+    Kolom z berisi indeks shape di snap.shapes (urutan gambar), bukan uid.
+    """
+    n = len(sel)
+    counts = snap.counts[sel]
+    rows = np.repeat(snap.starts[sel] - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+    coords = snap.coords[rows]
+    strings = {}
+
+    def sid(value):
+        return strings.setdefault(value, len(strings))
+
+    # Banyak shape berbagi atribut yang sama: baris meta di-cache per kombinasi
+    rows = {}
+    meta = []
+    shapes = snap.shapes
+    for i in sel.tolist():
+        s = shapes[i]
+        key = (s.type, s.color, s.line_type, s.text, s.width)
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = (sid(s.type), sid(s.color), sid(s.line_type),
+                               -1 if s.text is None else sid(s.text), s.width)
+        meta.append(row)
+    meta = np.array(meta, dtype=np.int32).reshape(n, 5)
+    return b"".join([_BATCH.pack(n, len(coords)), snap.uids[sel].tobytes(), sel.astype(np.int64).tobytes(), counts.astype(np.uint32).tobytes(),
+                     np.ascontiguousarray(meta[:, 4]).tobytes(), np.ascontiguousarray(meta[:, :4]).tobytes(),
+                     coords.tobytes(), json.dumps(list(strings)).encode("utf-8")])
+
+
+def decode_columns(buf):
+    # Hanya numpy/list biasa, aman dijalankan di thread worker
+    n, total = _BATCH.unpack_from(buf)
+    o = _BATCH.size
+    uids = np.frombuffer(buf, np.int64, n, o).tolist()
+    o += 8 * n
+    z = np.frombuffer(buf, np.int64, n, o).tolist()
+    o += 8 * n
+    counts = np.frombuffer(buf, np.uint32, n, o).astype(np.intp)
+    o += 4 * n
+    widths = np.frombuffer(buf, np.int32, n, o).tolist()
+    o += 4 * n
+    meta = np.frombuffer(buf, np.int32, 4 * n, o).reshape(n, 4)
+    o += 16 * n
+    coords = np.frombuffer(buf, np.float64, 2 * total, o).reshape(total, 2)
+    o += 16 * total
+    table = np.array(json.loads(buf[o:].decode("utf-8")) + [None], dtype=object)  # index -1 -> None
+    types, colors, line_types, texts = (table[meta[:, i]].tolist() for i in range(4))
+    return z, (uids, types, colors, widths, line_types, texts, counts, coords)
+
+
+def find_groups(ops):
+    # Isi record GRPS terakhir (untuk groups.GroupTree.from_list)
+    for tag, data in reversed(ops):
+        if tag == GROUPS:
+            return data
+    return []
+
+
+def find_meta(ops):
+    for tag, data in reversed(ops):
+        if tag == META:
+            return data
+    return {}
+
+
+def build_shapes(ops):
+    """Terapkan operasi shape dari read_parts(); kembalikan daftar shape urut z."""
+    # Jutaan objek Shape baru memicu GC generasional berulang kali; tunda sampai selesai
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        shapes = {}  # uid -> (z, shape)
+        for tag, data in ops:
+            if tag == SHAPES:
+                z, columns = data
+                for shape_z, shape in zip(z, core.Shape.from_arrays(*columns)):
+                    shapes[shape.uid] = (shape_z, shape)
+            elif tag == DELETE:
+                for uid in data:
+                    shapes.pop(uid, None)
+        return [shape for _, shape in sorted(shapes.values(), key=lambda item: (item[0], item[1].uid))]
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class DocumentReader:
+    """Membaca record satu per satu dari file; payload baru di-decode saat dibutuhkan."""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        if self.file.read(len(MAGIC)) != MAGIC:
+            self.file.close()
+            raise ValueError("Bukan file dokumen Mini Paint (.mpd)")
+        self.end = len(MAGIC)  # Offset setelah record utuh terakhir yang sudah dibaca
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def records(self):
+        while True:
+            header = self.file.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                return
+            tag, length = _RECORD.unpack(header)
+            payload = self.file.read(length)
+            if len(payload) < length:
+                return  # Record terakhir terpotong (mis. crash saat autosave): abaikan
+            self.file.seek(-length % 8, os.SEEK_CUR)
+            self.end = self.file.tell()
+            yield tag, payload
+
+    def read_parts(self, progress=None):
+        """Baca raster dan kolom shape tanpa membuat Shape (aman di thread worker).
+
+        Mengembalikan (TiledRaster, ops) untuk build_shapes(ops), find_groups(ops) dan find_meta(ops).
+        """
+        size = os.fstat(self.file.fileno()).st_size
+        raster = None
+        ops = []
+        for tag, payload in self.records():
+            if tag == HEAD:
+                w, h, r, g, b, tile = _HEAD.unpack(payload)
+                if raster is None:
+                    raster = tilestore.TiledRaster(w, h, (r, g, b), tile)
+                else:
+                    raster.resize_canvas(w, h)
+            elif tag == SHAPES:
+                ops.append((SHAPES, decode_columns(payload)))
+            elif tag == DELETE:
+                ops.append((DELETE, np.frombuffer(payload, np.int64).tolist()))
+            elif tag == TILE:
+                key = _TILE.unpack_from(payload)
+                data = zlib.decompress(payload[_TILE.size:])
+                t = raster.tile
+                raster.put_tile(key, np.frombuffer(data, np.uint8).reshape(t, t, 3))
+            elif tag in (GROUPS, META):
+                ops.append((tag, json.loads(payload.decode("utf-8"))))
+            elif tag == CLEAR:
+                raster.drop(raster.swap_tiles({}).values())
+            if progress:
+                progress(self.file.tell() / size)
+        if raster is None:
+            raise ValueError("Dokumen tidak memiliki header")
+        raster.take_changes()
+        return raster, ops
+
+    def load(self):
+        """Terapkan semua record; kembalikan (TiledRaster, daftar shape urut z)."""
+        raster, ops = self.read_parts()
+        return raster, build_shapes(ops)
+
+
+def read(path):
+    with DocumentReader(path) as reader:
+        return reader.load()
+
+
+class Snapshot:
+    """State dokumen yang dibekukan di thread utama supaya bisa ditulis dari thread lain.
+
+    Koordinat disalin, raster memakai snapshot copy-on-write, dan daftar tile
+    yang berubah diambil dari raster; release() mengembalikannya jika gagal.
+    changes=False (checkpoint journal, hanya untuk save()) membiarkan daftar
+    itu untuk autosave dokumen.
+    """
+
+    def __init__(self, shapes, raster, groups=None, meta=None, changes=True):
+        self.source = raster
+        self.groups = groups  # GroupTree.to_list(), None jika tidak disimpan
+        self.meta = meta  # Ditulis sebagai record META oleh save()
+        self.shapes = list(shapes)
+        n = len(self.shapes)
+        self.uids = np.fromiter((s.uid for s in self.shapes), dtype=np.int64, count=n)
+        self.versions = np.fromiter((s.version for s in self.shapes), dtype=np.int64, count=n)
+        idx, self.counts = core.Shape.store.point_index(self.shapes)
+        self.coords = core.Shape.store.coords[idx]
+        self.starts = np.cumsum(self.counts) - self.counts
+        self.raster = raster.snapshot()
+        self.reset, self.changed = raster.take_changes() if changes else (False, set())
+
+    def release(self, written):
+        # Panggil dari thread utama setelah penulisan selesai/gagal
+        self.source.release(self.raster)
+        if not written:
+            self.source.reset |= self.reset
+            self.source.changed |= self.changed
+
+
+class DocumentWriter:
+    """Menyimpan dokumen ke path; append() hanya menulis perubahan sejak simpan terakhir.
+
+    Keduanya menerima Snapshot dan boleh dijalankan di thread worker (satu
+    penulisan per writer pada satu waktu). progress(fraksi) dipanggil
+    berkala; exception darinya membatalkan penulisan.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.saved = {}  # uid -> (version, z) yang sudah ada di file
+        self.size = None
+        self.groups = None  # Isi record GRPS terakhir di file
+        self.end = None  # Offset akhir record utuh terakhir, None jika belum diketahui
+
+    def mark_saved(self, shapes, raster, groups=None):
+        # State yang baru saja dibaca dianggap sudah ada di file
+        self.saved = {s.uid: (s.version, z) for z, s in enumerate(shapes)}
+        self.size = raster.size
+        self.groups = groups
+        raster.take_changes()
+
+    def _head(self, f, raster):
+        _write_record(f, HEAD, _HEAD.pack(raster.width, raster.height, *raster.background, raster.tile))
+
+    def _write(self, f, snap, sel, tiles, progress):
+        batches = range(0, len(sel), BATCH)
+        total = len(tiles) + len(batches) or 1
+        for done, key in enumerate(tiles, 1):
+            arr = snap.raster.get_tile(key)
+            if arr is not None:
+                _write_record(f, TILE, _TILE.pack(*key) + zlib.compress(arr.tobytes(), 1))
+            if progress:
+                progress(done / total)
+        for done, i in enumerate(batches, len(tiles) + 1):
+            _write_record(f, SHAPES, encode_shapes(snap, sel[i:i + BATCH]))
+            if progress:
+                progress(done / total)
+
+    def save(self, snap, progress=None):
+        """Tulis ulang seluruh file (lewat file sementara, lalu diganti atomik)."""
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(MAGIC)
+                self._head(f, snap.raster)
+                self._write(f, snap, np.arange(len(snap.shapes)), sorted(snap.raster.tiles), progress)
+                if snap.groups:
+                    _write_record(f, GROUPS, json.dumps(snap.groups).encode("utf-8"))
+                if snap.meta:
+                    _write_record(f, META, json.dumps(snap.meta).encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            # Gagal hapus file sementara tidak boleh menutupi error aslinya
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+        os.replace(tmp, self.path)
+        self.end = os.path.getsize(self.path)
+        self.saved = dict(zip(snap.uids.tolist(), zip(snap.versions.tolist(), range(len(snap.shapes)))))
+        self.size = snap.raster.size
+        self.groups = snap.groups
+
+    def _valid_end(self):
+        with DocumentReader(self.path) as reader:
+            for _ in reader.records():
+                pass
+            return reader.end
+
+    def append(self, snap, progress=None):
+        """Autosave: tambahkan record perubahan saja. Mengembalikan jumlah byte yang ditulis.
+
+        Shape ditulis ulang jika versinya atau posisi z-nya berubah (mis. shape
+        di bawahnya dihapus atau urutannya diubah).
+        """
+        saved = self.saved
+        uids = snap.uids
+        uid_list = uids.tolist()
+        sel = np.array([z for z, key in enumerate(zip(uid_list, snap.versions.tolist()))
+                        if saved.get(key[0]) != (key[1], z)], dtype=np.intp)
+        deleted = saved.keys() - set(uid_list)
+        raster = snap.raster
+        regroup = snap.groups is not None and snap.groups != self.groups
+        if not (len(sel) or deleted or snap.reset or snap.changed or regroup or raster.size != self.size):
+            return 0
+        if self.end is None:
+            self.end = self._valid_end()
+        with open(self.path, "r+b") as f:
+            # Buang sisa record terpotong (mis. crash saat autosave) supaya record baru tetap terbaca
+            f.seek(self.end)
+            f.truncate()
+            start = f.tell()
+            if raster.size != self.size:
+                self._head(f, raster)
+            if deleted:
+                _write_record(f, DELETE, np.array(sorted(deleted), dtype=np.int64).tobytes())
+            if snap.reset:
+                _write_record(f, CLEAR, b"")
+            self._write(f, snap, sel, sorted(snap.changed), progress)
+            if regroup:
+                _write_record(f, GROUPS, json.dumps(snap.groups).encode("utf-8"))
+                self.groups = snap.groups
+            written = f.tell() - start
+            self.end = f.tell()
+        self.size = raster.size
+        for uid in deleted:
+            del saved[uid]
+        saved.update(zip(uids[sel].tolist(), zip(snap.versions[sel].tolist(), sel.tolist())))
+        return written
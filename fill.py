@@ -0,0 +1,133 @@
+"""Flood fill berbasis span (scanline) di atas array NumPy."""
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+from PIL import ImageDraw
+
+import colors
+
+
+def color_mask(arr, rgb, tolerance=0):
+    # Mask piksel yang warnanya cocok dengan rgb (selisih per channel <= tolerance)
+    mask = None
+    for c, value in enumerate(rgb):
+        ch = arr[..., c]
+        if tolerance <= 0:
+            m = ch == value
+        else:
+            m = (ch >= max(value - tolerance, 0)) & (ch <= min(value + tolerance, 255))
+        mask = m if mask is None else mask & m
+    return mask
+
+
+def row_runs(mask):
+    """Pecah mask menjadi run horizontal per baris.
+
+    Mengembalikan (starts, ends, row_ptr): run ke-i berada di baris y dengan
+    row_ptr[y] <= i < row_ptr[y + 1] dan mencakup kolom starts[i]..ends[i]-1.
+    """
+    h, w = mask.shape
+    padded = np.zeros((h, w + 2), np.int8)
+    padded[:, 1:-1] = mask
+    ys, xs = np.nonzero(np.diff(padded, axis=1))
+    # Dalam satu baris posisi awal dan akhir run selalu berselang-seling
+    row_ptr = np.searchsorted(ys[0::2], np.arange(h + 1))
+    return xs[0::2].tolist(), xs[1::2].tolist(), row_ptr.tolist()
+
+
+def span_fill(mask, x, y, connectivity=4):
+    """Cari region terhubung pada mask mulai dari (x, y).
+
+    Mengembalikan (spans, bbox) dengan spans berupa list (y, x0, x1) eksklusif
+    dan bbox = (x0, y0, x1, y1) eksklusif, atau ([], None) jika titik awal
+    tidak cocok.
+    """
+    h, w = mask.shape
+    if not (0 <= x < w and 0 <= y < h) or not mask[y, x]:
+        return [], None
+    starts, ends, row_ptr = row_runs(mask)
+    ext = 1 if connectivity == 8 else 0
+    seed = bisect_right(starts, x, row_ptr[y], row_ptr[y + 1]) - 1
+    visited = bytearray(len(starts))
+    visited[seed] = 1
+    stack = [(seed, y)]
+    spans = []
+    x0, x1, y0, y1 = w, 0, h, 0
+    while stack:
+        i, sy = stack.pop()
+        l, r = starts[i], ends[i]
+        spans.append((sy, l, r))
+        if l < x0:
+            x0 = l
+        if r > x1:
+            x1 = r
+        if sy < y0:
+            y0 = sy
+        if sy >= y1:
+            y1 = sy + 1
+        # Run di baris atas/bawah yang bersinggungan dengan span ini
+        for ny in (sy - 1, sy + 1):
+            if 0 <= ny < h:
+                lo, hi = row_ptr[ny], row_ptr[ny + 1]
+                j = bisect_right(ends, l - ext, lo, hi)
+                stop = bisect_left(starts, r + ext, lo, hi)
+                for k in range(j, stop):
+                    if not visited[k]:
+                        visited[k] = 1
+                        stack.append((k, ny))
+    return spans, (x0, y0, x1, y1)
+
+
+def find_region(image, x, y, rgb, tolerance=0, connectivity=4, metric="rgb"):
+    """Cari region yang akan diisi tanpa mengubah image.
+
+    metric "rgb": tolerance per channel; "lab": tolerance berupa dE di Lab
+    (colors.color_mask). Mengembalikan (spans, bbox) atau ([], None) jika
+    tidak ada yang berubah.
+    """
+    w, h = image.size
+    if not (0 <= x < w and 0 <= y < h):
+        return [], None
+    seed = image.getpixel((x, y))[:3]
+    if tuple(seed) == tuple(rgb) and tolerance <= 0:
+        return [], None
+    match = colors.color_mask if metric == "lab" else color_mask
+    mask = match(np.asarray(image), seed, tolerance)
+    return span_fill(mask, x, y, connectivity)
+
+
+def paint_spans(image, spans, rgb):
+    draw = ImageDraw.Draw(image)
+    fill = tuple(rgb)
+    for sy, l, r in spans:
+        draw.line((l, sy, r - 1, sy), fill=fill)
+
+
+def fill_region(target, box, x, y, rgb, tolerance=0, connectivity=4, before=None, metric="rgb"):
+    """Flood fill di region box (koordinat dokumen) dari target yang punya crop()/paste(), mis. Viewport.
+
+    before(bbox) dipanggil sebelum region ditulis (mis. RasterRecorder.snapshot).
+    Mengembalikan bbox dokumen yang berubah atau None.
+    """
+    ox, oy = box[:2]
+    image = target.crop(box)
+    spans, local = find_region(image, int(x) - ox, int(y) - oy, rgb, tolerance, connectivity, metric)
+    if local is None:
+        return None
+    bbox = (local[0] + ox, local[1] + oy, local[2] + ox, local[3] + oy)
+    if before:
+        before(bbox)
+    paint_spans(image, spans, rgb)
+    target.paste(image.crop(local), bbox[:2])
+    return bbox
+
+
+def flood_fill(image, x, y, rgb, tolerance=0, connectivity=4, metric="rgb"):
+    """Flood fill pada PIL image RGB secara in-place.
+
+    Mengembalikan bbox area yang berubah (x0, y0, x1, y1) atau None.
+    """
+    spans, bbox = find_region(image, x, y, rgb, tolerance, connectivity, metric)
+    if bbox is not None:
+        paint_spans(image, spans, rgb)
+    return bbox
@@ -0,0 +1,67 @@
+"""Penjadwal frame di atas root.after: event beruntun digabung jadi satu kerja per frame."""
+import time
+
+
+class FrameScheduler:
+    """Menggabungkan event motion/resize menjadi paling banyak satu update per frame.
+
+    request(key, fn) hanya menyimpan callback terakhir untuk key tersebut;
+    semua callback yang tertunda dijalankan bersama pada frame berikutnya
+    (target 60 Hz). debounce(key, delay, fn) menunda kerja mahal sampai event
+    berhenti datang selama delay milidetik.
+    """
+
+    def __init__(self, root, fps=60):
+        self.root = root
+        self.interval = 1.0 / fps
+        self.pending = {}  # key -> callback, urutan sesuai request pertama
+        self.frame_id = None
+        self.last_frame = 0.0
+        self.timers = {}  # key -> (after id, callback) untuk debounce
+        self.requested = 0.0  # Waktu request pertama sejak frame terakhir
+        self.on_frame = None  # Hook instrumentasi: on_frame(latensi, durasi) dalam detik
+
+    def request(self, key, fn):
+        self.pending[key] = fn
+        if self.frame_id is None:
+            self.requested = time.perf_counter()
+            wait = self.interval - (time.perf_counter() - self.last_frame)
+            self.frame_id = self.root.after(max(int(wait * 1000), 0), self._frame)
+
+    def _frame(self):
+        self.frame_id = None
+        self.last_frame = start = time.perf_counter()
+        pending, self.pending = self.pending, {}
+        for fn in pending.values():
+            fn()
+        if self.on_frame:
+            self.on_frame(start - self.requested, time.perf_counter() - start)
+
+    def flush(self, *keys):
+        # Jalankan sekarang callback yang tertunda (semua jika keys kosong), mis. saat release
+        for key in keys or list(self.pending):
+            fn = self.pending.pop(key, None)
+            if fn:
+                fn()
+        for key in keys or list(self.timers):
+            timer = self.timers.pop(key, None)
+            if timer:
+                self.root.after_cancel(timer[0])
+                timer[1]()
+
+    def debounce(self, key, delay, fn):
+        timer = self.timers.pop(key, None)
+        if timer:
+            self.root.after_cancel(timer[0])
+        self.timers[key] = (self.root.after(delay, lambda: self._fire(key)), fn)
+
+    def _fire(self, key):
+        timer = self.timers.pop(key, None)
+        if timer:
+            timer[1]()
+
+    def cancel(self, key):
+        self.pending.pop(key, None)
+        timer = self.timers.pop(key, None)
+        if timer:
+            self.root.after_cancel(timer[0])
@@ -1,611 +1,1193 @@
-import tkinter as tk
-from tkinter import colorchooser, filedialog, messagebox
-from PIL import Image, ImageTk, ImageDraw
-from collections import deque
-import math
-
-class Shape:
-    def __init__(self, shape_type, points, color, width, line_type="solid"):
-        self.type = shape_type
-        self.points = points
-        self.color = color
-        self.width = width
-        self.line_type = line_type
-
-    def draw(self, canvas):
-        if self.type == "line":
-            if self.line_type == "solid":
-                canvas.create_line(*self.points, fill=self.color, width=self.width)
-            elif self.line_type == "dashed":
-                canvas.create_line(*self.points, fill=self.color, width=self.width, dash=(8, 4))
-            elif self.line_type == "arrow":
-                canvas.create_line(*self.points, fill=self.color, width=self.width, arrow=tk.LAST)
-        elif self.type == "rect":
-            canvas.create_rectangle(*self.points, outline=self.color, width=self.width)
-        elif self.type == "oval":
-            canvas.create_oval(*self.points, outline=self.color, width=self.width)
-        elif self.type == "ellipse":
-            canvas.create_oval(*self.points, outline=self.color, width=self.width)  # Perlakuan sama dengan oval
-        elif self.type == "triangle":
-            canvas.create_polygon(self.points, outline=self.color, fill="", width=self.width)
-        elif self.type == "star":
-            canvas.create_polygon(self.points, outline=self.color, fill="", width=self.width)
-        elif self.type == "hexagon":
-            canvas.create_polygon(self.points, outline=self.color, fill="", width=self.width)
-        elif self.type == "pentagon":
-            canvas.create_polygon(self.points, outline=self.color, fill="", width=self.width)
-        elif self.type == "parallelogram":
-            canvas.create_polygon(self.points, outline=self.color, fill="", width=self.width)
-        elif self.type == "trapezoid":
-            canvas.create_polygon(self.points, outline=self.color, fill="", width=self.width)
-        elif self.type == "rhombus":
-            canvas.create_polygon(self.points, outline=self.color, fill="", width=self.width)
-        elif self.type == "text" and hasattr(self, "text"):
-            x, y = self.points[0]
-            canvas.create_text(x, y, text=self.text, fill=self.color, font=("Arial", max(10, self.width*3)))
-
-    def is_clicked(self, x, y):
-        margin = 5
-        xs, ys = zip(*self.points)
-        return min(xs)-margin <= x <= max(xs)+margin and min(ys)-margin <= y <= max(ys)+margin
-
-    def translate(self, dx, dy):
-        self.points = [(x+dx, y+dy) for x, y in self.points]
-
-    def rotate(self, angle_deg):
-        angle = math.radians(angle_deg)
-        cx = sum(x for x, _ in self.points) / len(self.points)
-        cy = sum(y for _, y in self.points) / len(self.points)
-        new_points = []
-        for x, y in self.points:
-            dx, dy = x - cx, y - cy
-            new_x = dx * math.cos(angle) - dy * math.sin(angle) + cx
-            new_y = dx * math.sin(angle) + dy * math.cos(angle) + cy
-            new_points.append((round(new_x), round(new_y)))  # <-- bulatkan ke integer
-        self.points = new_points
-
-class MiniPaint:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Mini Paint Lengkap")
-
-        self.width, self.height = 800, 600
-        self.image = Image.new("RGB", (self.width, self.height), "white")
-        self.tk_image = ImageTk.PhotoImage(self.image)
-        self.draw_image = ImageDraw.Draw(self.image)
-
-        self.canvas = tk.Canvas(root, width=self.width, height=self.height, bg="white", cursor="crosshair")
-        self.canvas.pack(fill=tk.BOTH, expand=True)
-        self.canvas_image = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.tk_image)
-
-        self.pen_color = "black"
-        self.pen_width = 3
-        self.mode = "free"
-        self.start_x = None
-        self.start_y = None
-        self.shapes = []
-        self.selected_shape = None
-        self.undo_stack = []
-        self.redo_stack = []
-        self.line_type = "solid"  # Default line type
-
-        self.status_var = tk.StringVar()
-        self.status_var.set("Mode: Free | Warna: Black")
-
-        self.setup_menu()
-        self.setup_ui()
-        self.bind_canvas()
-        self.setup_statusbar()
-        self.root.bind("<Configure>", self.on_resize)  # Tambahkan ini
-        self.root.minsize(600, 400)  # Atur minimal window, sesuaikan sesuai kebutuhan
-
-
-
-    def on_resize(self, event):
-        # Hanya resize jika ukuran canvas berubah dan cukup besar
-        if event.widget == self.root:
-            min_width, min_height = 600, 400  # Samakan dengan minsize
-            new_width = max(self.root.winfo_width(), min_width)
-            new_height = max(self.root.winfo_height() - 80, min_height)
-            # Jangan resize jika window terlalu kecil
-            if new_width <= min_width or new_height <= min_height:
-                return
-            if (new_width, new_height) != (self.width, self.height):
-                self.width, self.height = new_width, new_height
-                self.image = self.image.resize((self.width, self.height), Image.BICUBIC)
-                self.tk_image = ImageTk.PhotoImage(self.image)
-                self.draw_image = ImageDraw.Draw(self.image)
-                self.canvas.config(width=self.width, height=self.height)
-                self.refresh_canvas()
-                self.redraw_all()
-
-    def setup_menu(self):
-        menubar = tk.Menu(self.root)
-        filemenu = tk.Menu(menubar, tearoff=0)
-        filemenu.add_command(label="Save", command=self.save_image)
-        filemenu.add_command(label="Load", command=self.load_image)
-        filemenu.add_separator()
-        filemenu.add_command(label="Clear", command=self.clear_canvas)
-        filemenu.add_separator()
-        filemenu.add_command(label="Exit", command=self.root.quit)
-        menubar.add_cascade(label="File", menu=filemenu)
-
-        editmenu = tk.Menu(menubar, tearoff=0)
-        editmenu.add_command(label="Undo", command=self.undo)
-        editmenu.add_command(label="Redo", command=self.redo)
-        menubar.add_cascade(label="Edit", menu=editmenu)
-
-        helpmenu = tk.Menu(menubar, tearoff=0)
-        helpmenu.add_command(label="About", command=lambda: messagebox.showinfo("About", "Mini Paint by Weeaboo"))
-        menubar.add_cascade(label="Help", menu=helpmenu)
-
-        self.root.config(menu=menubar)
-
-    def setup_ui(self):
-        frame = tk.Frame(self.root)
-        frame.pack(fill=tk.X)
-
-        tk.Button(frame, text="Shape", command=self.choose_shape_type).pack(side=tk.LEFT, padx=2)
-        tk.Button(frame, text="Line", command=self.choose_line_type).pack(side=tk.LEFT, padx=2)
-        tk.Button(frame, text="Fill", command=self.choose_fill_color).pack(side=tk.LEFT, padx=2)
-        tk.Button(frame, text="Select", command=lambda: self.set_mode("select")).pack(side=tk.LEFT, padx=2)  # <--- Tambahkan ini
-        
-        self.rotate_ccw_btn = tk.Button(frame, text="⟲", command=lambda: self.rotate_selected(-15), state=tk.DISABLED)
-        self.rotate_ccw_btn.pack(side=tk.LEFT, padx=2)
-        self.rotate_cw_btn = tk.Button(frame, text="⟳", command=lambda: self.rotate_selected(15), state=tk.DISABLED)
-        self.rotate_cw_btn.pack(side=tk.LEFT, padx=2)
-        tk.Button(frame, text="Undo", command=self.undo).pack(side=tk.LEFT, padx=2)
-        tk.Button(frame, text="Redo", command=self.redo).pack(side=tk.LEFT, padx=2)
-        tk.Button(frame, text="Clear", command=self.clear_canvas).pack(side=tk.LEFT, padx=2)
-        tk.Button(frame, text="Eraser", command=lambda: self.set_mode("eraser")).pack(side=tk.LEFT, padx=2)
-        tk.Button(frame, text="Delete", command=self.delete_selected).pack(side=tk.LEFT, padx=2)
-        tk.Button(frame, text="Warna", command=self.choose_color).pack(side=tk.LEFT, padx=2)
-
-        tk.Label(frame, text="Tebal:").pack(side=tk.LEFT, padx=2)
-        self.width_var = tk.IntVar(value=self.pen_width)
-        tk.Spinbox(frame, from_=1, to=10, width=3, textvariable=self.width_var, command=self.change_width).pack(side=tk.LEFT)
-
-        self.color_label = tk.Label(frame, text=" ", bg=self.pen_color, width=2)
-        self.color_label.pack(side=tk.LEFT, padx=2)
-
-    def setup_statusbar(self):
-        status = tk.Label(self.root, textvariable=self.status_var, bd=1, relief=tk.SUNKEN, anchor=tk.W)
-        status.pack(side=tk.BOTTOM, fill=tk.X)
-        self.canvas.bind("<Motion>", self.update_statusbar)
-
-    def update_statusbar(self, event):
-        self.status_var.set(f"Mode: {self.mode.capitalize()} | Warna: {self.pen_color} | Posisi: ({event.x},{event.y})")
-
-    def set_mode(self, mode):
-        self.mode = mode
-        self.selected_shape = None
-        self.status_var.set(f"Mode: {self.mode.capitalize()} | Warna: {self.pen_color}")
-
-    def choose_color(self):
-        try:
-            color = colorchooser.askcolor()[1]
-            if color:
-                self.pen_color = color
-                self.color_label.config(bg=color)
-                self.status_var.set(f"Mode: {self.mode.capitalize()} | Warna: {self.pen_color}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Gagal memilih warna: {e}")
-
-    def change_width(self):
-        self.pen_width = self.width_var.get()
-
-    def bind_canvas(self):
-        self.canvas.bind("<Button-1>", self.on_click)
-        self.canvas.bind("<B1-Motion>", self.on_drag)
-        self.canvas.bind("<ButtonRelease-1>", self.on_release)
-        self.root.bind("r", self.rotate_selected_key)  # Tambah binding keyboard untuk rotasi
-
-    def on_click(self, event):
-        self.start_x, self.start_y = event.x, event.y
-        if self.mode == "fill":
-            # Cek apakah klik di dalam shape
-            for shape in reversed(self.shapes):
-                if shape.is_clicked(event.x, event.y):
-                    self.save_undo()  # Panggil sebelum fill!
-                    self.flood_fill(event.x, event.y, self.fill_color)
-                    self.refresh_canvas()
-                    return
-            messagebox.showinfo("Info", "Klik di dalam shape untuk mengisi warna.")
-        elif self.mode == "select":
-            self.select_shape(event.x, event.y)
-            self.last_drag_x, self.last_drag_y = event.x, event.y
-        else:
-            self.save_undo()
-
-    def on_drag(self, event):
-        if self.mode == "free":
-            self.canvas.create_line(self.start_x, self.start_y, event.x, event.y,
-                                    fill=self.pen_color, width=self.pen_width)
-            self.draw_image.line((self.start_x, self.start_y, event.x, event.y), fill=self.pen_color, width=self.pen_width)
-            self.start_x, self.start_y = event.x, event.y
-        elif self.mode == "eraser":
-            self.canvas.create_line(self.start_x, self.start_y, event.x, event.y, fill="white", width=15)
-            self.draw_image.line((self.start_x, self.start_y, event.x, event.y), fill="white", width=15)
-            self.start_x, self.start_y = event.x, event.y
-        elif self.mode == "select" and self.selected_shape:
-            # Translasi shape dengan drag
-            dx = event.x - self.last_drag_x
-            dy = event.y - self.last_drag_y
-            self.selected_shape.translate(dx, dy)
-            self.last_drag_x, self.last_drag_y = event.x, event.y
-            self.redraw_all(highlight=True)
-
-    def on_release(self, event):
-        end_x, end_y = event.x, event.y
-        if self.mode == "line":
-            pts = [(self.start_x, self.start_y), (end_x, end_y)]
-            shape = Shape("line", pts, self.pen_color, self.pen_width, self.line_type)
-            self.shapes.append(shape)
-            self.redraw_all()
-            self.save_undo()
-            return
-        elif self.mode == "rect":
-            pts = [(self.start_x, self.start_y), (end_x, end_y)]
-        elif self.mode == "oval":
-            pts = [(self.start_x, self.start_y), (end_x, end_y)]
-        elif self.mode == "ellipse":
-            pts = [(self.start_x, self.start_y), (end_x, end_y)]
-        elif self.mode == "triangle":
-            mx = (self.start_x + end_x) / 2
-            pts = [(mx, self.start_y), (self.start_x, end_y), (end_x, end_y)]
-        elif self.mode == "star":
-            pts = self.make_star(self.start_x, self.start_y, end_x, end_y)
-        elif self.mode == "hexagon":
-            pts = self.make_polygon(self.start_x, self.start_y, end_x, end_y, 6)
-        elif self.mode == "pentagon":
-            pts = self.make_polygon(self.start_x, self.start_y, end_x, end_y, 5)
-        elif self.mode == "parallelogram":
-            pts = self.make_parallelogram(self.start_x, self.start_y, end_x, end_y)
-        elif self.mode == "trapezoid":
-            pts = self.make_trapezoid(self.start_x, self.start_y, end_x, end_y)
-        elif self.mode == "rhombus":
-            pts = self.make_rhombus(self.start_x, self.start_y, end_x, end_y)
-        elif self.mode == "text":
-            text = self.ask_text()
-            if not text:
-                return
-            pts = [(end_x, end_y)]
-            shape = Shape("text", pts, self.pen_color, self.pen_width, text=text)
-            self.shapes.append(shape)
-            self.redraw_all()
-            self.save_undo()
-            return
-        else:
-            if self.mode == "select" and self.selected_shape:
-                self.save_undo()
-            return
-
-        shape = Shape(self.mode, pts, self.pen_color, self.pen_width)
-        self.shapes.append(shape)
-        self.draw_shape_on_image(shape)  # Tambahkan ini!
-        self.redraw_all()
-        self.save_undo()
-
-    def rotate_selected_key(self, event):
-        # Rotasi shape terpilih dengan tombol R
-        if self.selected_shape:
-            self.save_undo()
-            self.selected_shape.rotate(30)
-            self.redraw_all(highlight=True)
-        else:
-            messagebox.showwarning("Peringatan", "Pilih shape terlebih dahulu.")
-
-    def rotate_selected(self, angle):
-        if self.selected_shape:
-            self.save_undo()
-            self.selected_shape.rotate(angle)
-            self.redraw_all(highlight=True)
-        else:
-            messagebox.showwarning("Peringatan", "Pilih shape terlebih dahulu.")
-
-    def select_shape(self, x, y):
-        found = False
-        for shape in reversed(self.shapes):
-            if shape.is_clicked(x, y):
-                self.selected_shape = shape
-                found = True
-                break
-        if not found:
-            self.selected_shape = None
-            messagebox.showinfo("Info", "Tidak ada shape yang dipilih.")
-        self.redraw_all(highlight=True)
-        # Enable/disable tombol rotasi
-        if self.selected_shape:
-            self.rotate_cw_btn.config(state=tk.NORMAL)
-            self.rotate_ccw_btn.config(state=tk.NORMAL)
-        else:
-            self.rotate_cw_btn.config(state=tk.DISABLED)
-            self.rotate_ccw_btn.config(state=tk.DISABLED)
-
-    def translate_selected(self):
-        if self.selected_shape:
-            self.save_undo()
-            self.selected_shape.translate(30, 30)
-            self.redraw_all()
-        else:
-            messagebox.showwarning("Peringatan", "Pilih shape terlebih dahulu.")
-
-    def delete_selected(self):
-        if self.selected_shape:
-            self.save_undo()
-            self.shapes.remove(self.selected_shape)
-            self.selected_shape = None
-            self.redraw_all()
-            # Disable tombol rotasi
-            self.rotate_cw_btn.config(state=tk.DISABLED)
-            self.rotate_ccw_btn.config(state=tk.DISABLED)
-        else:
-            messagebox.showwarning("Peringatan", "Pilih shape terlebih dahulu.")
-
-    def redraw_all(self, highlight=False):
-        self.canvas.delete("all")
-        self.canvas_image = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.tk_image)
-        for shape in self.shapes:
-            shape.draw(self.canvas)
-        if highlight and self.selected_shape:
-            xs, ys = zip(*self.selected_shape.points)
-            self.canvas.create_rectangle(min(xs)-5, min(ys)-5, max(xs)+5, max(ys)+5, outline="red", dash=(4,2))
-            # Rotation handle
-            cx = (min(xs) + max(xs)) / 2
-            cy = min(ys) - 25
-            self.rotation_handle = self.canvas.create_oval(cx-8, cy-8, cx+8, cy+8, fill="orange", outline="black", tags="rotate_handle")
-            self.canvas.tag_bind("rotate_handle", "<Button-1>", self.start_rotate)
-            self.canvas.tag_bind("rotate_handle", "<B1-Motion>", self.do_rotate)
-            self.canvas.tag_bind("rotate_handle", "<ButtonRelease-1>", self.end_rotate)
-        else:
-            self.rotation_handle = None
-
-    def choose_fill_color(self):
-        color = colorchooser.askcolor(title="Pilih warna fill")[1]
-        if color:
-            self.fill_color = color
-            self.set_mode("fill")
-            self.status_var.set(f"Mode: Fill | Warna: {self.fill_color}")
-
-    def start_rotate(self, event):
-        self.rotating = True
-        self.rotate_origin = (event.x, event.y)
-        # Simpan posisi pusat objek
-        xs, ys = zip(*self.selected_shape.points)
-        self.rotate_cx = sum(xs) / len(xs)
-        self.rotate_cy = sum(ys) / len(ys)
-
-    def do_rotate(self, event):
-        if not hasattr(self, 'rotating') or not self.rotating:
-            return
-        x0, y0 = self.rotate_origin
-        x1, y1 = event.x, event.y
-        angle0 = math.atan2(y0 - self.rotate_cy, x0 - self.rotate_cx)
-        angle1 = math.atan2(y1 - self.rotate_cy, x1 - self.rotate_cx)
-        angle_deg = math.degrees(angle1 - angle0)
-        self.selected_shape.rotate(angle_deg)
-        self.rotate_origin = (x1, y1)
-        self.redraw_all(highlight=True)
-
-    def end_rotate(self, event):
-        self.rotating = False
-        self.save_undo()
-
-    def flood_fill(self, x, y, hex_color):
-        try:
-            rgb = self.image.getpixel((x, y))
-            fill = self.hex_to_rgb(hex_color)
-            if rgb == fill:
-                return
-            q = deque()
-            q.append((x, y))
-            px = self.image.load()
-            while q:
-                cx, cy = q.popleft()
-                if (0 <= cx < self.width and 0 <= cy < self.height and px[cx, cy] == rgb):
-                    px[cx, cy] = fill
-                    q.extend([(cx+1, cy), (cx-1, cy), (cx, cy+1), (cx, cy-1)])
-        except Exception as e:
-            messagebox.showerror("Error", f"Flood fill gagal: {e}")
-
-    def hex_to_rgb(self, hex_color):
-        hex_color = hex_color.lstrip("#")
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-
-    def refresh_canvas(self):
-        self.tk_image = ImageTk.PhotoImage(self.image)
-        self.canvas.itemconfig(self.canvas_image, image=self.tk_image)
-
-    def save_undo(self):
-        # Simpan state shapes dan image untuk undo
-        import copy
-        shapes_copy = copy.deepcopy(self.shapes)
-        image_copy = self.image.copy()
-        self.undo_stack.append((shapes_copy, image_copy))
-        self.redo_stack.clear()
-
-    def undo(self):
-        if self.undo_stack:
-            self.redo_stack.append((self.shapes, self.image))
-            self.shapes, self.image = self.undo_stack.pop()
-            self.draw_image = ImageDraw.Draw(self.image)
-            self.refresh_canvas()
-            self.redraw_all()
-        else:
-            messagebox.showinfo("Info", "Tidak ada aksi untuk di-undo.")
-
-    def redo(self):
-        if self.redo_stack:
-            self.undo_stack.append((self.shapes, self.image))
-            self.shapes, self.image = self.redo_stack.pop()
-            self.draw_image = ImageDraw.Draw(self.image)
-            self.refresh_canvas()
-            self.redraw_all()
-        else:
-            messagebox.showinfo("Info", "Tidak ada aksi untuk di-redo.")
-
-    def clear_canvas(self):
-        self.save_undo()
-        self.shapes.clear()
-        self.image = Image.new("RGB", (self.width, self.height), "white")
-        self.draw_image = ImageDraw.Draw(self.image)
-        self.refresh_canvas()
-        self.redraw_all()
-
-    def save_image(self):
-        file = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG files", "*.png")])
-        if file:
-            self.image.save(file)
-            messagebox.showinfo("Info", f"Gambar disimpan di {file}")
-
-    def load_image(self):
-        file = filedialog.askopenfilename(filetypes=[("PNG files", "*.png")])
-        if file:
-            try:
-                self.image = Image.open(file).convert("RGB")
-                self.tk_image = ImageTk.PhotoImage(self.image)
-                self.draw_image = ImageDraw.Draw(self.image)
-                self.refresh_canvas()
-                self.redraw_all()
-            except Exception as e:
-                messagebox.showerror("Error", f"Gagal load gambar: {e}")
-
-    def choose_line_type(self):
-        win = tk.Toplevel(self.root)
-        win.title("Pilih Jenis Garis")
-        win.grab_set()
-        tk.Label(win, text="Pilih jenis garis:").pack(padx=10, pady=10)
-
-        def pilih(jenis):
-            self.line_type = jenis
-            self.set_mode("line")
-            win.destroy()
-
-        tk.Button(win, text="Lurus", width=15, command=lambda: pilih("solid")).pack(pady=2)
-        tk.Button(win, text="Putus-putus", width=15, command=lambda: pilih("dashed")).pack(pady=2)
-        tk.Button(win, text="Panah", width=15, command=lambda: pilih("arrow")).pack(pady=2)
-
-    def choose_shape_type(self):
-        win = tk.Toplevel(self.root)
-        win.title("Pilih Shape")
-        win.grab_set()
-        tk.Label(win, text="Pilih shape:").pack(padx=10, pady=10)
-
-        shapes = [
-            ("Rectangle", "rect"),
-            ("Oval", "oval"),
-            ("Ellipse", "ellipse"),
-            ("Triangle", "triangle"),
-            ("Star", "star"),
-            ("Hexagon", "hexagon"),
-            ("Pentagon", "pentagon"),
-            ("Parallelogram", "parallelogram"),
-            ("Trapezoid", "trapezoid"),
-            ("Rhombus", "rhombus"),
-        ]
-
-        for label, mode in shapes:
-            tk.Button(win, text=label, width=18, command=lambda m=mode: self.set_shape_mode(m, win)).pack(pady=2)
-
-    def set_shape_mode(self, mode, win):
-        self.mode = mode
-        self.selected_shape = None
-        self.status_var.set(f"Mode: {self.mode.capitalize()} | Warna: {self.pen_color}")
-        win.destroy()
-
-    def make_star(self, x0, y0, x1, y1):
-        from math import sin, cos, pi
-        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
-        r = min(abs(x1 - x0), abs(y1 - y0)) / 2
-        points = []
-        for i in range(10):
-            angle = pi/2 + i * pi/5
-            radius = r if i % 2 == 0 else r/2
-            x = cx + cos(angle) * radius
-            y = cy - sin(angle) * radius
-            points.append((x, y))
-        return points
-
-    def make_polygon(self, x0, y0, x1, y1, sides):
-        from math import sin, cos, pi
-        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
-        r = min(abs(x1 - x0), abs(y1 - y0)) / 2
-        points = []
-        for i in range(sides):
-            angle = pi/2 + i * 2 * pi / sides
-            x = cx + cos(angle) * r
-            y = cy - sin(angle) * r
-            points.append((x, y))
-        return points
-
-    def make_parallelogram(self, x0, y0, x1, y1):
-        # Parallelogram dengan offset 1/4 lebar
-        dx = (x1 - x0) / 4
-        return [
-            (x0 + dx, y0),
-            (x1, y0),
-            (x1 - dx, y1),
-            (x0, y1)
-        ]
-
-    def make_trapezoid(self, x0, y0, x1, y1):
-        # Trapezoid dengan sisi atas lebih pendek
-        dx = abs(x1 - x0) / 4
-        return [
-            (x0 + dx, y0),
-            (x1 - dx, y0),
-            (x1, y1),
-            (x0, y1)
-        ]
-
-    def make_rhombus(self, x0, y0, x1, y1):
-        # Rhombus (belah ketupat)
-        mx = (x0 + x1) / 2
-        my = (y0 + y1) / 2
-        return [
-            (mx, y0),
-            (x1, my),
-            (mx, y1),
-            (x0, my)
-        ]
-
-    def ask_text(self):
-        import tkinter.simpledialog
-        return tkinter.simpledialog.askstring("Input Text", "Masukkan teks:")
-
-    def flood_fill(self, x, y, hex_color):
-        try:
-            rgb = self.image.getpixel((x, y))
-            fill = self.hex_to_rgb(hex_color)
-            if rgb == fill:
-                return
-            q = deque()
-            q.append((x, y))
-            px = self.image.load()
-            while q:
-                cx, cy = q.popleft()
-                if (0 <= cx < self.width and 0 <= cy < self.height and px[cx, cy] == rgb):
-                    px[cx, cy] = fill
-                    q.extend([(cx+1, cy), (cx-1, cy), (cx, cy+1), (cx, cy-1)])
-        except Exception as e:
-            messagebox.showerror("Error", f"Flood fill gagal: {e}")
-
-
-    def draw_shape_on_image(self, shape):
-        # Gambar shape ke self.image menggunakan PIL
-        if shape.type == "rect":
-            self.draw_image.rectangle(shape.points, outline=shape.color, width=shape.width)
-        elif shape.type == "oval" or shape.type == "ellipse":
-            self.draw_image.ellipse(shape.points, outline=shape.color, width=shape.width)
-        elif shape.type in ["triangle", "star", "hexagon", "pentagon", "parallelogram", "trapezoid", "rhombus"]:
-            self.draw_image.polygon(shape.points, outline=shape.color, width=shape.width)
-        elif shape.type == "line":
-            self.draw_image.line(shape.points, fill=shape.color, width=shape.width)
-        # Untuk text, abaikan (tidak perlu diisi)
-
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    root.state('zoomed')  # Tambahkan baris ini untuk Windows fullscreen
-    app = MiniPaint(root)
-    root.mainloop()
+import tkinter as tk
+from tkinter import colorchooser, filedialog, messagebox
+import math
+import os
+
+import colors
+import core
+import display
+import document
+import fill
+import frames
+import groups
+import history
+import journal
+import mipmap
+import perf
+import rasterops
+import scene
+import spatial
+import sprites
+import stroke
+import tilestore
+import workers
+from core import Shape
+
+CULL_MARGIN = 32  # Pixel layar di luar view yang tetap digambar (tebal garis, pan kecil)
+HOT_PATHS = ("on_click", "on_drag", "on_release", "redraw_all", "sync_scene", "flood_fill", "save_undo",
+             "refresh_canvas", "on_resize", "apply_resize", "apply_drag", "apply_rotate", "rotate_selected", "scale_selected",
+             "render_view", "render_region", "zoom_to")
+ZOOM_MIN, ZOOM_MAX = 0.01, 32.0  # 1% - 3200%
+ZOOM_STEP = 1.25
+REGION_PAD = 2  # Pixel layar tambahan di tiap sisi saat render ulang satu region view
+FILL_MAX = 4096  # Sisi maksimum region flood fill saat zoom out (area terlihat bisa sebesar dokumen)
+OVERLAY_MS = 500
+AUTOSAVE_MS = 30000  # Autosave dokumen .mpd: hanya perubahan yang di-append
+JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".minipaint", "journal")
+JOURNAL_FLUSH_MS = 1000  # fsync journal per batch, bukan per operasi
+CHECKPOINT_MS = 60000  # Checkpoint journal berkala (hanya jika ada operasi baru)
+
+class MiniPaint:
+    def __init__(self, root, journal_dir=JOURNAL_DIR):
+        self.root = root
+        self.root.title("Mini Paint Lengkap")
+        # Harus sebelum bind: binding Tk menyimpan method yang sudah dibungkus timer
+        self.profiler = perf.Profiler()
+        self.profiler.instrument(self, HOT_PATHS)
+        self.overlay = None  # Item teks overlay performa, None jika tidak tampil
+
+        self.width, self.height = 800, 600
+        # Dokumen disimpan per tile; self.image hanya buffer seukuran jendela (viewport)
+        self.raster = tilestore.TiledRaster(self.width, self.height)
+        self.viewport = tilestore.Viewport(self.raster, self.width, self.height)
+        self.set_image(self.viewport.image)
+        self.pyramid = mipmap.Pyramid(self.raster)  # Sumber background saat zoom != 100%
+        self.zoom = 1.0  # Pixel layar per pixel dokumen
+        self.view_origin = (0, 0)  # Titik dokumen di pojok kiri atas jendela
+        self.view_image = None  # Hasil render_view terakhir (zoom != 100%), diperbarui per region
+
+        self.canvas = tk.Canvas(root, width=self.width, height=self.height, bg="white", cursor="crosshair",
+                                xscrollincrement=1, yscrollincrement=1)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.config(scrollregion=(0, 0) + self.raster.size)
+        self.display = display.TiledDisplay(self.canvas)  # Background raster, di-refresh per tile
+        self.display.refresh_all(self.image)
+        self.scene = scene.SceneRenderer(self.canvas, self.start_rotate, self.do_rotate, self.end_rotate)
+        self.frames = frames.FrameScheduler(root)  # Kerja motion/resize digabung per frame (60 Hz)
+        self.frames.on_frame = self.profiler.frame
+
+        self.pen_color = "black"
+        self.pen_width = 3
+        self.mode = "free"
+        self.start_x = None
+        self.start_y = None
+        self.shapes = []
+        self.index = spatial.GridIndex()  # Indeks bbox shape untuk hit-test
+        self.selection = []  # Shape/Group terluar yang terpilih
+        self.groups = groups.GroupTree()  # Grup bertingkat; perubahan masuk history lewat SetGroups
+        self.drag_shapes = []  # Shape yang sedang di-drag (isi seleksi)
+        self.marquee_start = None  # Titik awal kotak seleksi, None jika tidak sedang marquee
+        self.history = history.History()  # Undo/redo berbasis command, batas memori 64 MB
+        self.stroke = None  # Goresan free/eraser yang sedang berjalan
+        self.document = None  # DocumentWriter untuk file .mpd yang sedang dibuka
+        self.journal_dir = journal_dir  # None: journal sesi (dan pemulihan crash) dimatikan
+        self.journal = None  # journal.Journal sesi ini, None jika dimatikan atau direktorinya tidak bisa ditulis
+        self.drag_dx, self.drag_dy = 0, 0
+        self.rotating = False
+        self.line_type = "solid"  # Default line type
+        self.fill_tolerance = 0  # Toleransi warna flood fill (0 = harus sama persis)
+        self.fill_connectivity = 4  # 4 atau 8 tetangga
+        self.fill_metric = "rgb"  # "lab": fill memakai jarak perseptual (dE) dengan color_tolerance
+        self.color_tolerance = 10.0  # dE Lab untuk Ganti Warna dan fill perseptual
+
+        self.status_var = tk.StringVar()
+        self.status_var.set("Mode: Free | Warna: Black")
+        self.io = workers.BackgroundIO(root, self.status_var)  # Save/load/export di thread pool
+
+        self.setup_menu()
+        self.setup_ui()
+        self.bind_canvas()
+        self.setup_statusbar()
+        self.root.bind("<Configure>", self.on_resize)  # Tambahkan ini
+        self.root.minsize(600, 400)  # Atur minimal window, sesuaikan sesuai kebutuhan
+        self.root.after(AUTOSAVE_MS, self.autosave)
+        self.root.protocol("WM_DELETE_WINDOW", self.quit_app)
+        self.start_journal()
+
+
+
+    def on_resize(self, event):
+        # Muat ulang viewport setelah jendela berhenti di-drag, bukan per event
+        if event.widget == self.root:
+            self.frames.debounce("resize", 150, self.apply_resize)
+
+    def apply_resize(self):
+        # Hanya resize jika ukuran canvas berubah dan cukup besar
+        min_width, min_height = 600, 400  # Samakan dengan minsize
+        new_width = max(self.root.winfo_width(), min_width)
+        new_height = max(self.root.winfo_height() - 80, min_height)
+        # Jangan resize jika window terlalu kecil
+        if new_width <= min_width or new_height <= min_height:
+            return
+        if (new_width, new_height) != (self.width, self.height):
+            # Viewport ikut membesar/mengecil; dokumen tidak di-resample
+            self.width, self.height = new_width, new_height
+            self.canvas.config(width=self.width, height=self.height)
+            self.pan_to(*self.view_origin)
+
+    def pan_to(self, x, y):
+        # Pindahkan view ke posisi dokumen (x, y), muat ulang buffer viewport dan gambar ulang background
+        z = self.zoom
+        if z == 1:
+            width, height = self.width, self.height
+        else:
+            # Buffer edit paling besar seukuran jendela; edit di luarnya langsung ke tile
+            width = max(min(math.ceil(self.width / z), self.width, self.raster.width), 1)
+            height = max(min(math.ceil(self.height / z), self.height, self.raster.height), 1)
+        size = self.raster.size
+        origin = self.viewport.move((x, y), width, height)
+        if self.raster.size != size:
+            self.log("canvas", width=self.raster.width, height=self.raster.height)
+        self.set_image(self.viewport.image)
+        if z == 1:
+            self.view_origin = origin
+        else:
+            x = min(max(x, 0), max(self.raster.width - self.width / z, 0))
+            y = min(max(y, 0), max(self.raster.height - self.height / z, 0))
+            self.view_origin = (round(x * z) / z, round(y * z) / z)  # Sejajar pixel layar
+        self.canvas.config(scrollregion=(0, 0, round(self.raster.width * z), round(self.raster.height * z)))
+        self.canvas.xview_moveto(self.view_origin[0] / self.raster.width)
+        self.canvas.yview_moveto(self.view_origin[1] / self.raster.height)
+        if z == 1:
+            self.display.refresh_all(self.image, origin)
+        else:
+            self.render_view()
+        self.sync_scene()
+
+    def view_box(self):
+        # Region dokumen yang terlihat; saat zoom out bisa jauh lebih besar dari buffer viewport
+        x, y = self.view_origin
+        return (x, y, min(x + self.width / self.zoom, self.raster.width),
+                min(y + self.height / self.zoom, self.raster.height))
+
+    def render_view(self):
+        # Zoom != 100%: background diambil dari level mip pyramid lalu di-resample ke pixel layar
+        self.viewport.flush()
+        x0, y0, x1, y1 = self.view_box()
+        z = self.zoom
+        size = (max(round((x1 - x0) * z), 1), max(round((y1 - y0) * z), 1))
+        self.view_image = self.pyramid.render((x0, y0, x1, y1), z, size)
+        self.display.refresh_all(self.view_image, (round(x0 * z), round(y0 * z)))
+
+    def render_region(self, bbox):
+        # Zoom != 100%: render ulang hanya pixel layar yang menutupi bbox (koordinat dokumen)
+        x0, y0, x1, y1 = self.view_box()
+        image = self.view_image
+        w, h = image.size
+        kx, ky = w / (x1 - x0), h / (y1 - y0)  # Skala sebenarnya render_view (ukuran dibulatkan)
+        i0, j0 = max(math.floor((bbox[0] - x0) * kx), 0), max(math.floor((bbox[1] - y0) * ky), 0)
+        i1, j1 = min(math.ceil((bbox[2] - x0) * kx), w), min(math.ceil((bbox[3] - y0) * ky), h)
+        if i0 >= i1 or j0 >= j1:
+            return
+        self.viewport.flush(bbox)
+        # Dirender dengan pinggiran supaya resample di tepi region sama dengan render seluruh view
+        a0, b0 = max(i0 - REGION_PAD, 0), max(j0 - REGION_PAD, 0)
+        a1, b1 = min(i1 + REGION_PAD, w), min(j1 + REGION_PAD, h)
+        region = self.pyramid.render((x0 + a0 / kx, y0 + b0 / ky, x0 + a1 / kx, y0 + b1 / ky), self.zoom,
+                                     (a1 - a0, b1 - b0))
+        image.paste(region.crop((i0 - a0, j0 - b0, i1 - a0, j1 - b0)), (i0, j0))
+        ox, oy = self.display.origin
+        self.display.refresh(image, (ox + i0, oy + j0, ox + i1, oy + j1))
+
+    def zoom_to(self, zoom, anchor=None):
+        # anchor: titik jendela (default tengah) yang posisi dokumennya tetap selama zoom
+        zoom = min(max(zoom, ZOOM_MIN), ZOOM_MAX)
+        if abs(zoom - 1) < 1e-6:
+            zoom = 1.0
+        if zoom == self.zoom:
+            return
+        sx, sy = anchor or (self.width / 2, self.height / 2)
+        x, y = self.view_origin
+        px, py = x + sx / self.zoom, y + sy / self.zoom
+        self.zoom = zoom
+        self.scene.set_scale(zoom)
+        self.pan_to(px - sx / zoom, py - sy / zoom)
+        self.redraw_all(highlight=True)
+        self.status_var.set(f"Zoom: {zoom:.0%}")
+
+    def zoom_fit(self):
+        self.zoom_to(min(self.width / self.raster.width, self.height / self.raster.height))
+
+    def on_wheel_zoom(self, event):
+        # Ctrl+scroll: <MouseWheel> (Windows/macOS, delta) atau Button-4/5 (X11)
+        up = event.delta > 0 if event.num not in (4, 5) else event.num == 4
+        self.zoom_to(self.zoom * (ZOOM_STEP if up else 1 / ZOOM_STEP), (event.x, event.y))
+
+    def start_pan(self, event):
+        self.canvas.scan_mark(event.x, event.y)
+
+    def do_pan(self, event):
+        x, y = event.x, event.y
+        self.frames.request("pan", lambda: self.canvas.scan_dragto(x, y, gain=1))
+
+    def end_pan(self, event):
+        self.frames.flush("pan")
+        self.pan_to(self.canvas.canvasx(0) / self.zoom, self.canvas.canvasy(0) / self.zoom)
+
+    def event_xy(self, event):
+        # Koordinat event jendela -> koordinat dokumen
+        return self.canvas.canvasx(event.x) / self.zoom, self.canvas.canvasy(event.y) / self.zoom
+
+    def setup_menu(self):
+        menubar = tk.Menu(self.root)
+        filemenu = tk.Menu(menubar, tearoff=0)
+        filemenu.add_command(label="Save", command=self.save_document)
+        filemenu.add_command(label="Save As...", command=self.save_document_as)
+        filemenu.add_command(label="Export PNG", command=self.save_image)
+        filemenu.add_command(label="Load", command=self.load_image)
+        filemenu.add_separator()
+        filemenu.add_command(label="Clear", command=self.clear_canvas)
+        filemenu.add_separator()
+        filemenu.add_command(label="Exit", command=self.quit_app)
+        menubar.add_cascade(label="File", menu=filemenu)
+
+        editmenu = tk.Menu(menubar, tearoff=0)
+        editmenu.add_command(label="Undo", command=self.undo)
+        editmenu.add_command(label="Redo", command=self.redo)
+        editmenu.add_separator()
+        editmenu.add_command(label="Pilih Semua", accelerator="Ctrl+A", command=self.select_all)
+        editmenu.add_command(label="Group", accelerator="Ctrl+G", command=self.group_selected)
+        editmenu.add_command(label="Ungroup", accelerator="Ctrl+Shift+G", command=self.ungroup_selected)
+        editmenu.add_command(label="Perbesar 125%", accelerator="+", command=lambda: self.scale_selected(1.25))
+        editmenu.add_command(label="Perkecil 80%", accelerator="-", command=lambda: self.scale_selected(0.8))
+        menubar.add_cascade(label="Edit", menu=editmenu)
+
+        filtermenu = tk.Menu(menubar, tearoff=0)
+        filtermenu.add_command(label="Invert", command=lambda: self.apply_raster_op("Invert", "invert"))
+        filtermenu.add_command(label="Kecerahan...", command=self.ask_brightness)
+        filtermenu.add_command(label="Ganti Warna...", command=self.ask_replace_color)
+        filtermenu.add_command(label="Kuantisasi Palet...", command=self.ask_quantize)
+        filtermenu.add_command(label="Blur", command=lambda: self.apply_raster_op("Blur", "blur", 2))
+        filtermenu.add_command(label="Sharpen", command=lambda: self.apply_raster_op("Sharpen", "sharpen"))
+        filtermenu.add_separator()
+        filtermenu.add_command(label="Ubah Ukuran Gambar...", command=self.ask_resize)
+        filtermenu.add_separator()
+        filtermenu.add_command(label="Toleransi Warna (dE)...", command=self.ask_color_tolerance)
+        self.perceptual_var = tk.BooleanVar(value=False)
+        filtermenu.add_checkbutton(label="Fill Perseptual (Lab)", variable=self.perceptual_var,
+                                   command=lambda: setattr(self, "fill_metric",
+                                                           "lab" if self.perceptual_var.get() else "rgb"))
+        menubar.add_cascade(label="Filter", menu=filtermenu)
+
+        viewmenu = tk.Menu(menubar, tearoff=0)
+        self.overlay_var = tk.BooleanVar(value=False)
+        viewmenu.add_command(label="Zoom In", accelerator="Ctrl++", command=lambda: self.zoom_to(self.zoom * ZOOM_STEP))
+        viewmenu.add_command(label="Zoom Out", accelerator="Ctrl+-", command=lambda: self.zoom_to(self.zoom / ZOOM_STEP))
+        viewmenu.add_command(label="Zoom 100%", accelerator="Ctrl+0", command=lambda: self.zoom_to(1.0))
+        viewmenu.add_command(label="Sesuaikan Jendela", command=self.zoom_fit)
+        viewmenu.add_separator()
+        viewmenu.add_checkbutton(label="Overlay Performa", variable=self.overlay_var, command=self.toggle_overlay)
+        viewmenu.add_command(label="Export Trace...", command=self.export_trace)
+        menubar.add_cascade(label="View", menu=viewmenu)
+
+        helpmenu = tk.Menu(menubar, tearoff=0)
+        helpmenu.add_command(label="About", command=lambda: messagebox.showinfo("About", "Mini Paint by Weeaboo"))
+        menubar.add_cascade(label="Help", menu=helpmenu)
+
+        self.root.config(menu=menubar)
+
+    def setup_ui(self):
+        frame = tk.Frame(self.root)
+        frame.pack(fill=tk.X)
+
+        tk.Button(frame, text="Shape", command=self.choose_shape_type).pack(side=tk.LEFT, padx=2)
+        tk.Button(frame, text="Line", command=self.choose_line_type).pack(side=tk.LEFT, padx=2)
+        tk.Button(frame, text="Fill", command=self.choose_fill_color).pack(side=tk.LEFT, padx=2)
+        tk.Button(frame, text="Select", command=lambda: self.set_mode("select")).pack(side=tk.LEFT, padx=2)  # <--- Tambahkan ini
+        
+        self.rotate_ccw_btn = tk.Button(frame, text="⟲", command=lambda: self.rotate_selected(-15), state=tk.DISABLED)
+        self.rotate_ccw_btn.pack(side=tk.LEFT, padx=2)
+        self.rotate_cw_btn = tk.Button(frame, text="⟳", command=lambda: self.rotate_selected(15), state=tk.DISABLED)
+        self.rotate_cw_btn.pack(side=tk.LEFT, padx=2)
+        tk.Button(frame, text="Undo", command=self.undo).pack(side=tk.LEFT, padx=2)
+        tk.Button(frame, text="Redo", command=self.redo).pack(side=tk.LEFT, padx=2)
+        tk.Button(frame, text="Clear", command=self.clear_canvas).pack(side=tk.LEFT, padx=2)
+        tk.Button(frame, text="Eraser", command=lambda: self.set_mode("eraser")).pack(side=tk.LEFT, padx=2)
+        tk.Button(frame, text="Delete", command=self.delete_selected).pack(side=tk.LEFT, padx=2)
+        tk.Button(frame, text="Warna", command=self.choose_color).pack(side=tk.LEFT, padx=2)
+
+        tk.Label(frame, text="Tebal:").pack(side=tk.LEFT, padx=2)
+        self.width_var = tk.IntVar(value=self.pen_width)
+        tk.Spinbox(frame, from_=1, to=10, width=3, textvariable=self.width_var, command=self.change_width).pack(side=tk.LEFT)
+
+        self.color_label = tk.Label(frame, text=" ", bg=self.pen_color, width=2)
+        self.color_label.pack(side=tk.LEFT, padx=2)
+
+    def setup_statusbar(self):
+        status = tk.Label(self.root, textvariable=self.status_var, bd=1, relief=tk.SUNKEN, anchor=tk.W)
+        status.pack(side=tk.BOTTOM, fill=tk.X)
+        self.canvas.bind("<Motion>", self.update_statusbar)
+
+    def update_statusbar(self, event):
+        self.pointer = (event.x, event.y)
+        self.frames.request("status", self.apply_statusbar)
+
+    def apply_statusbar(self):
+        z = self.zoom
+        x, y = self.canvas.canvasx(self.pointer[0]) / z, self.canvas.canvasy(self.pointer[1]) / z
+        self.status_var.set(f"Mode: {self.mode.capitalize()} | Warna: {self.pen_color} | Posisi: ({x:.0f},{y:.0f})"
+                            f" | Zoom: {z:.0%}")
+
+    def toggle_overlay(self):
+        if self.overlay_var.get() and self.overlay is None:
+            self.overlay = self.canvas.create_text(0, 0, anchor=tk.NW, font=("Courier", 9), fill="#005000",
+                                                   tags="perf_overlay")
+            self.update_overlay()
+        elif not self.overlay_var.get() and self.overlay is not None:
+            self.canvas.delete(self.overlay)
+            self.overlay = None
+
+    def update_overlay(self):
+        # FPS, latensi input, memori undo, dan handler paling lambat (p95)
+        if self.overlay is None:
+            return
+        prof = self.profiler
+        latency = prof.stats.get("input_latency")
+        lines = [f"FPS {prof.fps():3d} | latensi p95 {latency.percentile(95) * 1000 if latency else 0:.1f} ms",
+                 f"Undo {len(self.history.undo_stack)} / redo {len(self.history.redo_stack)}"
+                 f" | {self.history.nbytes / 2**20:.1f} MB"]
+        slowest = sorted(((h.percentile(95), name) for name, h in prof.stats.items()
+                          if name in HOT_PATHS), reverse=True)[:4]
+        lines += [f"{name:<15} p95 {p95 * 1000:7.2f} ms" for p95, name in slowest]
+        self.canvas.itemconfig(self.overlay, text="\n".join(lines))
+        self.canvas.coords(self.overlay, self.canvas.canvasx(8), self.canvas.canvasy(8))
+        self.canvas.tag_raise(self.overlay)
+        self.root.after(OVERLAY_MS, self.update_overlay)
+
+    def export_trace(self):
+        file = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Chrome trace", "*.json")])
+        if file:
+            try:
+                self.profiler.export_trace(file)
+                messagebox.showinfo("Info", f"Trace disimpan di {file}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Gagal export trace: {e}")
+
+    def set_mode(self, mode):
+        self.mode = mode
+        self.selection = []
+        self.status_var.set(f"Mode: {self.mode.capitalize()} | Warna: {self.pen_color}")
+
+    def choose_color(self):
+        try:
+            color = colorchooser.askcolor()[1]
+            if color:
+                self.pen_color = color
+                self.color_label.config(bg=color)
+                self.status_var.set(f"Mode: {self.mode.capitalize()} | Warna: {self.pen_color}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal memilih warna: {e}")
+
+    def change_width(self):
+        self.pen_width = self.width_var.get()
+
+    def bind_canvas(self):
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        self.root.bind("r", self.rotate_selected_key)  # Tambah binding keyboard untuk rotasi
+        self.root.bind("<Control-a>", lambda e: self.select_all())
+        self.root.bind("<Control-g>", lambda e: self.group_selected())
+        self.root.bind("<Control-G>", lambda e: self.ungroup_selected())  # Ctrl+Shift+G
+        self.root.bind("<plus>", lambda e: self.scale_selected(1.25))
+        self.root.bind("<minus>", lambda e: self.scale_selected(0.8))
+        self.root.bind("<Escape>", self.io.cancel)  # Batalkan save/load yang sedang berjalan
+        # Geser (pan) kanvas dengan tombol tengah mouse
+        self.canvas.bind("<ButtonPress-2>", self.start_pan)
+        self.canvas.bind("<B2-Motion>", self.do_pan)
+        self.canvas.bind("<ButtonRelease-2>", self.end_pan)
+        # Zoom: Ctrl+scroll di posisi kursor, atau Ctrl++/Ctrl+-/Ctrl+0 dari keyboard
+        self.canvas.bind("<Control-MouseWheel>", self.on_wheel_zoom)
+        self.canvas.bind("<Control-Button-4>", self.on_wheel_zoom)
+        self.canvas.bind("<Control-Button-5>", self.on_wheel_zoom)
+        self.root.bind("<Control-plus>", lambda e: self.zoom_to(self.zoom * ZOOM_STEP))
+        self.root.bind("<Control-equal>", lambda e: self.zoom_to(self.zoom * ZOOM_STEP))
+        self.root.bind("<Control-minus>", lambda e: self.zoom_to(self.zoom / ZOOM_STEP))
+        self.root.bind("<Control-0>", lambda e: self.zoom_to(1.0))
+
+    def on_click(self, event):
+        x, y = self.event_xy(event)
+        self.start_x, self.start_y = x, y
+        if self.mode == "fill":
+            # Cek apakah klik di dalam shape
+            if self.index.hit_test(x, y):
+                bbox = self.flood_fill(x, y, self.fill_color)
+                if bbox:
+                    self.refresh_canvas(bbox)
+                return
+            messagebox.showinfo("Info", "Klik di dalam shape untuk mengisi warna.")
+        elif self.mode == "select":
+            if self.rotating:
+                return  # Klik pada handle rotasi, sudah ditangani start_rotate
+            extend = bool(event.state & 0x0001)  # Shift+klik: tambah/lepas dari seleksi
+            item = self.select_shape(x, y, extend)
+            self.last_drag_x, self.last_drag_y = x, y
+            self.drag_dx, self.drag_dy = 0, 0
+            self.drag_shapes = []
+            if item is None:
+                self.marquee_start = (x, y)  # Klik di area kosong: mulai kotak seleksi
+                self.marquee_extend = extend
+            elif not extend:
+                self.drag_shapes = self.selected_shapes()
+                self.drag_box = Shape.store.bounds(self.drag_shapes)
+                self.scene.begin_move(self.drag_shapes)
+        elif self.mode == "free":
+            self.stroke = stroke.StrokeBuilder(self.canvas, x, y, self.pen_color, self.pen_width, self.zoom)
+        elif self.mode == "eraser":
+            self.stroke = stroke.StrokeBuilder(self.canvas, x, y, "white", 15, self.zoom)
+
+    def on_drag(self, event):
+        x, y = self.event_xy(event)
+        if self.mode in ("free", "eraser") and self.stroke:
+            # Hanya catat titik; preview diperbarui per frame, raster sekali saat release
+            self.stroke.add(x, y)
+            self.frames.request("stroke", self.stroke.render)
+        elif self.mode == "select" and not self.rotating:
+            self.drag_target = (x, y)
+            if self.marquee_start:
+                self.frames.request("marquee", self.apply_marquee)
+            elif self.drag_shapes:
+                self.frames.request("drag", self.apply_drag)
+
+    def apply_drag(self):
+        # Translasi akumulasi semua event sejak frame terakhir dalam satu langkah, untuk semua shape terpilih
+        if not self.drag_shapes:
+            return
+        x, y = self.drag_target
+        dx = x - self.last_drag_x
+        dy = y - self.last_drag_y
+        if not (dx or dy):
+            return
+        Shape.store.translate(self.drag_shapes, dx, dy)
+        self.drag_dx += dx
+        self.drag_dy += dy
+        self.last_drag_x, self.last_drag_y = x, y
+        self.scene.move_tagged(dx, dy)
+        x0, y0, x1, y1 = self.drag_box
+        self.scene.show_selection((x0 + self.drag_dx, y0 + self.drag_dy, x1 + self.drag_dx, y1 + self.drag_dy))
+
+    def apply_marquee(self):
+        x, y = self.drag_target
+        x0, y0 = self.marquee_start
+        self.scene.show_marquee(min(x0, x), min(y0, y), max(x0, x), max(y0, y))
+
+    def on_release(self, event):
+        end_x, end_y = self.event_xy(event)
+        if self.mode == "line":
+            pts = [(self.start_x, self.start_y), (end_x, end_y)]
+            shape = Shape("line", pts, self.pen_color, self.pen_width, self.line_type)
+            self.add_shape(shape)
+            self.redraw_all()
+            return
+        elif self.mode == "rect":
+            pts = [(self.start_x, self.start_y), (end_x, end_y)]
+        elif self.mode == "oval":
+            pts = [(self.start_x, self.start_y), (end_x, end_y)]
+        elif self.mode == "ellipse":
+            pts = [(self.start_x, self.start_y), (end_x, end_y)]
+        elif self.mode == "triangle":
+            mx = (self.start_x + end_x) / 2
+            pts = [(mx, self.start_y), (self.start_x, end_y), (end_x, end_y)]
+        elif self.mode == "star":
+            pts = core.make_star(self.start_x, self.start_y, end_x, end_y)
+        elif self.mode == "hexagon":
+            pts = core.make_polygon(self.start_x, self.start_y, end_x, end_y, 6)
+        elif self.mode == "pentagon":
+            pts = core.make_polygon(self.start_x, self.start_y, end_x, end_y, 5)
+        elif self.mode == "parallelogram":
+            pts = core.make_parallelogram(self.start_x, self.start_y, end_x, end_y)
+        elif self.mode == "trapezoid":
+            pts = core.make_trapezoid(self.start_x, self.start_y, end_x, end_y)
+        elif self.mode == "rhombus":
+            pts = core.make_rhombus(self.start_x, self.start_y, end_x, end_y)
+        elif self.mode == "text":
+            text = self.ask_text()
+            if not text:
+                return
+            pts = [(end_x, end_y)]
+            shape = Shape("text", pts, self.pen_color, self.pen_width, text=text)
+            self.add_shape(shape)
+            self.redraw_all()
+            return
+        else:
+            if self.mode in ("free", "eraser") and self.stroke:
+                self.frames.cancel("stroke")
+                self.finish_stroke()
+                return
+            self.frames.flush("drag")
+            if self.mode == "select":
+                if self.marquee_start:
+                    self.frames.cancel("marquee")
+                    self.finish_marquee(end_x, end_y)
+                elif self.drag_shapes:
+                    self.scene.end_move()
+                    if self.drag_dx or self.drag_dy:
+                        self.save_undo(history.TranslateShapes(self.drag_shapes, self.drag_dx, self.drag_dy))
+                        self.log("translate", uids=[s.uid for s in self.drag_shapes], dx=self.drag_dx, dy=self.drag_dy)
+                        for shape in self.drag_shapes:
+                            self.index.update(shape)
+                        self.redraw_all(highlight=True)  # Shape yang masuk viewport ikut digambar
+                    self.drag_shapes = []
+            return
+
+        shape = Shape(self.mode, pts, self.pen_color, self.pen_width)
+        self.add_shape(shape)
+        self.redraw_all()
+
+    def add_shape(self, shape):
+        command = history.AddShape(shape, len(self.shapes))
+        rasterize = shape.type in core.BAKED_TYPES
+        self.shapes.append(shape)
+        self.scene.add(shape)
+        self.index.insert(shape)
+        if rasterize:
+            patch = self.raster_edit(history.shape_boxes(shape), lambda: sprites.bake(self.viewport, shape))
+            command = history.Batch([command, patch])
+        self.save_undo(command)
+        self.log("add", uid=shape.uid, shape=shape.to_dict(), rasterize=rasterize)
+
+    def finish_stroke(self):
+        # Goresan disederhanakan (RDP) lalu digambar ke raster dalam satu panggilan
+        builder, self.stroke = self.stroke, None
+        pts = builder.finish()
+        if self.mode == "free":
+            self.add_shape(Shape("stroke", pts, builder.color, builder.width))
+        else:
+            patch = self.raster_edit(history.segment_boxes(pts, builder.width),
+                                     lambda: stroke.erase(self.viewport, pts, builder.color, builder.width))
+            # Goresan di luar kanvas tidak mengubah apa pun: tidak masuk riwayat maupun journal
+            if patch:
+                self.save_undo(patch)
+                self.log("erase", points=[list(p) for p in pts], color=builder.color, width=builder.width)
+
+    def raster_edit(self, boxes, paint):
+        # Jalankan paint() sambil mencatat region boxes untuk undo, lalu refresh region itu
+        patch = history.record_edit(self.viewport, boxes, paint)
+        if patch:
+            self.refresh_canvas(patch.raster_bbox)
+        return patch
+
+    def rotate_selected_key(self, event):
+        # Rotasi seleksi dengan tombol R
+        self.rotate_selected(30)
+
+    def selected_shapes(self):
+        return groups.flatten(self.selection)
+
+    def rotate_selected(self, angle):
+        # Semua shape terpilih diputar sekaligus terhadap satu pivot bersama
+        shapes = self.selected_shapes()
+        if not shapes:
+            messagebox.showwarning("Peringatan", "Pilih shape terlebih dahulu.")
+            return
+        pivot = Shape.store.centroid(shapes)
+        Shape.store.rotate(shapes, angle, pivot)
+        self.save_undo(history.RotateShapes(shapes, angle, pivot))
+        self.log("rotate", uids=[s.uid for s in shapes], angle=angle, pivot=list(pivot))
+        self.after_transform(shapes)
+
+    def scale_selected(self, factor):
+        shapes = self.selected_shapes()
+        if not shapes:
+            messagebox.showwarning("Peringatan", "Pilih shape terlebih dahulu.")
+            return
+        pivot = Shape.store.centroid(shapes)
+        Shape.store.scale(shapes, factor, factor, pivot)
+        self.save_undo(history.ScaleShapes(shapes, factor, factor, pivot))
+        self.log("scale", uids=[s.uid for s in shapes], sx=factor, sy=factor, pivot=list(pivot))
+        self.after_transform(shapes)
+
+    def after_transform(self, shapes):
+        # Item canvas diperbarui oleh satu sync_scene, bukan per shape
+        for shape in shapes:
+            self.index.update(shape)
+        self.redraw_all(highlight=True)
+
+    def select_shape(self, x, y, extend=False):
+        # Klik memilih grup terluar dari shape yang kena; mengembalikan item itu atau None
+        shape = self.index.hit_test(x, y)
+        item = self.groups.top(shape) if shape else None
+        if extend:
+            if item in self.selection:
+                self.selection.remove(item)
+            elif item is not None:
+                self.selection.append(item)
+        elif item is None:
+            self.selection = []
+        elif item not in self.selection:
+            self.selection = [item]
+        self.update_selection()
+        return item
+
+    def finish_marquee(self, x, y):
+        # Pilih shape yang bbox-nya seluruhnya di dalam kotak; grup hanya jika semua anggotanya di dalam
+        x0, y0 = self.marquee_start
+        self.marquee_start = None
+        self.scene.hide_marquee()
+        x0, x1 = min(x0, x), max(x0, x)
+        y0, y1 = min(y0, y), max(y0, y)
+        inside = {s for s in self.index.query_rect(x0, y0, x1, y1)
+                  if x0 <= s.bbox[0] and s.bbox[2] <= x1 and y0 <= s.bbox[1] and s.bbox[3] <= y1}
+        items = list(self.selection) if self.marquee_extend else []
+        for shape in self.index.query_rect(x0, y0, x1, y1):
+            if shape in inside:
+                item = self.groups.top(shape)
+                if item not in items and (item is shape or all(s in inside for s in item.shapes())):
+                    items.append(item)
+        self.selection = items
+        self.update_selection()
+
+    def select_all(self):
+        items = []
+        seen = set()
+        for shape in self.shapes:
+            item = self.groups.top(shape)
+            if item not in seen:
+                seen.add(item)
+                items.append(item)
+        self.selection = items
+        self.update_selection()
+
+    def update_selection(self):
+        self.redraw_all(highlight=True)
+        # Enable/disable tombol rotasi
+        state = tk.NORMAL if self.selection else tk.DISABLED
+        self.rotate_cw_btn.config(state=state)
+        self.rotate_ccw_btn.config(state=state)
+
+    def group_selected(self):
+        if len(self.selection) < 2:
+            messagebox.showwarning("Peringatan", "Pilih minimal dua shape atau grup.")
+            return
+        before = self.groups.state()
+        group = self.groups.group(self.selection)
+        self.save_undo(history.SetGroups(before, self.groups.state()))
+        self.log("groups", groups=self.groups.to_list())
+        self.selection = [group]
+        self.update_selection()
+
+    def ungroup_selected(self):
+        # Hanya satu tingkat: anggota grup (bisa berupa grup lagi) menjadi seleksi
+        if not any(isinstance(item, groups.Group) for item in self.selection):
+            messagebox.showwarning("Peringatan", "Pilih grup terlebih dahulu.")
+            return
+        before = self.groups.state()
+        selection = []
+        for item in self.selection:
+            if isinstance(item, groups.Group):
+                selection.extend(self.groups.ungroup(item))
+            else:
+                selection.append(item)
+        self.save_undo(history.SetGroups(before, self.groups.state()))
+        self.log("groups", groups=self.groups.to_list())
+        self.selection = selection
+        self.update_selection()
+
+    def translate_selected(self):
+        shapes = self.selected_shapes()
+        if shapes:
+            Shape.store.translate(shapes, 30, 30)
+            self.save_undo(history.TranslateShapes(shapes, 30, 30))
+            self.log("translate", uids=[s.uid for s in shapes], dx=30, dy=30)
+            self.after_transform(shapes)
+        else:
+            messagebox.showwarning("Peringatan", "Pilih shape terlebih dahulu.")
+
+    def delete_selected(self):
+        doomed = set(self.selected_shapes())
+        if not doomed:
+            messagebox.showwarning("Peringatan", "Pilih shape terlebih dahulu.")
+            return
+        entries = [(i, s) for i, s in enumerate(self.shapes) if s in doomed]
+        before = self.groups.state()
+        self.groups.discard(self.selection)
+        self.save_undo(history.Batch([history.DeleteShapes(entries),
+                                      history.SetGroups(before, self.groups.state())]))
+        self.log("delete", uids=[s.uid for _, s in entries], groups=self.groups.to_list())
+        self.shapes[:] = [s for s in self.shapes if s not in doomed]
+        for shape in doomed:
+            self.index.remove(shape)
+        self.selection = []
+        self.update_selection()
+
+    def redraw_all(self, highlight=False):
+        # Item canvas persisten: hanya shape yang berubah yang diperbarui
+        self.sync_scene()
+        if highlight and self.selection:
+            self.scene.show_selection(Shape.store.bounds(self.selected_shapes()))
+        else:
+            self.scene.hide_selection()
+
+    def sync_scene(self):
+        # Culling: hanya shape yang bbox-nya beririsan dengan viewport yang punya item
+        x0, y0, x1, y1 = self.view_box()
+        m = CULL_MARGIN / self.zoom
+        visible = self.index.query_rect(x0 - m, y0 - m, x1 + m, y1 + m)
+        if not self.scene.sync(visible):
+            self.frames.request("scene", self.sync_scene)  # Sisanya di frame berikutnya
+
+    def choose_fill_color(self):
+        color = colorchooser.askcolor(title="Pilih warna fill")[1]
+        if color:
+            self.fill_color = color
+            self.set_mode("fill")
+            self.status_var.set(f"Mode: Fill | Warna: {self.fill_color}")
+
+    def start_rotate(self, event):
+        self.rotating = True
+        self.rotate_origin = self.event_xy(event)
+        # Pivot bersama: titik berat semua shape terpilih
+        self.rotate_shapes = self.selected_shapes()
+        self.rotate_cx, self.rotate_cy = Shape.store.centroid(self.rotate_shapes)
+        self.rotate_total = 0.0
+        # Setiap frame titik dihitung ulang dari posisi awal dengan sudut total (tanpa error menumpuk)
+        self.rotate_live = core.LiveTransform(self.rotate_shapes)
+
+    def do_rotate(self, event):
+        if self.rotating and self.rotate_shapes:
+            self.rotate_target = self.event_xy(event)
+            self.frames.request("rotate", self.apply_rotate)
+
+    def apply_rotate(self):
+        # Sudut total sejak awal drag diterapkan sekali per frame ke semua shape
+        if not self.rotating or not self.rotate_shapes:
+            return
+        x0, y0 = self.rotate_origin
+        x1, y1 = self.rotate_target
+        angle0 = math.atan2(y0 - self.rotate_cy, x0 - self.rotate_cx)
+        angle1 = math.atan2(y1 - self.rotate_cy, x1 - self.rotate_cx)
+        self.rotate_total = math.degrees(angle1 - angle0)
+        self.rotate_live.set(core.rotation(self.rotate_total, (self.rotate_cx, self.rotate_cy)))
+        for shape in self.rotate_shapes:
+            self.scene.update(shape)
+        self.scene.show_selection(Shape.store.bounds(self.rotate_shapes))
+
+    def end_rotate(self, event):
+        self.frames.flush("rotate")
+        self.rotating = False
+        shapes = self.rotate_shapes
+        if shapes and self.rotate_total:
+            self.save_undo(history.RotateShapes(shapes, self.rotate_total, (self.rotate_cx, self.rotate_cy)))
+            self.log("rotate", uids=[s.uid for s in shapes], angle=self.rotate_total,
+                     pivot=[self.rotate_cx, self.rotate_cy])
+            self.after_transform(shapes)
+        self.rotate_shapes = []
+        self.rotate_live = None
+
+    def flood_fill(self, x, y, hex_color, tolerance=None, connectivity=None):
+        # Kembalikan bbox area yang berubah supaya pemanggil cukup refresh area itu
+        metric = self.fill_metric
+        if tolerance is None:
+            tolerance = self.color_tolerance if metric == "lab" else self.fill_tolerance
+        if connectivity is None:
+            connectivity = self.fill_connectivity
+        try:
+            rgb = self.hex_to_rgb(hex_color)
+            # Fill bekerja pada area yang terlihat (dibatasi FILL_MAX di sekitar klik saat zoom out)
+            vx0, vy0, vx1, vy1 = self.view_box()
+            ox, oy = max(int(vx0), int(x) - FILL_MAX // 2), max(int(vy0), int(y) - FILL_MAX // 2)
+            box = (ox, oy, min(math.ceil(vx1), ox + FILL_MAX), min(math.ceil(vy1), oy + FILL_MAX))
+            recorder = history.RasterRecorder(self.viewport)
+            bbox = fill.fill_region(self.viewport, box, x, y, rgb, tolerance, connectivity, recorder.snapshot, metric)
+            if bbox is None:
+                return None
+            self.save_undo(recorder.commit())
+            self.log("fill", x=x, y=y, color=list(rgb), tolerance=tolerance, connectivity=connectivity, box=list(box),
+                     metric=metric)
+            return bbox
+        except Exception as e:
+            messagebox.showerror("Error", f"Flood fill gagal: {e}")
+            return None
+
+    def apply_raster_op(self, label, name, *args):
+        # Filter bernama (rasterops.FILTERS) seluruh dokumen, paralel per tile; peta tile lama disimpan untuk undo
+        self.viewport.flush()
+        try:
+            before = rasterops.map_tiles(self.raster, *rasterops.FILTERS[name](*args))
+        except Exception as e:
+            messagebox.showerror("Error", f"{label} gagal: {e}")
+            return
+        self.save_undo(history.ReplaceRaster(self.raster, before))
+        self.log("filter", name=name, args=list(args))
+        self.reload_raster()
+
+    def resize_document(self, width, height):
+        # Raster di-resample paralel per tile; shape ikut diskalakan terhadap titik (0, 0)
+        self.viewport.flush()
+        sx, sy = width / self.raster.width, height / self.raster.height
+        try:
+            before = rasterops.resize(self.raster, width, height)
+        except Exception as e:
+            messagebox.showerror("Error", f"Ubah ukuran gagal: {e}")
+            return
+        Shape.store.scale(self.shapes, sx, sy, (0, 0))
+        self.save_undo(history.Batch([history.ReplaceRaster(self.raster, before),
+                                      history.ScaleShapes(self.shapes, sx, sy, (0, 0))]))
+        self.log("resize", width=width, height=height)
+        self.index.sync(self.shapes)
+        self.reload_raster()
+
+    def reload_raster(self):
+        # Peta tile raster diganti (filter/resize/undo-nya): muat ulang viewport dan scrollregion
+        self.viewport.reload()
+        self.pan_to(*self.view_origin)
+
+    def ask_brightness(self):
+        import tkinter.simpledialog
+        factor = tkinter.simpledialog.askfloat("Kecerahan", "Faktor kecerahan (1.0 = tetap):",
+                                               initialvalue=1.2, minvalue=0.0, maxvalue=10.0)
+        if factor is not None:
+            self.apply_raster_op("Kecerahan", "brightness", factor)
+
+    def ask_replace_color(self):
+        try:
+            src = colorchooser.askcolor(title="Warna yang diganti")[1]
+            dst = src and colorchooser.askcolor(title="Warna pengganti")[1]
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal memilih warna: {e}")
+            return
+        if src and dst:
+            self.apply_raster_op("Ganti warna", "replace_color", self.hex_to_rgb(src), self.hex_to_rgb(dst),
+                                 self.color_tolerance)
+
+    def ask_color_tolerance(self):
+        import tkinter.simpledialog
+        value = tkinter.simpledialog.askfloat("Toleransi Warna", "Jarak warna dE Lab (0 = persis):",
+                                              initialvalue=self.color_tolerance, minvalue=0.0, maxvalue=100.0)
+        if value is not None:
+            self.color_tolerance = value
+
+    def ask_quantize(self):
+        # Palet diambil dari seluruh dokumen lalu dicatat sebagai argumen filter (replay tidak menghitung ulang)
+        import tkinter.simpledialog
+        k = tkinter.simpledialog.askinteger("Kuantisasi Palet", "Jumlah warna:",
+                                            initialvalue=16, minvalue=2, maxvalue=256)
+        if not k:
+            return
+        self.viewport.flush()
+        palette = colors.palette_from_histogram(colors.raster_histogram(self.raster), k)
+        self.apply_raster_op("Kuantisasi", "quantize", [list(c) for c in palette])
+
+    def ask_resize(self):
+        import tkinter.simpledialog
+        percent = tkinter.simpledialog.askinteger("Ubah Ukuran Gambar", "Skala (%):",
+                                                  initialvalue=50, minvalue=1, maxvalue=1000)
+        if percent and percent != 100:
+            w, h = self.raster.size
+            self.resize_document(max(1, round(w * percent / 100)), max(1, round(h * percent / 100)))
+
+    def hex_to_rgb(self, hex_color):
+        hex_color = hex_color.lstrip("#")
+        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+    def refresh_canvas(self, bbox=None):
+        # bbox=None: kirim seluruh image; selain itu hanya tile yang kena bbox
+        self.pyramid.invalidate(bbox)
+        if self.zoom != 1:
+            if bbox is None or self.view_image is None or self.view_image.size != self.display.size:
+                self.render_view()
+            else:
+                self.render_region(bbox)
+        elif bbox is None:
+            self.display.refresh_all(self.image, self.viewport.origin)
+        else:
+            self.display.refresh(self.image, bbox)
+
+    def set_image(self, image):
+        self.image = image
+
+    def save_undo(self, command):
+        # Catat satu langkah (command shape atau patch raster) ke riwayat
+        self.history.push(command)
+        self.count_history()
+
+    def count_history(self):
+        # Memori undo dicatat ke trace setiap riwayat berubah, overlay tampil atau tidak
+        self.profiler.count("undo_bytes", self.history.nbytes)
+
+    def undo(self):
+        command = self.history.undo(self)
+        if command:
+            self.log("undo")
+            self.after_history_change(command)
+        else:
+            messagebox.showinfo("Info", "Tidak ada aksi untuk di-undo.")
+
+    def redo(self):
+        command = self.history.redo(self)
+        if command:
+            self.log("redo")
+            self.after_history_change(command)
+        else:
+            messagebox.showinfo("Info", "Tidak ada aksi untuk di-redo.")
+
+    def after_history_change(self, command):
+        # Buang item seleksi yang sudah tidak ada (shape terhapus, grup di-undo)
+        present = set(self.shapes)
+        parent = self.groups.parent
+        self.selection = [item for item in self.selection
+                          if all(s in present for s in groups.flatten([item]))
+                          and item not in parent
+                          and (not isinstance(item, groups.Group) or parent.get(item.members[0]) is item)]
+        self.index.sync(self.shapes)
+        self.count_history()
+        if command.raster_bbox:
+            self.refresh_canvas(command.raster_bbox)
+        self.redraw_all(highlight=True)
+
+    def clear_canvas(self):
+        state = self.viewport.clear()
+        before = self.groups.state()
+        self.groups.restore({})
+        self.save_undo(history.Batch([history.ClearShapes(self.shapes), history.ClearRaster(self.viewport, state),
+                                      history.SetGroups(before, {})]))
+        self.log("clear")
+        self.shapes.clear()
+        self.index.sync(self.shapes)
+        self.selection = []
+        self.refresh_canvas()
+        self.redraw_all()
+
+    def save_image(self):
+        file = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG files", "*.png")])
+        if file:
+            # Encode PNG di worker dari snapshot copy-on-write; editing tetap bisa jalan.
+            # Garis dan teks (hanya vektor) ditempel di atas raster lewat sprite AA ter-cache;
+            # shape lain sudah dipanggang ke raster saat dibuat, jadi tidak ditempel dua kali
+            self.viewport.flush()
+            raster = self.raster
+            snap = raster.snapshot()
+            items = sprites.overlay_items(self.shapes)
+
+            def export(job):
+                overlay = sprites.Composite(items)
+                snap.save_png(file, progress=job.report, overlay=overlay.paint)
+            self.io.submit("Export PNG", export,
+                           lambda _: messagebox.showinfo("Info", f"Gambar disimpan di {file}"),
+                           lambda e: messagebox.showerror("Error", f"Gagal export PNG: {e}"),
+                           cleanup=lambda ok: raster.release(snap))
+
+    def save_document(self):
+        if not self.document:
+            self.save_document_as()
+            return
+        if self.io.busy("Simpan dokumen") or self.io.busy("Autosave"):
+            messagebox.showinfo("Info", "Penyimpanan sebelumnya masih berjalan.")
+            return
+        self.viewport.flush()
+        snap = document.Snapshot(self.shapes, self.raster, self.groups.to_list())
+        writer = self.document
+        self.io.submit("Simpan dokumen", lambda job: writer.save(snap, job.report),
+                       lambda _: messagebox.showinfo("Info", f"Dokumen disimpan di {writer.path}"),
+                       lambda e: messagebox.showerror("Error", f"Gagal menyimpan dokumen: {e}"),
+                       cleanup=snap.release)
+
+    def save_document_as(self):
+        file = filedialog.asksaveasfilename(defaultextension=".mpd", filetypes=[("Mini Paint document", "*.mpd")])
+        if file:
+            self.document = document.DocumentWriter(file)
+            self.save_document()
+
+    def autosave(self):
+        # Hanya menambahkan record perubahan ke file .mpd, tidak menulis ulang
+        if self.document and not self.stroke and not self.io.busy():
+            self.viewport.flush()
+            snap = document.Snapshot(self.shapes, self.raster, self.groups.to_list())
+            writer = self.document
+            self.io.submit("Autosave", lambda job: writer.append(snap, job.report), lambda written: None,
+                           lambda e: self.status_var.set(f"Autosave gagal: {e}"), cleanup=snap.release)
+        self.root.after(AUTOSAVE_MS, self.autosave)
+
+    def load_image(self):
+        file = filedialog.askopenfilename(filetypes=[("Mini Paint document", "*.mpd"),
+                                                     ("Images", "*.png *.jpg *.jpeg")])
+        if not file or self.io.busy("Load"):
+            return
+        if file.lower().endswith(".mpd"):
+            def load(job):
+                with document.DocumentReader(file) as reader:
+                    return reader.read_parts(job.report)
+        else:
+            size = (self.width, self.height)
+            origin = (self.canvas.canvasx(0), self.canvas.canvasy(0))
+
+            def load(job):
+                # Preview kasar lewat Image.draft (JPEG) selagi decode penuh berjalan
+                preview = tilestore.open_preview(file, size)
+                if preview:
+                    job.post(self.display.show_preview, preview, origin)
+                return tilestore.TiledRaster.open(file, progress=job.report), None
+        self.io.submit("Load", load, lambda result: self.open_loaded(file, *result),
+                       lambda e: messagebox.showerror("Error", f"Gagal load gambar: {e}"),
+                       cleanup=lambda ok: self.display.hide_preview())
+
+    def open_loaded(self, file, raster, ops):
+        # Dibuka sebagai dokumen baru; riwayat lama tidak berlaku lagi
+        if ops is not None:
+            shapes = document.build_shapes(ops)
+            self.groups = groups.GroupTree.from_list(document.find_groups(ops), shapes)
+            self.document = document.DocumentWriter(file)
+            self.document.mark_saved(shapes, raster, self.groups.to_list())
+        else:
+            # Gambar biasa hanya mengganti raster; shape yang ada tetap di atasnya
+            shapes = list(self.shapes)
+            self.document = None
+        self.history.clear()
+        self.install_document(raster, shapes)
+        # Isi file tidak ada di journal: checkpoint segera supaya pemulihan tidak bergantung pada file itu
+        self.log("open", path=file)
+        self.checkpoint()
+
+    def install_document(self, raster, shapes):
+        self.raster = raster
+        self.pyramid = mipmap.Pyramid(raster)
+        self.viewport = tilestore.Viewport(self.raster, min(self.width, self.raster.width),
+                                           min(self.height, self.raster.height))
+        self.shapes[:] = shapes
+        self.selection = []
+        self.index.sync(self.shapes)
+        self.pan_to(0, 0)
+        self.redraw_all()
+        self.count_history()  # Riwayat dikosongkan atau diganti riwayat sesi pulihan
+
+    def log(self, op, **fields):
+        # Catat operasi ke journal sesi; undo/redo yang tidak bisa di-replay memicu checkpoint segera
+        if self.journal and not self.journal.log(op, **fields):
+            self.checkpoint()
+
+    def start_journal(self):
+        # Tawarkan pemulihan sesi yang crash (journal tanpa pemilik), lalu mulai journal sesi ini
+        if self.journal_dir is None:
+            return
+        try:
+            found = journal.orphans(self.journal_dir)
+        except OSError:
+            found = []
+        # Hanya journal yang ditawarkan yang dihapus, dan hanya jika ditolak atau berhasil dipulihkan;
+        # journal yang gagal dipulihkan dan orphan lain dibiarkan untuk startup berikutnya
+        recovered = False
+        if found and not messagebox.askyesno("Pulihkan", "Sesi sebelumnya berakhir tidak normal. Pulihkan pekerjaan?"):
+            journal.discard(found[0])
+        elif found:
+            try:
+                replayer = journal.recover(found[0])
+            except Exception as e:
+                messagebox.showerror("Error", f"Gagal memulihkan sesi: {e}")
+            else:
+                self.groups = replayer.groups
+                self.history = replayer.history  # Undo tetap bisa sampai checkpoint terakhir sesi itu
+                self.install_document(replayer.raster, replayer.shapes)
+                recovered = True
+        try:
+            self.journal = journal.Journal.create(self.journal_dir, self.raster)
+            if recovered:
+                # Sinkron: journal lama baru dihapus setelah state pulihan punya checkpoint sendiri
+                seq = self.journal.begin_checkpoint()
+                snap = document.Snapshot(self.shapes, self.raster, self.groups.to_list(), {"seq": seq}, changes=False)
+                try:
+                    document.DocumentWriter(journal.checkpoint_path(self.journal.path)).save(snap)
+                finally:
+                    snap.release(True)
+                self.journal.end_checkpoint(seq)
+        except OSError as e:
+            self.journal = None
+            self.status_var.set(f"Journal nonaktif: {e}")
+            return
+        if recovered:
+            journal.discard(found[0])
+        self.root.after(JOURNAL_FLUSH_MS, self.flush_journal)
+        self.root.after(CHECKPOINT_MS, self.checkpoint_timer)
+
+    def flush_journal(self):
+        if self.journal:
+            try:
+                self.journal.flush()
+            except OSError as e:
+                self.status_var.set(f"Journal gagal ditulis: {e}")
+            self.root.after(JOURNAL_FLUSH_MS, self.flush_journal)
+
+    def checkpoint_timer(self):
+        if self.journal:
+            if self.journal.seq > self.journal.saved_seq and not self.stroke:
+                self.checkpoint()
+            self.root.after(CHECKPOINT_MS, self.checkpoint_timer)
+
+    def checkpoint(self):
+        # Dokumen lengkap + seq ditulis di worker; journal dipotong setelah checkpoint tersimpan
+        if not self.journal:
+            return
+        if self.io.busy("Checkpoint"):
+            self.root.after(200, self.checkpoint)
+            return
+        self.viewport.flush()
+        jr = self.journal
+        seq = jr.begin_checkpoint()
+        snap = document.Snapshot(self.shapes, self.raster, self.groups.to_list(), {"seq": seq}, changes=False)
+        writer = document.DocumentWriter(journal.checkpoint_path(jr.path))
+        self.io.submit("Checkpoint", lambda job: writer.save(snap, job.report),
+                       lambda _: self.journal is jr and jr.end_checkpoint(seq),
+                       lambda e: self.status_var.set(f"Checkpoint gagal: {e}"), cleanup=snap.release)
+
+    def quit_app(self):
+        # Keluar normal: journal tidak dibutuhkan lagi
+        if self.journal:
+            try:
+                self.journal.close(remove=True)
+            except OSError:
+                pass
+            self.journal = None
+        self.root.quit()
+
+    def choose_line_type(self):
+        win = tk.Toplevel(self.root)
+        win.title("Pilih Jenis Garis")
+        win.grab_set()
+        tk.Label(win, text="Pilih jenis garis:").pack(padx=10, pady=10)
+
+        def pilih(jenis):
+            self.line_type = jenis
+            self.set_mode("line")
+            win.destroy()
+
+        tk.Button(win, text="Lurus", width=15, command=lambda: pilih("solid")).pack(pady=2)
+        tk.Button(win, text="Putus-putus", width=15, command=lambda: pilih("dashed")).pack(pady=2)
+        tk.Button(win, text="Panah", width=15, command=lambda: pilih("arrow")).pack(pady=2)
+
+    def choose_shape_type(self):
+        win = tk.Toplevel(self.root)
+        win.title("Pilih Shape")
+        win.grab_set()
+        tk.Label(win, text="Pilih shape:").pack(padx=10, pady=10)
+
+        shapes = [
+            ("Rectangle", "rect"),
+            ("Oval", "oval"),
+            ("Ellipse", "ellipse"),
+            ("Triangle", "triangle"),
+            ("Star", "star"),
+            ("Hexagon", "hexagon"),
+            ("Pentagon", "pentagon"),
+            ("Parallelogram", "parallelogram"),
+            ("Trapezoid", "trapezoid"),
+            ("Rhombus", "rhombus"),
+        ]
+
+        for label, mode in shapes:
+            tk.Button(win, text=label, width=18, command=lambda m=mode: self.set_shape_mode(m, win)).pack(pady=2)
+
+    def set_shape_mode(self, mode, win):
+        self.mode = mode
+        self.selection = []
+        self.status_var.set(f"Mode: {self.mode.capitalize()} | Warna: {self.pen_color}")
+        win.destroy()
+
+    def ask_text(self):
+        import tkinter.simpledialog
+        return tkinter.simpledialog.askstring("Input Text", "Masukkan teks:")
+
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.state('zoomed')  # Tambahkan baris ini untuk Windows fullscreen
+    app = MiniPaint(root)
+    root.mainloop()
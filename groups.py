@@ -0,0 +1,93 @@
+"""Grup shape bertingkat untuk seleksi dan transformasi bersama. Tidak mengimpor tkinter."""
+
+
+class Group:
+    """Kumpulan shape dan/atau grup lain yang dipilih dan diubah sebagai satu kesatuan."""
+
+    __slots__ = ("members",)
+
+    def __init__(self, members):
+        self.members = list(members)
+
+    def shapes(self):
+        return flatten(self.members)
+
+
+def flatten(items):
+    # Semua shape di dalam items (grup dibuka rekursif), urut anggota
+    result = []
+    for item in items:
+        if isinstance(item, Group):
+            result.extend(item.shapes())
+        else:
+            result.append(item)
+    return result
+
+
+class GroupTree:
+    """Relasi anggota -> grup induk langsung untuk semua grup di dokumen.
+
+    state()/restore() menyalin peta ini sehingga perubahan grup bisa
+    di-undo sebagai satu command (history.SetGroups).
+    """
+
+    def __init__(self):
+        self.parent = {}  # shape atau Group -> Group yang memuatnya
+
+    def top(self, item):
+        # Grup terluar yang memuat item (item sendiri jika tidak dalam grup)
+        parent = self.parent
+        while item in parent:
+            item = parent[item]
+        return item
+
+    def group(self, items):
+        group = Group(items)
+        for item in group.members:
+            self.parent[item] = group
+        return group
+
+    def ungroup(self, group):
+        for item in group.members:
+            if self.parent.get(item) is group:
+                del self.parent[item]
+        return list(group.members)
+
+    def discard(self, items):
+        # Lepas items beserta isi grupnya dari pohon (mis. saat shape dihapus)
+        for item in items:
+            self.parent.pop(item, None)
+            if isinstance(item, Group):
+                self.discard(item.members)
+
+    def state(self):
+        return dict(self.parent)
+
+    def restore(self, state):
+        self.parent = dict(state)
+
+    def roots(self):
+        return [g for g in set(self.parent.values()) if g not in self.parent]
+
+    def to_list(self):
+        """Grup terluar sebagai list bertingkat berisi uid shape (untuk dokumen .mpd)."""
+        def encode(group):
+            return [encode(m) if isinstance(m, Group) else m.uid for m in group.members]
+        roots = [g for g in self.roots() if g.shapes()]
+        roots.sort(key=lambda g: g.shapes()[0].uid)
+        return [encode(g) for g in roots]
+
+    @classmethod
+    def from_list(cls, data, shapes):
+        # Kebalikan to_list(); uid yang tidak ada lagi di shapes diabaikan
+        by_uid = {s.uid: s for s in shapes}
+        tree = cls()
+
+        def decode(members):
+            items = [decode(m) if isinstance(m, list) else by_uid.get(m) for m in members]
+            items = [item for item in items if item is not None]
+            return tree.group(items) if items else None
+
+        for members in data:
+            decode(members)
+        return tree
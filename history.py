@@ -0,0 +1,374 @@
+"""Riwayat undo/redo berbasis command dan patch raster terkompresi."""
+import zlib
+from collections import deque
+
+from PIL import Image
+
+import core
+
+SHAPE_COST = 64  # Perkiraan byte untuk satu command shape (tanpa titik)
+POINT_COST = 16
+
+
+def _points_cost(count):
+    return SHAPE_COST + POINT_COST * count
+
+
+def segment_boxes(points, width):
+    # Bbox per segment polyline, supaya undo hanya menyimpan tile yang dilewati
+    pad = width // 2 + 2
+    return [(min(a[0], b[0]) - pad, min(a[1], b[1]) - pad, max(a[0], b[0]) + pad + 1, max(a[1], b[1]) + pad + 1)
+            for a, b in zip(points, points[1:])]
+
+
+def shape_box(shape):
+    # Bbox shape termasuk tebal garis, untuk mencatat region raster
+    x0, y0, x1, y1 = shape.bbox
+    pad = shape.width + 1
+    return x0 - pad, y0 - pad, x1 + pad + 1, y1 + pad + 1
+
+
+def shape_boxes(shape):
+    return segment_boxes(shape.points, shape.width) if shape.type == "stroke" else [shape_box(shape)]
+
+
+def _pack(image):
+    return zlib.compress(image.tobytes(), 1)
+
+
+def _unpack(data, mode, size):
+    return Image.frombytes(mode, size, zlib.decompress(data))
+
+
+class Command:
+    # Command harus bisa dibalik: undo() lalu redo() mengembalikan state semula
+    nbytes = SHAPE_COST
+    raster_bbox = None  # Region image yang berubah saat undo/redo, None jika tidak ada
+
+    def undo(self, app):
+        raise NotImplementedError
+
+    def redo(self, app):
+        raise NotImplementedError
+
+    def release(self):
+        # Dipanggil saat command dibuang dari riwayat (evict/redo ditimpa/clear)
+        pass
+
+
+class AddShape(Command):
+    def __init__(self, shape, index):
+        self.shape = shape
+        self.index = index
+        self.nbytes = _points_cost(shape.count)
+
+    def undo(self, app):
+        app.shapes.remove(self.shape)
+
+    def redo(self, app):
+        app.shapes.insert(self.index, self.shape)
+
+
+class DeleteShapes(Command):
+    # entries: (index, shape) urut index naik, index di daftar sebelum dihapus
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.nbytes = sum(_points_cost(s.count) for _, s in self.entries)
+
+    def undo(self, app):
+        for index, shape in self.entries:
+            app.shapes.insert(index, shape)
+
+    def redo(self, app):
+        doomed = {s for _, s in self.entries}
+        app.shapes[:] = [s for s in app.shapes if s not in doomed]
+
+
+class ClearShapes(Command):
+    def __init__(self, shapes):
+        self.shapes = list(shapes)
+        self.nbytes = sum(_points_cost(s.count) for s in self.shapes)
+
+    def undo(self, app):
+        app.shapes[:] = self.shapes
+
+    def redo(self, app):
+        app.shapes.clear()
+
+
+class TranslateShapes(Command):
+    # Hanya delta yang disimpan; titik semua shape digeser sekaligus di ShapeStore
+    def __init__(self, shapes, dx, dy):
+        self.shapes = list(shapes)
+        self.dx = dx
+        self.dy = dy
+        self.nbytes = SHAPE_COST + 8 * len(self.shapes)
+
+    def undo(self, app):
+        core.Shape.store.translate(self.shapes, -self.dx, -self.dy)
+
+    def redo(self, app):
+        core.Shape.store.translate(self.shapes, self.dx, self.dy)
+
+
+class RotateShapes(Command):
+    # Rotasi tanpa pembulatan terhadap satu pivot bersama, dibalik dengan sudut negatif
+    def __init__(self, shapes, angle, pivot):
+        self.shapes = list(shapes)
+        self.angle = angle
+        self.pivot = pivot
+        self.nbytes = SHAPE_COST + 8 * len(self.shapes)
+
+    def undo(self, app):
+        core.Shape.store.rotate(self.shapes, -self.angle, self.pivot)
+
+    def redo(self, app):
+        core.Shape.store.rotate(self.shapes, self.angle, self.pivot)
+
+
+class ScaleShapes(Command):
+    def __init__(self, shapes, sx, sy, pivot):
+        self.shapes = list(shapes)
+        self.sx = sx
+        self.sy = sy
+        self.pivot = pivot
+        self.nbytes = SHAPE_COST + 8 * len(self.shapes)
+
+    def undo(self, app):
+        core.Shape.store.scale(self.shapes, 1 / self.sx, 1 / self.sy, self.pivot)
+
+    def redo(self, app):
+        core.Shape.store.scale(self.shapes, self.sx, self.sy, self.pivot)
+
+
+class SetGroups(Command):
+    # Peta grup (GroupTree.state()) sebelum dan sesudah group/ungroup/hapus
+    def __init__(self, before, after):
+        self.before = before
+        self.after = after
+        self.nbytes = SHAPE_COST + 16 * (len(before) + len(after))
+
+    def undo(self, app):
+        app.groups.restore(self.before)
+
+    def redo(self, app):
+        app.groups.restore(self.after)
+
+
+class RasterPatch(Command):
+    # Daftar (box, before, after) dengan isi region terkompresi zlib
+    def __init__(self, mode, regions):
+        self.mode = mode
+        self.regions = regions
+        self.nbytes = sum(len(b) + len(a) for _, b, a in regions) + SHAPE_COST
+
+    def _apply(self, image, which):
+        for region in self.regions:
+            box = region[0]
+            size = (box[2] - box[0], box[3] - box[1])
+            image.paste(_unpack(region[which], self.mode, size), box[:2])
+
+    def undo(self, app):
+        self._apply(app.viewport, 1)
+
+    def redo(self, app):
+        self._apply(app.viewport, 2)
+
+    @property
+    def raster_bbox(self):
+        boxes = [r[0] for r in self.regions]
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+
+class ClearRaster(Command):
+    # Clear seluruh dokumen: peta tile lama disimpan utuh, bukan disalin piksel per piksel
+    def __init__(self, viewport, state):
+        self.raster = viewport.raster
+        self.state = state
+        self.owned = True  # Peta tile di state milik command ini (di stack undo), bukan raster
+        self.size = viewport.size
+        tile_bytes = self.raster.tile ** 2 * 3
+        self.nbytes = state[1].width * state[1].height * 3 + tile_bytes * len(state[0]) + SHAPE_COST
+
+    @property
+    def raster_bbox(self):
+        return (0, 0) + self.size
+
+    def undo(self, app):
+        app.viewport.restore(self.state)
+        self.owned = False
+
+    def redo(self, app):
+        self.state = app.viewport.clear()
+        self.owned = True
+
+    def release(self):
+        if self.owned:
+            self.raster.drop(self.state[0].values())
+
+
+class ReplaceRaster(Command):
+    # Filter/resize seluruh dokumen menulis ke slot tile baru; cukup tukar (ukuran, peta tile).
+    # state: state yang tidak aktif (sebelum selama di stack undo, sesudah selama di stack redo)
+    def __init__(self, raster, before):
+        self.raster = raster
+        self.state = before
+        self.bbox = (0, 0) + tuple(max(a, b) for a, b in zip(before[0], raster.size))
+        old, new = set(before[1].values()), set(raster.tiles.values())
+        self.nbytes = SHAPE_COST + raster.tile ** 2 * 3 * max(len(old - new), len(new - old))
+
+    @property
+    def raster_bbox(self):
+        return self.bbox
+
+    def undo(self, app):
+        self.state = app.raster.swap_state(self.state)
+        app.reload_raster()
+
+    def redo(self, app):
+        self.state = app.raster.swap_state(self.state)
+        app.reload_raster()
+
+    def release(self):
+        self.raster.drop(self.state[1].values())
+
+
+class Batch(Command):
+    # Beberapa command yang di-undo/redo sebagai satu langkah
+    def __init__(self, commands):
+        self.commands = [c for c in commands if c is not None]
+        self.nbytes = sum(c.nbytes for c in self.commands)
+
+    def release(self):
+        for c in self.commands:
+            c.release()
+
+    @property
+    def raster_bbox(self):
+        bbox = None
+        for c in self.commands:
+            b = c.raster_bbox
+            if b:
+                bbox = b if bbox is None else (min(bbox[0], b[0]), min(bbox[1], b[1]),
+                                               max(bbox[2], b[2]), max(bbox[3], b[3]))
+        return bbox
+
+    def undo(self, app):
+        for c in reversed(self.commands):
+            c.undo(app)
+
+    def redo(self, app):
+        for c in self.commands:
+            c.redo(app)
+
+
+class RasterRecorder:
+    """Mencatat region image sebelum diubah untuk membuat RasterPatch.
+
+    Panggil touch(bbox) SEBELUM menggambar ke bbox tersebut. Region disimpan
+    per tile sehingga goresan panjang hanya menyimpan tile yang dilewati.
+    """
+
+    def __init__(self, image, tile=64):
+        # image: apa pun yang punya size, mode, crop() dan paste() (PIL image atau Viewport)
+        self.image = image
+        self.tile = tile
+        self.saved = {}
+
+    def _clip(self, bbox):
+        w, h = self.image.size
+        x0, y0, x1, y1 = bbox
+        x0, y0 = max(int(x0), 0), max(int(y0), 0)
+        x1, y1 = min(int(x1), w), min(int(y1), h)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return x0, y0, x1, y1
+
+    def touch(self, bbox):
+        bbox = self._clip(bbox)
+        if bbox is None:
+            return
+        t = self.tile
+        w, h = self.image.size
+        for ty in range(bbox[1] // t, (bbox[3] - 1) // t + 1):
+            for tx in range(bbox[0] // t, (bbox[2] - 1) // t + 1):
+                if (tx, ty) not in self.saved:
+                    box = (tx * t, ty * t, min((tx + 1) * t, w), min((ty + 1) * t, h))
+                    self.saved[tx, ty] = (box, _pack(self.image.crop(box)))
+
+    def snapshot(self, bbox):
+        # Simpan satu region utuh (untuk operasi sekali jalan seperti fill)
+        bbox = self._clip(bbox)
+        if bbox is not None and bbox not in self.saved:
+            self.saved[bbox] = (bbox, _pack(self.image.crop(bbox)))
+
+    def commit(self):
+        if not self.saved:
+            return None
+        regions = [(box, before, _pack(self.image.crop(box)))
+                   for box, before in self.saved.values()]
+        self.saved = {}
+        return RasterPatch(self.image.mode, regions)
+
+
+def record_edit(target, boxes, paint):
+    """Jalankan paint() pada target (Viewport) sambil mencatat region boxes; kembalikan RasterPatch atau None."""
+    recorder = RasterRecorder(target)
+    if len(boxes) == 1:
+        recorder.snapshot(boxes[0])
+    else:
+        for box in boxes:
+            recorder.touch(box)
+    paint()
+    return recorder.commit()
+
+
+class History:
+    """Stack undo/redo dengan batas memori; entri tertua dibuang jika penuh."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.undo_stack = deque()
+        self.redo_stack = deque()
+        self.nbytes = 0
+
+    def push(self, command):
+        if command is None:
+            return
+        self.undo_stack.append(command)
+        self.nbytes += command.nbytes
+        for c in self.redo_stack:
+            self.nbytes -= c.nbytes
+            c.release()
+        self.redo_stack.clear()
+        self._evict()
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and len(self.undo_stack) > 1:
+            command = self.undo_stack.popleft()
+            self.nbytes -= command.nbytes
+            command.release()
+
+    def undo(self, app):
+        if not self.undo_stack:
+            return None
+        command = self.undo_stack.pop()
+        command.undo(app)
+        self.redo_stack.append(command)
+        return command
+
+    def redo(self, app):
+        if not self.redo_stack:
+            return None
+        command = self.redo_stack.pop()
+        command.redo(app)
+        self.undo_stack.append(command)
+        return command
+
+    def clear(self):
+        for c in self.undo_stack + self.redo_stack:
+            c.release()
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.nbytes = 0
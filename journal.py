@@ -0,0 +1,394 @@
+"""Journal sesi: setiap operasi pengguna di-append sebagai satu baris JSON.
+
+Baris ditampung di memori lalu ditulis dan di-fsync per batch (flush()),
+bukan per operasi. Checkpoint berkala adalah dokumen .mpd biasa dengan
+record META {"seq": n}; setelah checkpoint tersimpan, journal ditulis ulang
+hanya berisi operasi dengan seq > n, jadi pemulihan cukup membuka
+checkpoint lalu me-replay ekornya. Replayer tidak butuh Tk dan memakai
+command history yang sama dengan aplikasi, sehingga journal juga bisa
+dipakai sebagai trace input benchmark (bench.py --journal).
+
+Contoh: python journal.py sesi.mpj -o pulih.mpd
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import core
+import document
+import fill
+import groups
+import history
+import rasterops
+import sprites
+import stroke
+import tilestore
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+SUFFIX = ".mpj"
+FLUSH_BYTES = 256 * 1024  # flush() lebih awal jika tampungan sudah sebesar ini
+NO_HISTORY = ("undo", "redo", "open", "canvas")  # Operasi yang tidak menambah command ke history
+
+
+def checkpoint_path(path):
+    return os.path.splitext(path)[0] + ".ckpt.mpd"
+
+
+def _lock(f):
+    # Kunci eksklusif non-blocking; journal yang kuncinya bisa diambil tidak dipakai proses yang hidup
+    try:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        elif msvcrt:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _line(record):
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+class Journal:
+    """Writer journal satu sesi; log() hanya menampung baris, flush() menulis lalu fsync."""
+
+    def __init__(self, path, header):
+        self.path = path
+        self.header = _line(dict(header, seq=0, op="begin"))
+        self.seq = 0
+        self.saved_seq = 0  # seq yang sudah tercakup checkpoint
+        self.pending = []
+        self.pending_bytes = 0
+        self.tail = []  # (seq, baris) sejak checkpoint terakhir, untuk menulis ulang journal
+        # Command yang bisa di-undo/redo oleh replay dari checkpoint terakhir
+        self.undo_depth = self.redo_depth = 0
+        self.file = None
+        self._rewrite([self.header])
+
+    @classmethod
+    def create(cls, directory, raster):
+        os.makedirs(directory, exist_ok=True)
+        name = time.strftime("sesi-%Y%m%d-%H%M%S") + f"-{os.getpid()}{SUFFIX}"
+        return cls(os.path.join(directory, name),
+                   {"width": raster.width, "height": raster.height, "background": list(raster.background)})
+
+    def _rewrite(self, lines):
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write("".join(lines).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        if self.file:
+            self.file.close()
+        os.replace(tmp, self.path)
+        self.file = open(self.path, "ab")
+        _lock(self.file)
+
+    def log(self, op, **fields):
+        """Tampung satu operasi.
+
+        Mengembalikan False jika undo/redo menyentuh command dari sebelum
+        checkpoint terakhir: replay tidak bisa mengulanginya, jadi pemanggil
+        harus segera membuat checkpoint baru.
+        """
+        replayable = True
+        if op == "undo":
+            replayable = self.undo_depth > 0
+            if replayable:
+                self.undo_depth -= 1
+                self.redo_depth += 1
+        elif op == "redo":
+            replayable = self.redo_depth > 0
+            if replayable:
+                self.redo_depth -= 1
+                self.undo_depth += 1
+        elif op == "open":
+            self.undo_depth = self.redo_depth = 0
+        elif op not in NO_HISTORY:
+            self.undo_depth += 1
+            self.redo_depth = 0
+        self.seq += 1
+        line = _line(dict(fields, seq=self.seq, op=op))
+        self.pending.append(line)
+        self.pending_bytes += len(line)
+        self.tail.append((self.seq, line))
+        if self.pending_bytes >= FLUSH_BYTES:
+            self.flush()
+        return replayable
+
+    def flush(self):
+        # Satu write + fsync untuk semua operasi yang tertampung
+        if not self.pending:
+            return
+        self.file.write("".join(self.pending).encode("utf-8"))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = []
+        self.pending_bytes = 0
+
+    def begin_checkpoint(self):
+        # Saat snapshot checkpoint diambil; replay dari checkpoint ini mulai dengan history kosong
+        self.flush()
+        self.undo_depth = self.redo_depth = 0
+        return self.seq
+
+    def end_checkpoint(self, seq):
+        # Checkpoint sampai seq sudah tersimpan: journal ditulis ulang hanya berisi operasi sesudahnya
+        self.flush()
+        self.tail = [(s, line) for s, line in self.tail if s > seq]
+        self._rewrite([self.header] + [line for _, line in self.tail])
+        self.saved_seq = seq
+
+    def close(self, remove=False):
+        if self.file:
+            self.flush()
+            self.file.close()
+            self.file = None
+        if remove:
+            discard(self.path)
+
+
+def discard(path):
+    for p in (path, checkpoint_path(path)):
+        try:
+            os.remove(p)
+        except FileNotFoundError:
+            pass
+
+
+def orphans(directory):
+    """Journal yang tidak dikunci proses mana pun (sesi yang crash), terbaru dulu."""
+    found = []
+    for path in sorted(glob.glob(os.path.join(directory, "*" + SUFFIX)), key=os.path.getmtime, reverse=True):
+        with open(path, "ab") as f:
+            if _lock(f):
+                found.append(path)
+    return found
+
+
+def read(path):
+    """(header, daftar operasi) dari file journal; baris terakhir yang terpotong (crash) diabaikan."""
+    header, ops = None, []
+    with open(path, "rb") as f:
+        for raw in f:
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                break
+            if record["op"] == "begin":
+                header = record
+            else:
+                ops.append(record)
+    return header, ops
+
+
+def load(path):
+    """Replayer di state checkpoint terakhir dan operasi journal yang belum tercakup di dalamnya."""
+    header, ops = read(path)
+    ckpt = checkpoint_path(path)
+    if os.path.exists(ckpt):
+        with document.DocumentReader(ckpt) as reader:
+            raster, parts = reader.read_parts()
+        shapes = document.build_shapes(parts)
+        replayer = Replayer(raster, shapes, groups.GroupTree.from_list(document.find_groups(parts), shapes))
+        seq = document.find_meta(parts).get("seq", 0)
+    elif header:
+        replayer = Replayer(tilestore.TiledRaster(header["width"], header["height"], tuple(header["background"])))
+        seq = 0
+    else:
+        raise ValueError("Journal tidak memiliki header maupun checkpoint")
+    return replayer, [op for op in ops if op["seq"] > seq]
+
+
+def recover(path):
+    replayer, ops = load(path)
+    replayer.replay(ops)
+    return replayer
+
+
+class Replayer:
+    """Dokumen headless yang menerapkan operasi journal.
+
+    Atributnya (shapes, raster, viewport, groups, history) sama dengan
+    MiniPaint, jadi command history dipakai apa adanya dan undo/redo di
+    journal menghasilkan state yang sama dengan sesi aslinya.
+    """
+
+    def __init__(self, raster, shapes=(), tree=None):
+        self.raster = raster
+        self.viewport = self._viewport()
+        self.shapes = list(shapes)
+        self.by_uid = {s.uid: s for s in self.shapes}  # Termasuk shape terhapus (bisa di-undo)
+        self.groups = tree or groups.GroupTree()
+        self.history = history.History()
+        self.seq = 0
+
+    def _viewport(self):
+        # Buffer kecil: hampir semua edit langsung ditulis ke tile
+        t = self.raster.tile
+        return tilestore.Viewport(self.raster, min(t, self.raster.width), min(t, self.raster.height))
+
+    def reload_raster(self):
+        self.viewport.reload()
+
+    def replay(self, ops):
+        for op in ops:
+            self.apply(op)
+        self.viewport.flush()
+
+    def apply(self, op):
+        handler = getattr(self, "op_" + op["op"], None)
+        if handler is None:
+            raise ValueError(f"Operasi journal tidak dikenal: {op['op']}")
+        handler(op)
+        self.seq = op["seq"]
+
+    def _find(self, uids):
+        return [self.by_uid[uid] for uid in uids]
+
+    def _regroup(self, data):
+        # Pohon grup baru dari to_list(); kembalikan (state lama, state baru) untuk SetGroups
+        before = self.groups.state()
+        self.groups.restore(groups.GroupTree.from_list(data, list(self.by_uid.values())).state())
+        return before, self.groups.state()
+
+    def op_add(self, op):
+        shape = core.Shape.from_dict(op["shape"])
+        shape.uid = op["uid"]
+        core.Shape.next_uid = max(core.Shape.next_uid, shape.uid + 1)
+        self.by_uid[shape.uid] = shape
+        command = history.AddShape(shape, len(self.shapes))
+        self.shapes.append(shape)
+        if op.get("rasterize"):
+            patch = history.record_edit(self.viewport, history.shape_boxes(shape),
+                                        lambda: sprites.bake(self.viewport, shape))
+            command = history.Batch([command, patch])
+        self.history.push(command)
+
+    def op_erase(self, op):
+        pts = [tuple(p) for p in op["points"]]
+        self.history.push(history.record_edit(self.viewport, history.segment_boxes(pts, op["width"]),
+                                              lambda: stroke.erase(self.viewport, pts, op["color"], op["width"])))
+
+    def op_fill(self, op):
+        recorder = history.RasterRecorder(self.viewport)
+        fill.fill_region(self.viewport, op["box"], op["x"], op["y"], tuple(op["color"]), op["tolerance"],
+                         op["connectivity"], recorder.snapshot, op.get("metric", "rgb"))
+        self.history.push(recorder.commit())
+
+    def op_translate(self, op):
+        shapes = self._find(op["uids"])
+        core.Shape.store.translate(shapes, op["dx"], op["dy"])
+        self.history.push(history.TranslateShapes(shapes, op["dx"], op["dy"]))
+
+    def op_rotate(self, op):
+        shapes = self._find(op["uids"])
+        pivot = tuple(op["pivot"])
+        core.Shape.store.rotate(shapes, op["angle"], pivot)
+        self.history.push(history.RotateShapes(shapes, op["angle"], pivot))
+
+    def op_scale(self, op):
+        shapes = self._find(op["uids"])
+        pivot = tuple(op["pivot"])
+        core.Shape.store.scale(shapes, op["sx"], op["sy"], pivot)
+        self.history.push(history.ScaleShapes(shapes, op["sx"], op["sy"], pivot))
+
+    def op_delete(self, op):
+        doomed = set(self._find(op["uids"]))
+        entries = [(i, s) for i, s in enumerate(self.shapes) if s in doomed]
+        self.shapes[:] = [s for s in self.shapes if s not in doomed]
+        before, after = self._regroup(op["groups"])
+        self.history.push(history.Batch([history.DeleteShapes(entries), history.SetGroups(before, after)]))
+
+    def op_groups(self, op):
+        self.history.push(history.SetGroups(*self._regroup(op["groups"])))
+
+    def op_clear(self, op):
+        state = self.viewport.clear()
+        before = self.groups.state()
+        self.groups.restore({})
+        self.history.push(history.Batch([history.ClearShapes(self.shapes), history.ClearRaster(self.viewport, state),
+                                         history.SetGroups(before, {})]))
+        self.shapes.clear()
+
+    def op_undo(self, op):
+        self.history.undo(self)
+
+    def op_redo(self, op):
+        self.history.redo(self)
+
+    def op_filter(self, op):
+        self.viewport.flush()
+        before = rasterops.map_tiles(self.raster, *rasterops.FILTERS[op["name"]](*op["args"]))
+        self.history.push(history.ReplaceRaster(self.raster, before))
+        self.reload_raster()
+
+    def op_resize(self, op):
+        self.viewport.flush()
+        sx, sy = op["width"] / self.raster.width, op["height"] / self.raster.height
+        before = rasterops.resize(self.raster, op["width"], op["height"])
+        core.Shape.store.scale(self.shapes, sx, sy, (0, 0))
+        self.history.push(history.Batch([history.ReplaceRaster(self.raster, before),
+                                         history.ScaleShapes(self.shapes, sx, sy, (0, 0))]))
+        self.reload_raster()
+
+    def op_canvas(self, op):
+        # Kanvas diperbesar mengikuti jendela (Viewport.move), tanpa resample
+        self.viewport.flush()
+        self.raster.resize_canvas(op["width"], op["height"])
+        self.viewport = self._viewport()
+
+    def op_open(self, op):
+        # Replay membaca ulang file sumber; checkpoint sesudahnya membuat ini jarang dibutuhkan
+        path = op["path"]
+        if path.lower().endswith(".mpd"):
+            with document.DocumentReader(path) as reader:
+                raster, parts = reader.read_parts()
+            shapes = document.build_shapes(parts)
+            self.groups = groups.GroupTree.from_list(document.find_groups(parts), shapes)
+            self.shapes = shapes
+            self.by_uid.update((s.uid, s) for s in shapes)
+        else:
+            raster = tilestore.TiledRaster.open(path)
+        self.raster = raster
+        self.viewport = self._viewport()
+        self.history.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay journal sesi Mini Paint tanpa Tk.")
+    parser.add_argument("journal", help="file journal .mpj")
+    parser.add_argument("-o", "--out", help="simpan hasil sebagai dokumen .mpd")
+    parser.add_argument("--png", help="export hasil ke PNG")
+    args = parser.parse_args(argv)
+
+    replayer, ops = load(args.journal)
+    start = time.perf_counter()
+    replayer.replay(ops)
+    elapsed = time.perf_counter() - start
+    print(f"{len(ops)} operasi di-replay dalam {elapsed * 1000:.1f} ms "
+          f"({len(ops) / elapsed if elapsed else 0:.0f} op/s), {len(replayer.shapes)} shape")
+    if args.out:
+        snap = document.Snapshot(replayer.shapes, replayer.raster, replayer.groups.to_list())
+        document.DocumentWriter(args.out).save(snap)
+        snap.release(True)
+    if args.png:
+        replayer.raster.save_png(args.png, overlay=sprites.Composite(sprites.overlay_items(replayer.shapes)).paint)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
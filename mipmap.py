@@ -0,0 +1,123 @@
+"""Mip pyramid TiledRaster untuk tampilan zoom out; tidak mengimpor tkinter.
+
+Level k adalah dokumen diperkecil 2^k kali, dipecah per tile seukuran tile
+raster. Tile level dihitung malas dari empat tile anak (rata-rata 2x2) dan
+di-cache; setelah edit hanya tile leluhur region yang kotor yang dibuang,
+sehingga view zoom out cukup mengambil sampel dari level kecil tanpa
+meresample seluruh bitmap setiap frame.
+"""
+import math
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+
+class Pyramid:
+    """Level 1.. dari raster; level 0 dibaca langsung dari tile raster.
+
+    Tile yang seluruhnya latar (tidak ada tile raster di bawahnya) disimpan
+    sebagai None. Cache dibatasi max_bytes (LRU).
+    """
+
+    def __init__(self, raster, max_bytes=128 * 1024 * 1024):
+        self.raster = raster
+        self.max_bytes = max_bytes
+        self.levels = OrderedDict()  # (level, tx, ty) -> array atau None
+        self.nbytes = 0
+        self.state = None
+
+    def _check(self):
+        # Peta tile atau ukuran raster diganti (clear, filter, resize): semua level tidak berlaku
+        raster = self.raster
+        if self.state is None or self.state[0] != raster.size or self.state[1] is not raster.tiles:
+            self.levels.clear()
+            self.nbytes = 0
+            self.state = (raster.size, raster.tiles)
+
+    def invalidate(self, bbox=None):
+        """Buang tile semua level yang menutupi bbox (koordinat dokumen); None = semuanya."""
+        if bbox is None:
+            self.levels.clear()
+            self.nbytes = 0
+            return
+        self._check()
+        t = self.raster.tile
+        x0, y0 = max(int(bbox[0]), 0) // t, max(int(bbox[1]), 0) // t
+        x1, y1 = max(math.ceil(bbox[2]) - 1, 0) // t, max(math.ceil(bbox[3]) - 1, 0) // t
+        level = 1
+        while self.levels and level <= self.top():
+            x0, y0, x1, y1 = x0 // 2, y0 // 2, x1 // 2, y1 // 2
+            for ty in range(y0, y1 + 1):
+                for tx in range(x0, x1 + 1):
+                    self._drop((level, tx, ty))
+            level += 1
+
+    def top(self):
+        # Level terkecil yang masih lebih besar dari satu tile
+        t = self.raster.tile
+        return max(math.ceil(math.log2(max(self.raster.width, self.raster.height, t) / t)), 0)
+
+    def _drop(self, key):
+        arr = self.levels.pop(key, None)
+        if arr is not None:
+            self.nbytes -= arr.nbytes
+
+    def tile(self, level, tx, ty):
+        """Array (t, t, 3) tile level, atau None jika seluruhnya latar."""
+        if level == 0:
+            return self.raster.get_tile((tx, ty))
+        key = (level, tx, ty)
+        if key in self.levels:
+            self.levels.move_to_end(key)
+            return self.levels[key]
+        children = [self.tile(level - 1, 2 * tx + dx, 2 * ty + dy) for dy in (0, 1) for dx in (0, 1)]
+        arr = None
+        if any(c is not None for c in children):
+            t = self.raster.tile
+            block = np.empty((2 * t, 2 * t, 3), dtype=np.uint16)
+            for i, c in enumerate(children):
+                y, x = (i // 2) * t, (i % 2) * t
+                block[y:y + t, x:x + t] = self.raster.background if c is None else c
+            arr = ((block[0::2, 0::2] + block[1::2, 0::2] + block[0::2, 1::2] + block[1::2, 1::2] + 2) // 4
+                   ).astype(np.uint8)
+            self.nbytes += arr.nbytes
+        self.levels[key] = arr
+        while self.nbytes > self.max_bytes and len(self.levels) > 1:
+            self._drop(next(iter(self.levels)))
+        return arr
+
+    def read_array(self, level, box):
+        """Region box (koordinat level, eksklusif) sebagai array; di luar dokumen berisi latar."""
+        t = self.raster.tile
+        x0, y0, x1, y1 = box
+        out = np.empty((y1 - y0, x1 - x0, 3), dtype=np.uint8)
+        out[...] = self.raster.background
+        s = 2 ** level
+        w, h = math.ceil(self.raster.width / s), math.ceil(self.raster.height / s)
+        cx0, cy0, cx1, cy1 = max(x0, 0), max(y0, 0), min(x1, w), min(y1, h)
+        for ty in range(cy0 // t, (cy1 - 1) // t + 1 if cy1 > cy0 else 0):
+            for tx in range(cx0 // t, (cx1 - 1) // t + 1 if cx1 > cx0 else 0):
+                arr = self.tile(level, tx, ty)
+                if arr is None:
+                    continue
+                ax0, ay0 = max(cx0, tx * t), max(cy0, ty * t)
+                ax1, ay1 = min(cx1, (tx + 1) * t), min(cy1, (ty + 1) * t)
+                out[ay0 - y0:ay1 - y0, ax0 - x0:ax1 - x0] = arr[ay0 - ty * t:ay1 - ty * t, ax0 - tx * t:ax1 - tx * t]
+        return out
+
+    def render(self, box, zoom, size):
+        """Region dokumen box pada skala zoom sebagai image RGB berukuran size.
+
+        Sumber diambil dari level terkecil yang resolusinya masih >= zoom, jadi
+        resample per frame tidak pernah lebih dari ~2x ukuran layar.
+        """
+        self._check()
+        level = min(max(int(math.floor(math.log2(1 / zoom))), 0), self.top()) if zoom < 1 else 0
+        s = 2 ** level
+        x0, y0, x1, y1 = (v / s for v in box)
+        ix0, iy0 = math.floor(x0), math.floor(y0)
+        src = Image.fromarray(self.read_array(level, (ix0, iy0, math.ceil(x1), math.ceil(y1))), "RGB")
+        # Diperbesar: pixel dokumen tampil sebagai kotak tajam; diperkecil: bilinear
+        resample = Image.NEAREST if zoom > 1 else Image.BILINEAR
+        return src.resize(size, resample, box=(x0 - ix0, y0 - iy0, x1 - ix0, y1 - iy0))
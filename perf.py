@@ -0,0 +1,103 @@
+"""Instrumentasi ringan: timer per handler, histogram bergulir, dan export trace Chrome."""
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+
+class Histogram:
+    """Ring buffer sampel terakhir (detik); persentil dihitung saat diminta."""
+
+    def __init__(self, size=2048):
+        self.samples = np.zeros(size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.samples[self.count % len(self.samples)] = value
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        n = min(self.count, len(self.samples))
+        return float(np.percentile(self.samples[:n], p)) if n else 0.0
+
+    def summary(self):
+        # Dalam milidetik; persentil atas sampel terakhir, count/mean/max sejak awal
+        return {"count": self.count, "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+                "p50_ms": self.percentile(50) * 1000, "p95_ms": self.percentile(95) * 1000,
+                "p99_ms": self.percentile(99) * 1000, "max_ms": self.max * 1000}
+
+
+class Profiler:
+    """Mengumpulkan durasi per nama (histogram + event trace) dan counter.
+
+    instrument(obj, names) membungkus method instance; panggil sebelum method
+    itu di-bind ke event Tk supaya binding memakai versi yang diukur.
+    """
+
+    def __init__(self, max_events=200000):
+        self.stats = {}
+        self.counters = Counter()
+        self.events = deque(maxlen=max_events)  # Event trace format Chrome ("X" dan "C")
+        self.start = time.perf_counter()
+        self.frames = deque(maxlen=240)  # Waktu selesai frame, untuk FPS
+
+    def _us(self, t):
+        return (t - self.start) * 1e6
+
+    def record(self, name, t0, t1):
+        hist = self.stats.get(name)
+        if hist is None:
+            hist = self.stats[name] = Histogram()
+        hist.add(t1 - t0)
+        self.events.append({"name": name, "ph": "X", "ts": self._us(t0), "dur": (t1 - t0) * 1e6,
+                            "pid": os.getpid(), "tid": threading.get_ident()})
+
+    def wrap(self, name, fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(name, t0, time.perf_counter())
+        return timed
+
+    def instrument(self, obj, names):
+        for name in names:
+            setattr(obj, name, self.wrap(name, getattr(obj, name)))
+
+    def frame(self, latency, duration):
+        # Dipanggil FrameScheduler setelah setiap frame
+        now = time.perf_counter()
+        self.frames.append(now)
+        self.record("frame", now - duration, now)
+        self.stats.setdefault("input_latency", Histogram()).add(latency)
+
+    def fps(self):
+        now = time.perf_counter()
+        recent = [t for t in self.frames if now - t <= 1.0]
+        return len(recent)
+
+    def count(self, name, value):
+        # Counter (mis. memori undo) juga dicatat sebagai event "C" di trace
+        self.counters[name] = value
+        self.events.append({"name": name, "ph": "C", "ts": self._us(time.perf_counter()),
+                            "pid": os.getpid(), "args": {name: value}})
+
+    def summary(self):
+        return {name: hist.summary() for name, hist in sorted(self.stats.items())}
+
+    def export_trace(self, path):
+        """Tulis trace JSON yang bisa dibuka di chrome://tracing atau Perfetto."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": list(self.events), "displayTimeUnit": "ms",
+                       "otherData": {"summary": self.summary(), "counters": dict(self.counters)}}, f)
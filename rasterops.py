@@ -0,0 +1,145 @@
+"""Operasi raster seluruh dokumen yang dijalankan paralel per tile.
+
+Setiap tile hasil dihitung di thread pool dan ditulis ke slot baru di file
+scratch TiledRaster; tile sumber tidak pernah ditimpa, jadi worker bisa
+membaca tetangganya (halo untuk blur/resize) tanpa kunci, dan peta tile
+lama langsung menjadi state undo. NumPy dan filter/resample PIL melepas
+GIL, sehingga thread biasa cukup untuk memakai semua core tanpa menyalin
+tile ke proses lain. Modul ini tidak mengimpor tkinter.
+"""
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+import colors
+
+_pool = None
+
+
+def pool():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="minipaint-tile")
+    return _pool
+
+
+def _grid(raster):
+    t = raster.tile
+    return math.ceil(raster.width / t), math.ceil(raster.height / t)
+
+
+def _near(raster, keys, reach):
+    # keys ditambah tile tetangga sejauh reach tile, dibatasi grid dokumen
+    gw, gh = _grid(raster)
+    result = set()
+    for tx, ty in keys:
+        for ny in range(max(ty - reach, 0), min(ty + reach + 1, gh)):
+            for nx in range(max(tx - reach, 0), min(tx + reach + 1, gw)):
+                result.add((nx, ny))
+    return result
+
+
+def _run(raster, keys, work, size=None):
+    """Hitung work(key, slots, slot) untuk setiap key ke slot baru, lalu ganti peta tile.
+
+    Slot dialokasikan di thread utama (file scratch bisa tumbuh); worker hanya
+    menulis ke slotnya sendiri. Mengembalikan state lama (ukuran, peta tile).
+    """
+    keys = sorted(keys)
+    new = {key: raster._new_slot() for key in keys}
+    slots = raster.slots
+    list(pool().map(lambda key: work(key, slots, new[key]), keys))
+    tiles = {k: v for k, v in raster.tiles.items() if k not in new} if size is None else {}
+    raster.retain(tiles.values())  # Tile yang tidak diproses dipakai bersama dengan state lama
+    tiles.update(new)
+    return raster.swap_state((size or raster.size, tiles))
+
+
+def map_tiles(raster, fn, margin=0):
+    """Terapkan fn(array RGB) -> array ke seluruh raster, paralel per tile.
+
+    margin: pixel tetangga yang ikut dibaca di setiap sisi (untuk filter
+    ber-kernel); fn menerima tile plus halo dan hasilnya dipotong kembali.
+    """
+    t = raster.tile
+    bg = np.array([[raster.background]], dtype=np.uint8)
+    if not np.array_equal(fn(np.pad(bg, ((margin, margin), (margin, margin), (0, 0)), mode="edge"))
+                          [margin:margin + 1, margin:margin + 1], bg):
+        # Latar ikut berubah (mis. invert): semua tile dokumen harus dialokasikan
+        gw, gh = _grid(raster)
+        keys = [(tx, ty) for ty in range(gh) for tx in range(gw)]
+    else:
+        keys = _near(raster, raster.tiles, math.ceil(margin / t))
+
+    def work(key, slots, slot):
+        tx, ty = key
+        src = raster.read_array((tx * t - margin, ty * t - margin, (tx + 1) * t + margin, (ty + 1) * t + margin))
+        slots[slot] = fn(src)[margin:margin + t, margin:margin + t]
+
+    return _run(raster, keys, work)
+
+
+def resize(raster, width, height, resample=Image.BICUBIC):
+    """Resample seluruh dokumen ke width x height; setiap tile hasil di-resample dari region sumbernya."""
+    t = raster.tile
+    sx, sy = width / raster.width, height / raster.height
+    # Halo sumber sesuai jangkauan kernel bicubic (2 pixel, melebar saat diperkecil)
+    margin = math.ceil(2 * max(1, 1 / sx, 1 / sy)) + 1
+    gw, gh = math.ceil(width / t), math.ceil(height / t)
+    keys = set()
+    for tx, ty in raster.tiles:
+        # Tile hasil yang region sumbernya menyentuh tile sumber berisi
+        x0, y0 = ((tx * t - margin) * sx) // t, ((ty * t - margin) * sy) // t
+        x1, y1 = ((tx + 1) * t + margin) * sx // t, ((ty + 1) * t + margin) * sy // t
+        keys.update((nx, ny) for ny in range(max(int(y0), 0), min(int(y1) + 1, gh))
+                    for nx in range(max(int(x0), 0), min(int(x1) + 1, gw)))
+
+    def work(key, slots, slot):
+        tx, ty = key
+        fx0, fy0 = tx * t / sx, ty * t / sy
+        fx1, fy1 = (tx + 1) * t / sx, (ty + 1) * t / sy
+        ix0, iy0 = math.floor(fx0) - margin, math.floor(fy0) - margin
+        src = Image.fromarray(raster.read_array((ix0, iy0, math.ceil(fx1) + margin, math.ceil(fy1) + margin)))
+        out = src.resize((t, t), resample, box=(fx0 - ix0, fy0 - iy0, fx1 - ix0, fy1 - iy0))
+        slots[slot] = np.asarray(out)
+
+    return _run(raster, keys, work, (width, height))
+
+
+def invert(arr):
+    return 255 - arr
+
+
+def brightness(factor):
+    def apply(arr):
+        return np.clip(arr * np.float32(factor), 0, 255).astype(np.uint8)
+    return apply
+
+
+def _pil_filter(image_filter):
+    def apply(arr):
+        return np.asarray(Image.fromarray(arr).filter(image_filter))
+    return apply
+
+
+# blur/sharpen mengembalikan (fn, margin) untuk map_tiles(raster, fn, margin)
+def blur(radius):
+    return _pil_filter(ImageFilter.GaussianBlur(radius)), math.ceil(radius * 3) + 1
+
+
+def sharpen(radius=2, percent=150, threshold=3):
+    return _pil_filter(ImageFilter.UnsharpMask(radius, percent, threshold)), math.ceil(radius * 3) + 1
+
+
+# Filter bernama -> (fn, margin); nama dan argumennya yang dicatat di journal
+FILTERS = {
+    "invert": lambda: (invert, 0),
+    "brightness": lambda factor: (brightness(factor), 0),
+    "replace_color": lambda src, dst, tolerance=0: (colors.replace_color(tuple(src), tuple(dst), tolerance), 0),
+    "quantize": lambda palette: (colors.quantizer(palette), 0),
+    "blur": blur,
+    "sharpen": sharpen,
+}
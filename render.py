@@ -0,0 +1,76 @@
+"""CLI headless: render banyak dokumen (.mpd atau JSON) ke PNG dengan process pool.
+
+Contoh: python render.py docs/*.json -o out -j 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import core
+import document
+import sprites
+
+
+def render_file(src, out_dir):
+    # Dijalankan di worker; kembalikan waktu tiap tahap dalam detik
+    t0 = time.perf_counter()
+    if src.lower().endswith(".mpd"):
+        raster, shapes = document.read(src)
+        image = raster.crop((0, 0) + raster.size)
+        t1 = time.perf_counter()
+        sprites.Composite(sprites.overlay_items(shapes)).paint(image)
+    else:
+        doc = core.load_document(src)
+        shapes = doc["shapes"]
+        t1 = time.perf_counter()
+        image = core.render_document(doc)
+    t2 = time.perf_counter()
+    dst = os.path.join(out_dir, os.path.splitext(os.path.basename(src))[0] + ".png")
+    image.save(dst)
+    t3 = time.perf_counter()
+    return dst, len(shapes), (t1 - t0, t2 - t1, t3 - t2)
+
+
+def report(src, result):
+    dst, count, (load, draw, save) = result
+    print(f"{src} -> {dst}: {count} shape | load {load * 1000:.1f} ms | "
+          f"render {draw * 1000:.1f} ms | save {save * 1000:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render dokumen Mini Paint ke PNG tanpa Tk.")
+    parser.add_argument("files", nargs="+", help="file dokumen .mpd atau JSON")
+    parser.add_argument("-o", "--out", default=".", help="folder output PNG")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="jumlah proses worker (1 = tanpa pool)")
+    args = parser.parse_args(argv)
+    os.makedirs(args.out, exist_ok=True)
+
+    failed = 0
+    start = time.perf_counter()
+    if args.jobs == 1:
+        for src in args.files:
+            try:
+                report(src, render_file(src, args.out))
+            except Exception as e:
+                print(f"{src}: gagal: {e}", file=sys.stderr)
+                failed += 1
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = {pool.submit(render_file, src, args.out): src for src in args.files}
+            for future in as_completed(futures):
+                src = futures[future]
+                try:
+                    report(src, future.result())
+                except Exception as e:
+                    print(f"{src}: gagal: {e}", file=sys.stderr)
+                    failed += 1
+    total = time.perf_counter() - start
+    print(f"{len(args.files) - failed}/{len(args.files)} file selesai dalam {total:.2f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""Renderer retained-mode: setiap Shape punya item canvas yang persisten."""
+import time
+
+
+class SceneRenderer:
+    """Memetakan Shape ke item ID canvas dan hanya memperbarui item yang berubah.
+
+    Item dibuat sekali lewat Shape.draw, lalu geometri diperbarui dengan
+    canvas.coords/move. Overlay seleksi (kotak + handle rotasi) juga dibuat
+    sekali dan hanya dipindah/disembunyikan.
+
+    sync() hanya menerima shape yang terlihat (hasil culling pemanggil), jadi
+    item di luar layar dihapus. Shape yang lebih kecil dari satu pixel layar
+    digambar sebagai titik (sprite 1x1), dan pembuatan item dibatasi
+    budget waktu per frame.
+
+    Semua koordinat masuk dalam unit dokumen; item canvas berada di ruang
+    layar (dokumen x scale), jadi zoom cukup lewat set_scale().
+    """
+
+    BUDGET = 0.012  # Detik per frame untuk membuat item baru
+
+    def __init__(self, canvas, on_rotate_start, on_rotate, on_rotate_end):
+        self.canvas = canvas
+        self.items = {}  # shape -> item id
+        self.synced = {}  # shape -> versi geometri saat terakhir digambar
+        self.order = []
+        self.sprites = set()  # Shape yang saat ini digambar sebagai titik (LOD)
+        self.moving = []  # Shape yang itemnya diberi tag "moving" selama drag seleksi
+        self.scale = 1.0  # Pixel layar per unit dokumen
+        self.select_rect = canvas.create_rectangle(0, 0, 0, 0, outline="red", dash=(4, 2), state="hidden")
+        self.marquee = canvas.create_rectangle(0, 0, 0, 0, outline="blue", dash=(2, 2), state="hidden")
+        self.rotation_handle = canvas.create_oval(0, 0, 0, 0, fill="orange", outline="black",
+                                                  tags="rotate_handle", state="hidden")
+        canvas.tag_bind("rotate_handle", "<Button-1>", on_rotate_start)
+        canvas.tag_bind("rotate_handle", "<B1-Motion>", on_rotate)
+        canvas.tag_bind("rotate_handle", "<ButtonRelease-1>", on_rotate_end)
+
+    def is_tiny(self, shape):
+        if shape.type == "text":
+            return False
+        x0, y0, x1, y1 = shape.bbox
+        limit = 1 / self.scale
+        return x1 - x0 < limit and y1 - y0 < limit
+
+    def set_scale(self, scale):
+        # Zoom berubah: semua item dibuat ulang oleh sync() berikutnya (tebal garis/font ikut skala)
+        for item in self.items.values():
+            self.canvas.delete(item)
+        self.items, self.synced, self.order = {}, {}, []
+        self.sprites.clear()
+        self.scale = scale
+
+    def _dot(self, shape):
+        x0, y0 = (v * self.scale for v in shape.bbox[:2])
+        return x0, y0, x0 + 1, y0 + 1
+
+    def _create(self, shape):
+        if self.is_tiny(shape):
+            self.sprites.add(shape)
+            return self.canvas.create_rectangle(*self._dot(shape), outline="", fill=shape.color)
+        self.sprites.discard(shape)
+        return shape.draw(self.canvas, self.scale)
+
+    def add(self, shape):
+        item = self._create(shape)
+        if item is not None:
+            self.items[shape] = item
+            self.synced[shape] = shape.version
+            self.order.append(shape)
+            self.raise_overlay()
+
+    def remove(self, shape):
+        item = self.items.pop(shape, None)
+        if item is not None:
+            self.canvas.delete(item)
+            del self.synced[shape]
+            self.sprites.discard(shape)
+            self.order.remove(shape)
+
+    def move(self, shape, dx, dy):
+        item = self.items.get(shape)
+        if item is not None:
+            self.canvas.move(item, dx * self.scale, dy * self.scale)
+            self.synced[shape] = shape.version
+
+    def begin_move(self, shapes):
+        # Tag sekali di awal drag; setiap frame cukup satu canvas.move untuk semua item
+        self.moving = [s for s in shapes if s in self.items]
+        for shape in self.moving:
+            self.canvas.addtag_withtag("moving", self.items[shape])
+
+    def move_tagged(self, dx, dy):
+        self.canvas.move("moving", dx * self.scale, dy * self.scale)
+        for shape in self.moving:
+            if shape in self.items:
+                self.synced[shape] = shape.version
+
+    def end_move(self):
+        self.canvas.dtag("moving")
+        self.moving = []
+
+    def update(self, shape):
+        item = self.items.get(shape)
+        if item is None:
+            return
+        if (shape in self.sprites) != self.is_tiny(shape):
+            self._replace(shape)
+            return
+        if shape.type == "text":
+            self.canvas.coords(item, *shape.screen_flat(self.scale)[:2])
+        elif shape in self.sprites:
+            self.canvas.coords(item, *self._dot(shape))
+        else:
+            self.canvas.coords(item, *shape.screen_flat(self.scale))
+        self.synced[shape] = shape.version
+
+    def _replace(self, shape):
+        # Ganti item (mis. LOD berubah) di posisi z yang sama
+        old = self.items[shape]
+        item = self._create(shape)
+        if item is None:
+            self.remove(shape)
+            return
+        self.canvas.tag_raise(item, old)
+        self.canvas.delete(old)
+        self.items[shape] = item
+        self.synced[shape] = shape.version
+
+    def sync(self, shapes):
+        """Samakan isi canvas dengan shapes yang terlihat (urut z).
+
+        Mengembalikan False jika budget frame habis sebelum semua item dibuat;
+        pemanggil menjadwalkan sync lagi di frame berikutnya.
+        """
+        present = set(shapes)
+        for shape in [s for s in self.items if s not in present]:
+            self.remove(shape)
+        deadline = time.perf_counter() + self.BUDGET
+        created = 0
+        complete = True
+        prev = None
+        inserted = False
+        for shape in shapes:
+            if shape not in self.items:
+                if created % 64 == 63 and time.perf_counter() > deadline:
+                    complete = False
+                    break
+                item = self._create(shape)
+                if item is None:
+                    continue
+                created += 1
+                self.items[shape] = item
+                self.synced[shape] = shape.version
+                # Sisipkan tepat di atas shape sebelumnya agar urutan z tetap
+                if prev is not None:
+                    self.canvas.tag_raise(item, self.items[prev])
+                elif self.order:
+                    self.canvas.tag_lower(item, self.items[self.order[0]])
+                inserted = True
+            elif self.synced[shape] != shape.version:
+                self.update(shape)
+            prev = shape
+        if inserted:
+            self.order = [s for s in shapes if s in self.items]
+            self.raise_overlay()
+        return complete
+
+    def raise_overlay(self):
+        self.canvas.tag_raise(self.select_rect)
+        self.canvas.tag_raise(self.marquee)
+        self.canvas.tag_raise(self.rotation_handle)
+
+    def show_selection(self, bbox):
+        # bbox gabungan semua shape terpilih; satu kotak dan satu handle rotasi
+        x0, y0, x1, y1 = (v * self.scale for v in bbox)
+        self.canvas.coords(self.select_rect, x0-5, y0-5, x1+5, y1+5)
+        cx = (x0 + x1) / 2
+        cy = y0 - 25
+        self.canvas.coords(self.rotation_handle, cx-8, cy-8, cx+8, cy+8)
+        self.canvas.itemconfig(self.select_rect, state="normal")
+        self.canvas.itemconfig(self.rotation_handle, state="normal")
+
+    def hide_selection(self):
+        self.canvas.itemconfig(self.select_rect, state="hidden")
+        self.canvas.itemconfig(self.rotation_handle, state="hidden")
+
+    def show_marquee(self, x0, y0, x1, y1):
+        k = self.scale
+        self.canvas.coords(self.marquee, x0 * k, y0 * k, x1 * k, y1 * k)
+        self.canvas.itemconfig(self.marquee, state="normal")
+
+    def hide_marquee(self):
+        self.canvas.itemconfig(self.marquee, state="hidden")
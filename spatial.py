@@ -0,0 +1,147 @@
+"""Indeks spasial grid seragam untuk hit-test dan query marquee."""
+import math
+
+
+def segment_distance(px, py, x0, y0, x1, y1):
+    # Jarak titik ke segmen garis (x0, y0)-(x1, y1)
+    dx, dy = x1 - x0, y1 - y0
+    length2 = dx * dx + dy * dy
+    if length2 == 0:
+        return math.hypot(px - x0, py - y0)
+    t = max(0.0, min(1.0, ((px - x0) * dx + (py - y0) * dy) / length2))
+    return math.hypot(px - (x0 + t * dx), py - (y0 + t * dy))
+
+
+def polyline_distance(px, py, points, closed=False):
+    pts = list(points)
+    if closed:
+        pts.append(pts[0])
+    if len(pts) == 1:
+        return math.hypot(px - pts[0][0], py - pts[0][1])
+    return min(segment_distance(px, py, *a, *b) for a, b in zip(pts, pts[1:]))
+
+
+def point_in_polygon(px, py, points):
+    # Ray casting (aturan even-odd)
+    inside = False
+    n = len(points)
+    for i in range(n):
+        x0, y0 = points[i]
+        x1, y1 = points[(i + 1) % n]
+        if (y0 > py) != (y1 > py):
+            if px < x0 + (py - y0) * (x1 - x0) / (y1 - y0):
+                inside = not inside
+    return inside
+
+
+class GridIndex:
+    """Grid seragam berisi bbox shape, dengan urutan z untuk hasil query.
+
+    Shape yang menutupi terlalu banyak sel disimpan terpisah di `large` dan
+    selalu ikut menjadi kandidat.
+    """
+
+    def __init__(self, cell=128, max_cells=256):
+        self.cell = cell
+        self.max_cells = max_cells
+        self.cells = {}  # (cx, cy) -> set shape
+        self.large = set()
+        self.boxes = {}  # shape -> (bbox, daftar sel)
+        self.z = {}
+        self.next_z = 0
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def _cells(self, bbox):
+        c = self.cell
+        x0, y0, x1, y1 = bbox
+        return [(cx, cy)
+                for cy in range(math.floor(y0 / c), math.floor(y1 / c) + 1)
+                for cx in range(math.floor(x0 / c), math.floor(x1 / c) + 1)]
+
+    def _place(self, shape):
+        bbox = shape.bbox
+        keys = self._cells(bbox)
+        if len(keys) > self.max_cells:
+            self.large.add(shape)
+            keys = None
+        else:
+            for key in keys:
+                self.cells.setdefault(key, set()).add(shape)
+        self.boxes[shape] = (bbox, keys)
+
+    def _unplace(self, shape):
+        bbox, keys = self.boxes.pop(shape)
+        if keys is None:
+            self.large.discard(shape)
+            return
+        for key in keys:
+            bucket = self.cells[key]
+            bucket.discard(shape)
+            if not bucket:
+                del self.cells[key]
+
+    def insert(self, shape):
+        # Shape baru selalu berada paling atas
+        self._place(shape)
+        self.z[shape] = self.next_z
+        self.next_z += 1
+
+    def remove(self, shape):
+        if shape in self.boxes:
+            self._unplace(shape)
+            del self.z[shape]
+
+    def update(self, shape):
+        # Panggil setelah translate/rotate; tidak ada kerja jika bbox sama
+        if shape not in self.boxes:
+            return
+        if self.boxes[shape][0] != shape.bbox:
+            self._unplace(shape)
+            self._place(shape)
+
+    def sync(self, shapes):
+        # Samakan dengan daftar shapes setelah undo/redo/clear
+        present = set(shapes)
+        for shape in [s for s in self.boxes if s not in present]:
+            self.remove(shape)
+        renumber = False
+        for shape in shapes:
+            if shape not in self.boxes:
+                self._place(shape)
+                renumber = True
+            else:
+                self.update(shape)
+        if renumber:
+            self.z = {s: i for i, s in enumerate(shapes)}
+            self.next_z = len(shapes)
+
+    def query_rect(self, x0, y0, x1, y1):
+        """Shape yang bbox-nya beririsan dengan persegi, urut z dari bawah."""
+        found = set()
+        for key in self._cells((x0, y0, x1, y1)):
+            bucket = self.cells.get(key)
+            if bucket:
+                found.update(bucket)
+        found.update(self.large)
+        result = [s for s in found if self._overlaps(self.boxes[s][0], x0, y0, x1, y1)]
+        result.sort(key=self.z.__getitem__)
+        return result
+
+    def query_point(self, x, y, margin=5):
+        """Kandidat di sekitar titik, urut z dari atas (yang terlihat dulu)."""
+        result = self.query_rect(x - margin, y - margin, x + margin, y + margin)
+        result.reverse()
+        return result
+
+    def hit_test(self, x, y, margin=5):
+        # Tes geometri persis hanya untuk kandidat dari grid
+        for shape in self.query_point(x, y, margin):
+            if shape.contains(x, y, margin):
+                return shape
+        return None
+
+    @staticmethod
+    def _overlaps(bbox, x0, y0, x1, y1):
+        return bbox[0] <= x1 and bbox[2] >= x0 and bbox[1] <= y1 and bbox[3] >= y0
@@ -0,0 +1,329 @@
+"""Rasterizer anti-aliasing: shape dirender supersampled menjadi sprite mask yang di-cache.
+
+Geometri mengikuti item canvas Tk (outline di tengah garis, dash, panah,
+teks) sehingga PNG hasil export sama dengan tampilan di layar. Sprite
+disimpan per bentuk + gaya (tanpa warna dan posisi bulat), jadi shape
+yang tidak berubah, atau hanya digeser, tidak dirender ulang. Modul ini
+tidak mengimpor tkinter.
+"""
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+import core
+
+SS = 4  # Faktor supersampling per sumbu; mask diperkecil dengan filter box (coverage)
+ARROW_SHAPE = (8, 10, 3)  # Default arrowshape Tk: panjang leher, panjang sayap, lebar sayap
+FONT_FILES = ("arial.ttf", "Arial.ttf", "DejaVuSans.ttf")
+PT_TO_PX = 96 / 72  # Ukuran font Tk dalam point
+REGION = 512  # Sisi potongan (pixel) saat shape besar dirender langsung ke region tujuan
+SPRITE_MAX = REGION * REGION  # Shape dengan bbox lebih luas tidak dijadikan sprite (mask SS bisa ratusan MB)
+
+_fonts = {}
+
+
+class Item:
+    """Salinan data gambar satu shape; aman dipakai di thread worker."""
+
+    __slots__ = ("type", "color", "width", "line_type", "text", "points")
+
+    def __init__(self, shape, points):
+        self.type = shape.type
+        self.color = shape.color
+        self.width = shape.width
+        self.line_type = shape.line_type
+        self.text = shape.text
+        self.points = points
+
+
+def freeze(shapes):
+    # Salin koordinat semua shape sekaligus dari ShapeStore (panggil di thread utama)
+    shapes = list(shapes)
+    if not shapes:
+        return []
+    idx, counts = core.Shape.store.point_index(shapes)
+    parts = np.split(core.Shape.store.coords[idx], np.cumsum(counts)[:-1])
+    return [Item(s, pts) for s, pts in zip(shapes, parts)]
+
+
+def overlay_items(shapes):
+    # Item untuk overlay di atas raster: hanya shape yang tidak dipanggang (core.BAKED_TYPES).
+    # Shape yang sudah ada di raster tidak ditempel lagi, supaya tepi AA tidak tercampur dua kali
+    return freeze(s for s in shapes if s.type not in core.BAKED_TYPES)
+
+
+def font(size):
+    # size dalam pixel (sudah dikali SS); font pertama yang tersedia
+    f = _fonts.get(size)
+    if f is None:
+        for name in FONT_FILES:
+            try:
+                f = ImageFont.truetype(name, size)
+                break
+            except OSError:
+                continue
+        else:
+            f = ImageFont.load_default(size)
+        f = _fonts[size] = f
+    return f
+
+
+def _dashes(pts, on, off):
+    # Potong polyline menjadi segmen dash sepanjang on, jeda off (pola berlanjut antar segmen)
+    result = []
+    pos = 0.0  # Posisi dalam pola (0..on+off)
+    period = on + off
+    current = None
+    for (x0, y0), (x1, y1) in zip(pts, pts[1:]):
+        length = math.hypot(x1 - x0, y1 - y0)
+        t = 0.0
+        while t < length:
+            step = min((on if pos < on else period) - pos, length - t)
+            a = (x0 + (x1 - x0) * t / length, y0 + (y1 - y0) * t / length)
+            t += step
+            b = (x0 + (x1 - x0) * t / length, y0 + (y1 - y0) * t / length)
+            if pos < on:
+                if current is None:
+                    current = [a]
+                current.append(b)
+            pos += step
+            if pos >= on and current:
+                result.append(current)
+                current = None
+            if pos >= period:
+                pos = 0.0
+    if current:
+        result.append(current)
+    return result
+
+
+def _arrow(pts, lw):
+    # Polygon kepala panah di titik terakhir (seperti arrow="last" Tk) dan titik ujung garis yang baru
+    (x0, y0), (x1, y1) = pts[-2], pts[-1]
+    length = math.hypot(x1 - x0, y1 - y0)
+    if not length:
+        return None, pts
+    d1, d2, d3 = (v * SS for v in ARROW_SHAPE)
+    ux, uy = (x1 - x0) / length, (y1 - y0) / length
+    px, py = -uy, ux
+    half = lw / 2
+    neck = (x1 - ux * d1, y1 - uy * d1)
+    head = [(x1, y1),
+            (x1 - ux * d2 + px * (half + d3), y1 - uy * d2 + py * (half + d3)),
+            (neck[0] + px * half, neck[1] + py * half),
+            (neck[0] - px * half, neck[1] - py * half),
+            (x1 - ux * d2 - px * (half + d3), y1 - uy * d2 - py * (half + d3))]
+    return head, pts[:-1] + [neck]
+
+
+def _pad(shape_type, width, line_type):
+    pad = width / 2 + 2
+    if shape_type == "line" and line_type == "arrow":
+        pad += max(ARROW_SHAPE)
+    return pad
+
+
+def bounds(shape_type, width, line_type, pts):
+    # Bbox pixel (eksklusif) yang bisa disentuh shape non-teks
+    pad = _pad(shape_type, width, line_type)
+    x0, y0 = (pts.min(axis=0) - pad).tolist()
+    x1, y1 = (pts.max(axis=0) + pad).tolist()
+    return math.floor(x0), math.floor(y0), math.ceil(x1), math.ceil(y1)
+
+
+def render_mask(shape_type, width, line_type, text, pts, clip=None):
+    """Render satu shape ke mask "L" ber-AA; kembalikan (x, y, mask) relatif terhadap pts.
+
+    pts: array (N, 2) koordinat dokumen. clip: hanya render bagian di box itu
+    (koordinat yang sama dengan pts), sehingga buffer supersample tidak pernah
+    lebih besar dari region tujuan. Mengembalikan None jika tidak ada yang digambar.
+    """
+    if shape_type == "text":
+        return _render_text(width, text, pts)
+    bx, by, x1, y1 = bounds(shape_type, width, line_type, pts)
+    ox, oy = bx, by
+    if clip is not None:
+        ox, oy = max(ox, clip[0]), max(oy, clip[1])
+        x1, y1 = min(x1, clip[2]), min(y1, clip[3])
+        if ox >= x1 or oy >= y1:
+            return None
+    w, h = x1 - ox, y1 - oy
+    mask = Image.new("L", (w * SS, h * SS), 0)
+    draw = ImageDraw.Draw(mask)
+    # Koordinat Tk menunjuk tengah pixel; skala ke ruang supersample. Geometri (dash, panah)
+    # dihitung relatif terhadap bbox utuh supaya sama di setiap clip, lalu dibulatkan ke grid
+    # supersample dan digeser ke mask (PIL membulatkan titik pecahan berbeda-beda per ukuran image)
+    p = [tuple(q) for q in ((pts - (bx, by) + 0.5) * SS).tolist()]
+    dx, dy = (ox - bx) * SS, (oy - by) * SS
+
+    def at(q):
+        return [(round(x) - dx, round(y) - dy) for x, y in q]
+    lw = max(1, round(width * SS))
+    half = lw / 2
+    if shape_type in ("rect", "oval", "ellipse"):
+        # Outline Tk berada di tengah garis bbox; PIL menggambar ke dalam, jadi kotaknya diperlebar
+        (ax, ay), (bx, by) = at(p)
+        box = [min(ax, bx) - half, min(ay, by) - half, max(ax, bx) + half, max(ay, by) + half]
+        if shape_type == "rect":
+            draw.rectangle(box, outline=255, width=lw)
+        else:
+            draw.ellipse(box, outline=255, width=lw)
+    elif shape_type in core.POLYGON_TYPES:
+        p = at(p)
+        draw.line(p + [p[0]], fill=255, width=lw, joint="curve")
+        x, y = p[0]
+        draw.ellipse((x - half, y - half, x + half, y + half), fill=255)  # Sambungan titik awal/akhir
+    elif shape_type == "line":
+        if line_type == "dashed":
+            on, off = core.LINE_OPTIONS["dashed"]["dash"]
+            for dash in _dashes(p, on * SS, off * SS):
+                draw.line(at(dash), fill=255, width=lw)
+        elif line_type == "arrow":
+            head, p = _arrow(p, lw)
+            draw.line(at(p), fill=255, width=lw, joint="curve")
+            if head:
+                draw.polygon(at(head), fill=255)
+        else:
+            draw.line(at(p), fill=255, width=lw, joint="curve")
+    elif shape_type == "stroke":
+        core.draw_polyline(draw, at(p), 255, lw)
+    else:
+        return None
+    return ox, oy, mask.reduce(SS)
+
+
+def _render_text(width, text, pts):
+    if not text:
+        return None
+    f = font(round(max(10, width * 3) * PT_TO_PX * SS))
+    x, y = pts[0].tolist()
+    ox, oy = math.floor(x), math.floor(y)
+    cx, cy = (x - ox + 0.5) * SS, (y - oy + 0.5) * SS
+    # Anchor "mm" = tengah teks, sama dengan anchor default create_text
+    left, top, right, bottom = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((cx, cy), text, font=f, anchor="mm")
+    sx, sy = math.floor(left / SS) - 1, math.floor(top / SS) - 1
+    w, h = math.ceil(right / SS) - sx + 1, math.ceil(bottom / SS) - sy + 1
+    mask = Image.new("L", (w * SS, h * SS), 0)
+    ImageDraw.Draw(mask).text((cx - sx * SS, cy - sy * SS), text, fill=255, font=f, anchor="mm")
+    return ox + sx, oy + sy, mask.reduce(SS)
+
+
+class SpriteCache:
+    """Cache LRU sprite mask, kunci = tipe + gaya + geometri relatif terhadap pixel bulat.
+
+    Warna tidak masuk kunci (mask ditempel dengan warna shape), dan geser
+    sejauh pixel bulat menghasilkan kunci yang sama. Aman dipakai dari
+    beberapa thread.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.sprites = OrderedDict()  # kunci -> (dx, dy, mask) atau None
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, item):
+        """(x, y, mask) sprite item di koordinat dokumen; mask None jika kosong."""
+        pts = item.points
+        anchor = np.floor(pts.min(axis=0))
+        rel = pts - anchor
+        key = (item.type, item.width, item.line_type, item.text, rel.tobytes())
+        with self.lock:
+            sprite = self.sprites.get(key, False)
+            if sprite is not False:
+                self.sprites.move_to_end(key)
+                self.hits += 1
+        if sprite is False:
+            sprite = render_mask(item.type, item.width, item.line_type, item.text, rel)
+            with self.lock:
+                self.misses += 1
+                if key not in self.sprites:
+                    self.sprites[key] = sprite
+                    self.nbytes += sprite[2].width * sprite[2].height if sprite else 0
+                    self._evict()
+        if sprite is None:
+            return 0, 0, None
+        ax, ay = anchor.tolist()
+        return int(ax) + sprite[0], int(ay) + sprite[1], sprite[2]
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and len(self.sprites) > 1:
+            _, sprite = self.sprites.popitem(last=False)
+            if sprite:
+                self.nbytes -= sprite[2].width * sprite[2].height
+
+
+CACHE = SpriteCache()  # Cache bersama per proses
+
+
+class Composite:
+    """Sprite semua item, siap ditempel per region (mis. per pita baris saat export PNG).
+
+    Shape kecil memakai sprite ter-cache. Shape yang bbox-nya lebih luas dari
+    SPRITE_MAX dirender saat paint(), hanya di irisan dengan image tujuan dan
+    per potongan REGION x REGION.
+    """
+
+    def __init__(self, items, cache=None):
+        cache = cache or CACHE
+        self.placed = []  # (x, y, mask, warna, item); mask None = dirender per region
+        boxes = []
+        for item in items:
+            if item.type != "text":
+                box = bounds(item.type, item.width, item.line_type, item.points)
+                if (box[2] - box[0]) * (box[3] - box[1]) > SPRITE_MAX:
+                    self.placed.append((box[0], box[1], None, item.color, item))
+                    boxes.append(box)
+                    continue
+            x, y, mask = cache.get(item)
+            if mask is not None:
+                self.placed.append((x, y, mask, item.color, item))
+                boxes.append((x, y, x + mask.width, y + mask.height))
+        self.boxes = np.array(boxes, dtype=np.int64).reshape(-1, 4)
+
+    def paint(self, image, origin=(0, 0)):
+        """Tempel sprite yang beririsan dengan image; origin = posisi image di koordinat dokumen."""
+        ox, oy = origin
+        w, h = image.size
+        b = self.boxes
+        hits = np.flatnonzero((b[:, 0] < ox + w) & (b[:, 2] > ox) & (b[:, 1] < oy + h) & (b[:, 3] > oy))
+        for i in hits.tolist():
+            x, y, mask, color, item = self.placed[i]
+            if mask is not None:
+                image.paste(color, (x - ox, y - oy), mask)
+                continue
+            x0, y0 = int(max(b[i, 0], ox)), int(max(b[i, 1], oy))
+            x1, y1 = int(min(b[i, 2], ox + w)), int(min(b[i, 3], oy + h))
+            # Dirender dengan pinggiran lalu dipotong: primitif PIL di tepi clip bisa berbeda dari render utuh
+            pad = math.ceil(_pad(item.type, item.width, item.line_type)) + 4
+            for ry in range(y0, y1, REGION):
+                for rx in range(x0, x1, REGION):
+                    box = (rx, ry, min(rx + REGION, x1), min(ry + REGION, y1))
+                    part = render_mask(item.type, item.width, item.line_type, item.text, item.points,
+                                       (box[0] - pad, box[1] - pad, box[2] + pad, box[3] + pad))
+                    if part is not None:
+                        px, py, mask = part
+                        image.paste(color, (box[0] - ox, box[1] - oy),
+                                    mask.crop((box[0] - px, box[1] - py, box[2] - px, box[3] - py)))
+        return image
+
+
+def bake(target, shape):
+    # Tempel sprite shape ke target (Viewport) di koordinat dokumen, per potongan REGION untuk shape besar
+    composite = Composite(freeze([shape]))
+    if composite.placed:
+        x0, y0, x1, y1 = composite.boxes[0].tolist()
+        for ry in range(y0, y1, REGION):
+            for rx in range(x0, x1, REGION):
+                target.paint((rx, ry, min(rx + REGION, x1), min(ry + REGION, y1)), composite.paint)
+
+
+def render(shapes, size, background="white", cache=None):
+    # Rasterisasi shapes ke image baru (dipakai core.render_document dan render.py)
+    image = Image.new("RGB", size, background)
+    return Composite(freeze(shapes), cache).paint(image)
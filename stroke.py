@@ -0,0 +1,107 @@
+"""Pipeline goresan freehand: preview polyline di canvas dan penyederhanaan titik."""
+import numpy as np
+from PIL import ImageDraw
+
+import core
+
+
+def simplify(points, epsilon=0.75):
+    """Ramer-Douglas-Peucker: buang titik yang jaraknya ke garis < epsilon."""
+    if len(points) < 3:
+        return list(points)
+    pts = np.asarray(points, dtype=np.float64)
+    keep = np.zeros(len(pts), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(pts) - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        seg = pts[b] - pts[a]
+        rel = pts[a + 1:b] - pts[a]
+        length = np.hypot(*seg)
+        if length == 0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / length
+        i = int(np.argmax(dist))
+        if dist[i] > epsilon:
+            mid = a + 1 + i
+            keep[mid] = True
+            stack.append((a, mid))
+            stack.append((mid, b))
+    return [tuple(p) for p in pts[keep].tolist()]
+
+
+def erase(target, points, color, width):
+    # Goresan eraser langsung ke raster lewat target.paint (Viewport), koordinat dokumen
+    pad = width // 2 + 2
+    xs, ys = [p[0] for p in points], [p[1] for p in points]
+
+    def paint(image, origin):
+        ox, oy = origin
+        core.draw_polyline(ImageDraw.Draw(image), [(x - ox, y - oy) for x, y in points], color, width)
+    target.paint((min(xs) - pad, min(ys) - pad, max(xs) + pad + 1, max(ys) + pad + 1), paint)
+
+
+class StrokeBuilder:
+    """Mengumpulkan titik goresan dan menampilkannya sebagai polyline di canvas.
+
+    add() hanya mencatat titik; render() (dipanggil sekali per frame)
+    menambahkan titik baru ke item line yang sedang tumbuh. Setiap CHUNK
+    titik dibuat item baru supaya canvas.coords tetap O(1) berapa pun
+    panjang goresannya. Titik disimpan dalam koordinat dokumen; preview
+    digambar dikali scale (zoom view).
+    """
+
+    CHUNK = 64
+
+    def __init__(self, canvas, x, y, color, width, scale=1.0):
+        self.canvas = canvas
+        self.color = color
+        self.width = width
+        self.scale = scale
+        self.points = [(x, y)]
+        self.rendered = 1  # Jumlah titik yang sudah masuk preview
+        self.chunk = [x * scale, y * scale]
+        self.item = None
+        self.items = []
+
+    def add(self, x, y):
+        if (x, y) != self.points[-1]:
+            self.points.append((x, y))
+
+    def render(self):
+        if self.rendered == len(self.points):
+            return
+        k = self.scale
+        for x, y in self.points[self.rendered:]:
+            x, y = x * k, y * k
+            self.chunk += (x, y)
+            if len(self.chunk) >= self.CHUNK * 2:
+                self._show()
+                # Mulai item baru dari titik terakhir agar garis tetap tersambung
+                self.chunk = [x, y]
+                self.item = None
+        self.rendered = len(self.points)
+        if len(self.chunk) > 2:
+            self._show()
+
+    def _show(self):
+        if self.item is None:
+            self.item = self.canvas.create_line(*self.chunk, fill=self.color,
+                                                width=max(self.width * self.scale, 1),
+                                                capstyle="round", joinstyle="round")
+            self.items.append(self.item)
+        else:
+            self.canvas.coords(self.item, *self.chunk)
+
+    def finish(self, epsilon=0.75):
+        # Hapus preview dan kembalikan titik yang sudah disederhanakan
+        for item in self.items:
+            self.canvas.delete(item)
+        self.items = []
+        pts = simplify(self.points, epsilon)
+        if len(pts) == 1:
+            pts = pts * 2  # Klik tanpa gerak tetap menjadi titik
+        return pts
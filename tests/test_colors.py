@@ -0,0 +1,51 @@
+"""Tes LUT warna: MatchTable sama dengan dE yang dihitung langsung per pixel."""
+import unittest
+
+import numpy as np
+
+import colors
+
+
+def brute_force_mask(arr, rgb, tolerance):
+    d = colors.rgb_to_lab(arr) - colors.rgb_to_lab(np.array(rgb, dtype=np.uint8))
+    return np.einsum("...i,...i->...", d, d) <= tolerance * tolerance
+
+
+class MatchTableTest(unittest.TestCase):
+    def sample(self, rgb, rng):
+        # Kubus RGB yang dijarangkan, warna acak, dan banyak warna di sekitar target
+        levels = np.arange(0, 256, 5, dtype=np.uint8)
+        grid = np.stack(np.meshgrid(levels, levels, levels, indexing="ij"), axis=-1).reshape(-1, 3)
+        scattered = rng.integers(0, 256, (20000, 3))
+        near = np.array(rgb) + rng.integers(-40, 41, (60000, 3))
+        arr = np.concatenate([grid, scattered, near, [rgb]])
+        return np.clip(arr, 0, 255).astype(np.uint8)[None]
+
+    def test_mask_matches_brute_force(self):
+        rng = np.random.default_rng(2)
+        for rgb in ((0, 0, 0), (255, 255, 255), (0, 0, 255), (200, 30, 40), (128, 128, 128), (12, 250, 90)):
+            arr = self.sample(rgb, rng)
+            for tolerance in (0, 2.5, 10, 30):
+                with self.subTest(rgb=rgb, tolerance=tolerance):
+                    expected = brute_force_mask(arr, rgb, tolerance)
+                    self.assertTrue(expected.any())
+                    np.testing.assert_array_equal(colors.MatchTable(rgb, tolerance).mask(arr), expected)
+
+    def test_bounds_contain_every_match(self):
+        rng = np.random.default_rng(4)
+        for rgb in ((255, 0, 0), (40, 60, 200)):
+            arr = self.sample(rgb, rng).reshape(-1, 3)
+            matches = arr[brute_force_mask(arr, rgb, 20)]
+            for channel, (lo, hi) in enumerate(colors.rgb_bounds(rgb, 20)):
+                self.assertGreaterEqual(matches[:, channel].min(), lo)
+                self.assertLessEqual(matches[:, channel].max(), hi)
+
+    def test_non_contiguous_input(self):
+        rng = np.random.default_rng(6)
+        arr = rng.integers(90, 170, (64, 80, 3)).astype(np.uint8)[::2, 1::3]
+        expected = brute_force_mask(arr, (128, 128, 128), 15)
+        np.testing.assert_array_equal(colors.color_mask(arr, (128, 128, 128), 15), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
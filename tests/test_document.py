@@ -0,0 +1,89 @@
+"""Tes format dokumen .mpd: urutan z dan autosave setelah record terakhir terpotong."""
+import os
+import tempfile
+import unittest
+
+import core
+import document
+import tilestore
+
+
+def make_shapes(count, offset=0):
+    return [core.Shape("rect", [(x, x), (x + 10, x + 10)], "black", 1)
+            for x in range(offset, offset + count * 20, 20)]
+
+
+class TruncatedTailTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".mpd")
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def test_append_after_truncated_tail(self):
+        raster = tilestore.TiledRaster(256, 256)
+        shapes = make_shapes(10)
+        writer = document.DocumentWriter(self.path)
+        snap = document.Snapshot(shapes, raster)
+        writer.save(snap)
+        snap.release(True)
+        saved = os.path.getsize(self.path)
+        shapes += make_shapes(1, 1000)
+        snap = document.Snapshot(shapes, raster)
+        self.assertGreater(writer.append(snap), 0)
+        snap.release(True)
+
+        # Crash di tengah autosave: record terakhir hanya tertulis sebagian
+        with open(self.path, "r+b") as f:
+            f.truncate((saved + os.path.getsize(self.path)) // 2)
+        raster, shapes = document.read(self.path)
+        self.assertEqual(len(shapes), 10)
+
+        writer = document.DocumentWriter(self.path)
+        writer.mark_saved(shapes, raster)
+        shapes += make_shapes(1, 2000)
+        snap = document.Snapshot(shapes, raster)
+        self.assertGreater(writer.append(snap), 0)
+        snap.release(True)
+
+        _, loaded = document.read(self.path)
+        self.assertEqual([s.bbox for s in loaded], [s.bbox for s in shapes])
+
+
+class ZOrderTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".mpd")
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def append(self, writer, shapes, raster):
+        snap = document.Snapshot(shapes, raster)
+        written = writer.append(snap)
+        snap.release(True)
+        return written
+
+    def test_append_keeps_z_order(self):
+        raster = tilestore.TiledRaster(256, 256)
+        shapes = make_shapes(6)
+        writer = document.DocumentWriter(self.path)
+        snap = document.Snapshot(shapes, raster)
+        writer.save(snap)
+        snap.release(True)
+
+        # Shape terakhir dibawa ke paling belakang, satu shape di tengah dihapus
+        shapes.insert(0, shapes.pop())
+        del shapes[3]
+        self.assertGreater(self.append(writer, shapes, raster), 0)
+        _, loaded = document.read(self.path)
+        self.assertEqual([s.uid for s in loaded], [s.uid for s in shapes])
+
+        # Shape baru di atas tanpa perubahan urutan lain hanya menulis shape itu
+        shapes += make_shapes(1, 1000)
+        size = os.path.getsize(self.path)
+        self.append(writer, shapes, raster)
+        _, loaded = document.read(self.path)
+        self.assertEqual([s.uid for s in loaded], [s.uid for s in shapes])
+        self.assertLess(os.path.getsize(self.path) - size, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
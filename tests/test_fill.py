@@ -0,0 +1,99 @@
+"""Tes flood fill span: hasilnya sama dengan BFS per piksel."""
+import unittest
+from collections import deque
+
+import numpy as np
+from PIL import Image
+
+import fill
+
+
+def bfs_region(mask, x, y, connectivity=4):
+    # Referensi: BFS piksel demi piksel
+    h, w = mask.shape
+    region = np.zeros_like(mask, dtype=bool)
+    if not mask[y, x]:
+        return region
+    steps = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    if connectivity == 8:
+        steps += [(-1, -1), (1, -1), (-1, 1), (1, 1)]
+    region[y, x] = True
+    queue = deque([(x, y)])
+    while queue:
+        px, py = queue.popleft()
+        for dx, dy in steps:
+            nx, ny = px + dx, py + dy
+            if 0 <= nx < w and 0 <= ny < h and mask[ny, nx] and not region[ny, nx]:
+                region[ny, nx] = True
+                queue.append((nx, ny))
+    return region
+
+
+def spans_region(spans, shape):
+    region = np.zeros(shape, dtype=bool)
+    for sy, x0, x1 in spans:
+        # Span yang sama tidak boleh muncul dua kali
+        assert not region[sy, x0:x1].any()
+        region[sy, x0:x1] = True
+    return region
+
+
+def bbox_of(region):
+    ys, xs = np.nonzero(region)
+    return xs.min(), ys.min(), xs.max() + 1, ys.max() + 1
+
+
+class SpanFillTest(unittest.TestCase):
+    def test_random_masks_match_bfs(self):
+        rng = np.random.default_rng(11)
+        for density in (0.45, 0.6, 0.75):
+            for connectivity in (4, 8):
+                for _ in range(20):
+                    mask = rng.random((30, 41)) < density
+                    x, y = int(rng.integers(41)), int(rng.integers(30))
+                    with self.subTest(density=density, connectivity=connectivity, seed=(x, y)):
+                        expected = bfs_region(mask, x, y, connectivity)
+                        spans, bbox = fill.span_fill(mask, x, y, connectivity)
+                        if not expected.any():
+                            self.assertEqual((spans, bbox), ([], None))
+                            continue
+                        np.testing.assert_array_equal(spans_region(spans, mask.shape), expected)
+                        self.assertEqual(bbox, bbox_of(expected))
+
+    def test_diagonal_steps_need_8_connectivity(self):
+        mask = np.eye(6, dtype=bool)
+        spans, _ = fill.span_fill(mask, 0, 0, 4)
+        self.assertEqual(spans, [(0, 0, 1)])
+        spans, bbox = fill.span_fill(mask, 0, 0, 8)
+        np.testing.assert_array_equal(spans_region(spans, mask.shape), mask)
+        self.assertEqual(bbox, (0, 0, 6, 6))
+
+
+class FloodFillTest(unittest.TestCase):
+    def test_tolerance_matches_bfs(self):
+        rng = np.random.default_rng(5)
+        # Sedikit level warna supaya ada region yang cukup besar
+        arr = (rng.integers(0, 4, (32, 48, 3)) * 40).astype(np.uint8)
+        red = (255, 0, 0)
+        for tolerance in (0, 40, 80):
+            for connectivity in (4, 8):
+                for _ in range(5):
+                    x, y = int(rng.integers(48)), int(rng.integers(32))
+                    with self.subTest(tolerance=tolerance, connectivity=connectivity, seed=(x, y)):
+                        image = Image.fromarray(arr)
+                        bbox = fill.flood_fill(image, x, y, red, tolerance, connectivity)
+                        seed = arr[y, x].astype(int)
+                        mask = (np.abs(arr.astype(int) - seed) <= tolerance).all(axis=2)
+                        region = bfs_region(mask, x, y, connectivity)
+                        expected = arr.copy()
+                        expected[region] = red
+                        np.testing.assert_array_equal(np.asarray(image), expected)
+                        self.assertEqual(bbox, bbox_of(region))
+
+    def test_same_color_without_tolerance_is_noop(self):
+        image = Image.new("RGB", (8, 8), (255, 0, 0))
+        self.assertIsNone(fill.flood_fill(image, 3, 3, (255, 0, 0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""Tes undo/redo command raster dan pelepasan slot tile lewat release()."""
+import unittest
+from collections import Counter
+
+from PIL import Image
+
+import history
+import rasterops
+import tilestore
+
+
+class App:
+    # Bagian MiniPaint yang dipakai command raster
+    def __init__(self, raster, viewport):
+        self.raster = raster
+        self.viewport = viewport
+
+    def reload_raster(self):
+        self.viewport.reload()
+
+
+class RasterHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.raster = tilestore.TiledRaster(600, 400)
+        # Viewport lebih kecil dari dokumen: edit mengenai buffer dan tile sekaligus
+        self.viewport = tilestore.Viewport(self.raster, 300, 200, origin=(100, 50))
+        self.app = App(self.raster, self.viewport)
+        self.history = history.History()
+
+    def pixels(self):
+        self.viewport.flush()
+        return self.raster.read_array((0, 0) + self.raster.size)
+
+    def paint(self, color, box):
+        size = (box[2] - box[0], box[3] - box[1])
+        patch = history.record_edit(self.viewport, [box],
+                                    lambda: self.viewport.paste(Image.new("RGB", size, color), box[:2]))
+        self.history.push(patch)
+
+    def invert(self):
+        self.viewport.flush()
+        before = rasterops.map_tiles(self.raster, *rasterops.FILTERS["invert"]())
+        self.history.push(history.ReplaceRaster(self.raster, before))
+        self.app.reload_raster()
+
+    def clear(self):
+        self.history.push(history.ClearRaster(self.viewport, self.viewport.clear()))
+
+    def assert_slots_released(self):
+        # Setiap slot hidup hanya dipakai peta tile aktif; sisanya kembali ke free
+        raster = self.raster
+        self.assertEqual(raster.refs, Counter(raster.tiles.values()))
+        self.assertEqual(len(set(raster.free)), len(raster.free))
+        self.assertEqual(raster.used, len(raster.refs) + len(raster.free))
+
+    def assert_pixels(self, expected):
+        self.assertTrue((self.pixels() == expected).all())
+
+    def test_round_trip(self):
+        states = [self.pixels()]
+        self.paint("red", (150, 80, 420, 300))
+        states.append(self.pixels())
+        self.invert()
+        states.append(self.pixels())
+        self.clear()
+        states.append(self.pixels())
+        self.assertFalse((states[1] == states[0]).all())
+        self.assertFalse((states[2] == states[1]).all())
+
+        for expected in reversed(states[:-1]):
+            self.assertIsNotNone(self.history.undo(self.app))
+            self.assert_pixels(expected)
+        self.assertIsNone(self.history.undo(self.app))
+        for expected in states[1:]:
+            self.assertIsNotNone(self.history.redo(self.app))
+            self.assert_pixels(expected)
+
+        # Edit baru setelah undo membuang (release) invert dan clear di stack redo
+        self.history.undo(self.app)
+        self.history.undo(self.app)
+        self.assert_pixels(states[1])
+        self.paint("blue", (0, 0, 40, 40))
+        expected = self.pixels()
+        self.assertEqual(len(self.history.redo_stack), 0)
+        self.assert_slots_released()
+
+        self.history.clear()
+        self.assert_pixels(expected)
+        self.assert_slots_released()
+
+    def test_clear_releases_commands_on_both_stacks(self):
+        self.paint("red", (0, 0, 300, 300))
+        self.invert()
+        self.clear()
+        self.invert()
+        # Clear (pemilik peta tile lama) tetap di stack undo, invert terakhir pindah ke stack redo
+        self.history.undo(self.app)
+        self.assertEqual(len(self.history.redo_stack), 1)
+        self.history.clear()
+        self.assert_slots_released()
+
+    def test_evicted_commands_are_released(self):
+        self.history.max_bytes = 1
+        self.paint("red", (0, 0, 300, 300))
+        for _ in range(3):
+            self.invert()
+            self.clear()
+        self.assertEqual(len(self.history.undo_stack), 1)
+        self.history.clear()
+        self.assert_slots_released()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Tes rasterizer sprite: export PNG sama dengan satu kali render shape."""
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+import core
+import sprites
+import tilestore
+
+
+class ExportTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".png")
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def export(self, shapes, size):
+        # Seperti MiniPaint: shape BAKED_TYPES dipanggang ke raster, sisanya jadi overlay export
+        raster = tilestore.TiledRaster(*size)
+        viewport = tilestore.Viewport(raster, *size)
+        for shape in shapes:
+            if shape.type in core.BAKED_TYPES:
+                sprites.bake(viewport, shape)
+        viewport.flush()
+        raster.save_png(self.path, overlay=sprites.Composite(sprites.overlay_items(shapes)).paint)
+        with Image.open(self.path) as image:
+            return np.asarray(image.convert("RGB"))
+
+    def test_shapes_are_rendered_once(self):
+        shapes = [core.Shape("oval", [(10.5, 12), (90, 70)], "#3050c0", 3),
+                  core.Shape("star", core.make_star(20, 20, 100, 100), "red", 2),
+                  core.Shape("line", [(5, 110), (115, 8)], "black", 4, "arrow")]
+        expected = np.asarray(sprites.render(shapes, (128, 128)))
+        self.assertTrue((expected != 255).any())
+        np.testing.assert_array_equal(self.export(shapes, (128, 128)), expected)
+
+
+class RegionTest(unittest.TestCase):
+    def test_large_shapes_match_single_render(self):
+        # Shape di atas SPRITE_MAX dirender per potongan REGION; hasilnya harus sama dengan satu mask utuh
+        size = (1200, 900)
+        shapes = [core.Shape("oval", [(10.5, 12), (1190, 870)], "black", 5),
+                  core.Shape("star", core.make_star(20, 20, 1100, 880), "black", 3),
+                  core.Shape("stroke", [(5.3, 5), (600.7, 890.1), (1195, 3)], "black", 7),
+                  core.Shape("line", [(5, 880), (1190, 8)], "black", 15, "dashed"),
+                  core.Shape("line", [(5, 880), (1190, 8)], "black", 4, "arrow")]
+        for shape in shapes:
+            item = sprites.freeze([shape])[0]
+            item.color = 255
+            composite = sprites.Composite([item])
+            self.assertIsNone(composite.placed[0][2])
+            x, y, mask = sprites.render_mask(item.type, item.width, item.line_type, item.text, item.points)
+            expected = Image.new("L", size, 0)
+            expected.paste(255, (x, y), mask)
+            actual = composite.paint(Image.new("L", size, 0))
+            diff = np.abs(np.asarray(actual, int) - np.asarray(expected, int))
+            # Paling banyak satu subpixel (1/SS^2 coverage) beda di beberapa pixel tepi
+            self.assertLessEqual(diff.max(), 256 // sprites.SS ** 2, shape.type)
+            self.assertLess((diff > 0).sum(), 20, shape.type)
+
+
+if __name__ == "__main__":
+    unittest.main()
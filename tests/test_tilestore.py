@@ -0,0 +1,53 @@
+"""Tes load PNG bertahap: hasilnya sama dengan decode utuh oleh PIL."""
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+import numpy as np
+from PIL import Image
+
+import tilestore
+
+
+class OpenTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".png")
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def assert_loads(self, image, **params):
+        image.save(self.path, **params)
+        # Pita 37 baris tidak membagi tinggi gambar dan melintasi batas tile
+        raster = tilestore.TiledRaster.open(self.path, band=37)
+        with Image.open(self.path) as reference:
+            expected = np.asarray(reference.convert("RGB"))
+        np.testing.assert_array_equal(raster.read_array((0, 0) + raster.size), expected)
+
+    def test_streamed_modes_match_pil(self):
+        rng = np.random.default_rng(7)
+        noise = rng.integers(0, 256, (203, 301, 3), dtype=np.uint8)
+        gradient = np.add.outer(np.arange(203), np.arange(301)).astype(np.uint8)
+        for pixels in (noise, np.dstack([gradient] * 3)):
+            base = Image.fromarray(pixels)
+            for mode in ("RGB", "RGBA", "L", "LA", "1", "P"):
+                with self.subTest(mode=mode):
+                    # optimize memilih filter PNG adaptif (Sub/Up/Average/Paeth)
+                    self.assert_loads(base.convert(mode), optimize=True)
+            for bits in (2, 4):
+                with self.subTest(bits=bits):
+                    self.assert_loads(base.convert("P", colors=1 << bits), bits=bits)
+
+    def test_16_bit_falls_back_to_pil(self):
+        pixels = np.random.default_rng(3).integers(0, 300, (50, 60), dtype=np.uint16)
+        self.assert_loads(Image.fromarray(pixels))
+
+    def test_oversize_unstreamable_image_is_refused(self):
+        Image.new("I;16", (40, 30)).save(self.path)
+        with unittest.mock.patch.object(tilestore, "DECODE_MAX", 40 * 30 - 1):
+            with self.assertRaises(ValueError):
+                tilestore.TiledRaster.open(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
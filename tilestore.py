@@ -0,0 +1,523 @@
+"""Raster dokumen ber-tile yang disimpan di file scratch memory-mapped."""
+import contextlib
+import copy
+import io
+import math
+import os
+import struct
+import tempfile
+import zlib
+from collections import Counter
+
+import numpy as np
+from PIL import Image
+
+TILE = 256
+# Batas gambar yang harus didecode utuh di RAM oleh PIL (bukan PNG yang bisa di-stream)
+DECODE_MAX = 8192 * 8192
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# (color type, bit depth) PNG -> (mode, rawmode) PIL untuk unpack baris mentah
+PNG_RAW_MODES = {
+    (0, 1): ("1", "1"), (0, 2): ("L", "L;2"), (0, 4): ("L", "L;4"), (0, 8): ("L", "L"),
+    (2, 8): ("RGB", "RGB"),
+    (3, 1): ("P", "P;1"), (3, 2): ("P", "P;2"), (3, 4): ("P", "P;4"), (3, 8): ("P", "P"),
+    (4, 8): ("LA", "LA"), (6, 8): ("RGBA", "RGBA"),
+}
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+# Byte per pixel filter -> color type 8-bit yang hasil decode PIL-nya sama persis dengan byte mentah
+PNG_IDENTITY = {1: 0, 2: 4, 3: 2, 4: 6}
+
+
+class TiledRaster:
+    """Raster RGB besar yang dipecah menjadi tile TILE x TILE.
+
+    Tile baru dialokasikan di file scratch (np.memmap) saat pertama kali
+    ditulis; tile yang belum pernah ditulis dibaca sebagai warna latar. Jadi
+    kanvas 20k x 20k hanya memakai disk/RAM sebanyak tile yang benar-benar
+    berisi gambar.
+    """
+
+    mode = "RGB"
+
+    def __init__(self, width, height, background=(255, 255, 255), tile=TILE):
+        self.width = width
+        self.height = height
+        self.background = background
+        self.tile = tile
+        self.tiles = {}  # (tx, ty) -> slot di file scratch
+        self.changed = set()  # Tile yang isinya berubah sejak take_changes() terakhir
+        self.reset = False  # True jika peta tile diganti (clear/undo clear)
+        self.refs = Counter()  # slot -> jumlah peta tile (aktif, snapshot, riwayat) yang memakainya
+        self.free = []  # Slot yang tidak dipakai lagi, didaur ulang sebelum file scratch diperbesar
+        self.file = tempfile.TemporaryFile(prefix="minipaint-")
+        self.capacity = 0
+        self.used = 0
+        self.slots = None
+        self._grow(64)
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    def _grow(self, capacity):
+        t = self.tile
+        if self.slots is not None:
+            self.slots.flush()
+        self.file.truncate(capacity * t * t * 3)
+        self.slots = np.memmap(self.file, dtype=np.uint8, mode="r+", shape=(capacity, t, t, 3))
+        self.capacity = capacity
+
+    def _new_slot(self):
+        # Slot baru dengan satu referensi (milik peta tile yang akan memakainya)
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.used == self.capacity:
+                self._grow(self.capacity * 2)
+            slot = self.used
+            self.used += 1
+        self.refs[slot] = 1
+        return slot
+
+    def retain(self, slots):
+        # Peta tile lain (snapshot, state undo) ikut memakai slot ini
+        self.refs.update(slots)
+
+    def drop(self, slots):
+        # Peta tile yang memakai slot ini dibuang; slot tanpa referensi dikembalikan ke free
+        refs = self.refs
+        for slot in slots:
+            refs[slot] -= 1
+            if not refs[slot]:
+                del refs[slot]
+                self.free.append(slot)
+
+    def _slot(self, key, create):
+        slot = self.tiles.get(key)
+        if slot is None and create:
+            slot = self._new_slot()
+            self.slots[slot, 0] = self.background
+            self.slots[slot, 1:] = self.slots[slot, 0]
+            self.tiles[key] = slot
+        return slot
+
+    def _writable(self, key, slot):
+        # Copy-on-write: slot yang juga dipakai peta tile lain diganti slot baru
+        if self.refs[slot] < 2:
+            return slot
+        new = self._new_slot()
+        self.slots[new] = self.slots[slot]
+        self.tiles[key] = new
+        self.refs[slot] -= 1
+        return new
+
+    def snapshot(self):
+        """Salinan copy-on-write (berbagi file scratch) untuk dibaca dari thread lain."""
+        snap = copy.copy(self)
+        snap.tiles = dict(self.tiles)
+        self.retain(snap.tiles.values())
+        return snap
+
+    def release(self, snap):
+        self.drop(snap.tiles.values())
+
+    def resize_canvas(self, width, height):
+        # Ubah ukuran dokumen tanpa resample; area baru berisi warna latar
+        self.width, self.height = width, height
+        t = self.tile
+        for key in [k for k in self.tiles if k[0] * t >= width or k[1] * t >= height]:
+            self.drop((self.tiles.pop(key),))
+
+    def swap_tiles(self, tiles):
+        # Ganti seluruh peta tile (untuk clear dan undo-nya); slot lama tidak ditimpa.
+        # Referensi ikut berpindah: pemanggil memiliki peta lama dan harus drop() jika membuangnya
+        old, self.tiles = self.tiles, tiles
+        self.reset = True
+        self.changed = set(tiles)
+        return old
+
+    def swap_state(self, state):
+        # Ganti (ukuran, peta tile) sekaligus: operasi seluruh raster (filter/resize) dan undo-nya
+        old = self.size, self.tiles
+        (self.width, self.height), tiles = state
+        self.swap_tiles(tiles)
+        return old
+
+    def take_changes(self):
+        # Dipakai autosave dokumen: (reset, tile yang berubah), lalu dikosongkan
+        changes = self.reset, self.changed
+        self.reset, self.changed = False, set()
+        return changes
+
+    def get_tile(self, key):
+        slot = self.tiles.get(key)
+        return None if slot is None else self.slots[slot]
+
+    def put_tile(self, key, arr):
+        slot = self.tiles.get(key)
+        if slot is None or self.refs[slot] > 1:
+            if slot is not None:
+                self.refs[slot] -= 1
+            slot = self.tiles[key] = self._new_slot()
+        self.slots[slot] = arr
+
+    def _spans(self, box):
+        # Potongan (key, box lokal di tile, box di region) untuk setiap tile yang kena box
+        t = self.tile
+        x0, y0, x1, y1 = box
+        for ty in range(y0 // t, (y1 - 1) // t + 1):
+            for tx in range(x0 // t, (x1 - 1) // t + 1):
+                ax0, ay0 = max(x0, tx * t), max(y0, ty * t)
+                ax1, ay1 = min(x1, (tx + 1) * t), min(y1, (ty + 1) * t)
+                yield ((tx, ty), (ax0 - tx * t, ay0 - ty * t, ax1 - tx * t, ay1 - ty * t),
+                       (ax0 - x0, ay0 - y0, ax1 - x0, ay1 - y0))
+
+    def _clip(self, box):
+        x0, y0, x1, y1 = (int(v) for v in box)
+        return max(x0, 0), max(y0, 0), min(x1, self.width), min(y1, self.height)
+
+    def read_array(self, box):
+        x0, y0, x1, y1 = box
+        out = np.empty((max(y1 - y0, 0), max(x1 - x0, 0), 3), dtype=np.uint8)
+        if len(out):
+            # Isi satu baris lalu salin; broadcast 3 channel langsung jauh lebih lambat
+            out[0] = self.background
+            out[1:] = out[0]
+        cx0, cy0, cx1, cy1 = self._clip(box)
+        if cx0 >= cx1 or cy0 >= cy1:
+            return out
+        ox, oy = cx0 - x0, cy0 - y0
+        for key, (lx0, ly0, lx1, ly1), (rx0, ry0, rx1, ry1) in self._spans((cx0, cy0, cx1, cy1)):
+            slot = self.tiles.get(key)
+            if slot is not None:
+                out[oy + ry0:oy + ry1, ox + rx0:ox + rx1] = self.slots[slot, ly0:ly1, lx0:lx1]
+        return out
+
+    def write_array(self, arr, xy):
+        x0, y0 = int(xy[0]), int(xy[1])
+        h, w = arr.shape[:2]
+        cx0, cy0, cx1, cy1 = self._clip((x0, y0, x0 + w, y0 + h))
+        if cx0 >= cx1 or cy0 >= cy1:
+            return
+        ox, oy = cx0 - x0, cy0 - y0
+        for key, (lx0, ly0, lx1, ly1), (rx0, ry0, rx1, ry1) in self._spans((cx0, cy0, cx1, cy1)):
+            region = arr[oy + ry0:oy + ry1, ox + rx0:ox + rx1]
+            slot = self.tiles.get(key)
+            if slot is None:
+                if not (region != self.background).any():
+                    continue  # Tile kosong tetap tidak dialokasikan
+                slot = self._slot(key, create=True)
+            elif np.array_equal(self.slots[slot, ly0:ly1, lx0:lx1], region):
+                continue  # flush viewport tanpa perubahan tidak menandai tile
+            else:
+                slot = self._writable(key, slot)
+            self.slots[slot, ly0:ly1, lx0:lx1] = region
+            self.changed.add(key)
+
+    def crop(self, box):
+        return Image.fromarray(self.read_array(box), "RGB")
+
+    def paste(self, image, xy):
+        self.write_array(np.asarray(image.convert("RGB")), xy)
+
+    @classmethod
+    def open(cls, path, band=TILE, progress=None):
+        """Muat gambar ke raster ber-tile, disalin per pita baris.
+
+        PNG 8-bit (atau kurang) non-interlaced didecode bertahap, jadi memori
+        yang dipakai sebatas satu pita. Format lain (JPEG, PNG 16-bit/interlaced)
+        didecode utuh oleh PIL dan ditolak jika lebih dari DECODE_MAX pixel.
+        progress(fraksi) dipanggil per pita; exception darinya membatalkan load.
+        """
+        with open(path, "rb") as f:
+            stream = _png_stream(f, band)
+            if stream:
+                (w, h), bands = stream
+                raster = cls(w, h)
+                for y, strip in bands:
+                    raster.paste(strip, (0, y))
+                    if progress:
+                        progress((y + strip.height) / h)
+                return raster
+        with _open_large(path) as im:
+            if im.width * im.height > DECODE_MAX:
+                raise ValueError(
+                    f"Gambar {im.width}x{im.height} terlalu besar untuk didecode utuh; "
+                    "simpan sebagai PNG 8-bit non-interlaced"
+                )
+            raster = cls(*im.size)
+            for y in range(0, im.height, band):
+                strip = im.crop((0, y, im.width, min(y + band, im.height))).convert("RGB")
+                raster.paste(strip, (0, y))
+                if progress:
+                    progress(min(y + band, im.height) / im.height)
+        return raster
+
+    def save_png(self, path, band=TILE, progress=None, overlay=None):
+        """Tulis PNG secara streaming per pita baris, tanpa membuat satu image utuh.
+
+        Ditulis ke file sementara lalu diganti, jadi save yang dibatalkan lewat
+        progress(fraksi) tidak merusak file lama. overlay(image, origin), jika
+        ada, menggambar di atas setiap pita (mis. shape vektor) sebelum ditulis.
+        """
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                self._write_png(f, band, progress, overlay)
+        except BaseException:
+            # Gagal hapus file sementara tidak boleh menutupi error aslinya
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+        os.replace(tmp, path)
+
+    def _write_png(self, f, band, progress, overlay=None):
+        def chunk(tag, data):
+            f.write(_png_chunk(tag, data))
+
+        w, h = self.size
+        comp = zlib.compressobj(3)
+        f.write(PNG_SIGNATURE)
+        chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0))
+        for y in range(0, h, band):
+            rows = self.read_array((0, y, w, min(y + band, h)))
+            if overlay:
+                rows = np.asarray(overlay(Image.fromarray(rows, "RGB"), (0, y)))
+            rows = rows.reshape(-1, w * 3)
+            # Filter PNG "Sub": selisih dengan piksel di kirinya
+            filtered = np.empty((rows.shape[0], w * 3 + 1), dtype=np.uint8)
+            filtered[:, 0] = 1
+            filtered[:, 1:4] = rows[:, :3]
+            filtered[:, 4:] = rows[:, 3:] - rows[:, :-3]
+            data = comp.compress(filtered.tobytes())
+            if data:
+                chunk(b"IDAT", data)
+            if progress:
+                progress(min(y + band, h) / h)
+        chunk(b"IDAT", comp.flush())
+        chunk(b"IEND", b"")
+
+
+def _png_chunk(tag, data):
+    return (struct.pack(">I", len(data)) + tag + data
+            + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+
+def _png_chunks(f):
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            raise ValueError("File PNG terpotong")
+        length, tag = struct.unpack(">I4s", head)
+        data = f.read(length)
+        f.read(4)  # CRC
+        yield tag, data
+        if tag == b"IEND":
+            return
+
+
+def _png_stream(f, band):
+    """((w, h), iterator pita (y, image RGB)) dari PNG yang bisa di-stream, atau None.
+
+    Hanya header yang dibaca di sini; IDAT dibaca saat iterator berjalan.
+    """
+    if f.read(8) != PNG_SIGNATURE:
+        return None
+    chunks = _png_chunks(f)
+    header = palette = None
+    for tag, data in chunks:
+        if tag == b"IHDR":
+            header = struct.unpack(">IIBBBBB", data)
+        elif tag == b"PLTE":
+            palette = data
+        elif tag == b"IDAT":
+            break
+    else:
+        raise ValueError("PNG tanpa data gambar")
+    w, h, depth, color, _, _, interlace = header
+    if interlace or (color, depth) not in PNG_RAW_MODES:
+        return None
+    return (w, h), _png_bands(chunks, data, header, palette, band)
+
+
+def _png_bands(chunks, data, header, palette, band):
+    w, h, depth, color = header[:4]
+    mode, rawmode = PNG_RAW_MODES[color, depth]
+    bpp = max(1, PNG_CHANNELS[color] * depth // 8)
+    rowbytes = (w * PNG_CHANNELS[color] * depth + 7) // 8
+    decomp = zlib.decompressobj()
+    pending = data
+    prev = bytes(rowbytes)  # Baris "sebelum" baris pertama menurut spesifikasi PNG: nol
+    for y in range(0, h, band):
+        rows = min(band, h - y)
+        need = rows * (rowbytes + 1)
+        filtered = bytearray()
+        while len(filtered) < need:
+            if not pending:
+                tag, pending = next(chunks)
+                if tag != b"IDAT":
+                    raise ValueError("Data PNG terpotong")
+            # max_length membatasi inflate ke satu pita, meski IDAT-nya sangat kompresibel
+            filtered += decomp.decompress(pending, need - len(filtered))
+            pending = decomp.unconsumed_tail
+        # Unfilter memakai decoder C PIL: PNG mini berisi baris mentah terakhir pita
+        # sebelumnya (filter None) lalu baris-baris pita ini, dengan color type 8-bit
+        # yang byte per pixel-nya sama sehingga hasilnya adalah byte mentah apa adanya.
+        mini = (
+            PNG_SIGNATURE
+            + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", rowbytes // bpp, rows + 1, 8, PNG_IDENTITY[bpp], 0, 0, 0))
+            + _png_chunk(b"IDAT", zlib.compress(b"\0" + prev + bytes(filtered), 0))
+            + _png_chunk(b"IEND", b"")
+        )
+        with Image.open(io.BytesIO(mini)) as im:
+            raw = im.tobytes()[rowbytes:]
+        prev = raw[-rowbytes:]
+        strip = Image.frombytes(mode, (w, rows), raw, "raw", rawmode)
+        if mode == "P":
+            strip.putpalette(palette)
+        yield y, strip.convert("RGB")
+
+
+def _open_large(path):
+    # Gambar besar memang tujuan modul ini; batas decompression-bomb PIL dilewati
+    old_limit = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        return Image.open(path)
+    finally:
+        Image.MAX_IMAGE_PIXELS = old_limit
+
+
+def open_preview(path, size):
+    """Preview cepat lewat Image.draft (JPEG didecode pada skala 1/2..1/8); None jika tidak didukung."""
+    with _open_large(path) as im:
+        if not im.draft("RGB", size):
+            return None
+        im = im.convert("RGB")
+        im.thumbnail(size)
+        return im
+
+
+class Viewport:
+    """Buffer PIL seukuran jendela di atas TiledRaster.
+
+    Semua operasi raster aplikasi (draw, fill, eraser) bekerja di `image`.
+    crop/paste memakai koordinat dokumen: bagian di dalam viewport dibaca/
+    ditulis ke buffer, sisanya langsung ke tile.
+    """
+
+    mode = "RGB"
+
+    def __init__(self, raster, width, height, origin=(0, 0)):
+        self.raster = raster
+        self.origin = origin
+        self.image = None
+        self._load(width, height)
+
+    @property
+    def size(self):
+        return self.raster.size
+
+    @property
+    def box(self):
+        ox, oy = self.origin
+        return ox, oy, ox + self.image.width, oy + self.image.height
+
+    def _load(self, width, height):
+        ox, oy = self.origin
+        region = self.raster.crop((ox, oy, ox + width, oy + height))
+        if self.image is not None and self.image.size == region.size:
+            self.image.paste(region)  # Pertahankan objek image (dipakai ImageDraw aplikasi)
+        else:
+            self.image = region
+
+    def reload(self):
+        # Peta tile raster diganti dari luar (filter/resize): muat ulang buffer tanpa flush
+        self._load(*self.image.size)
+
+    def flush(self, box=None):
+        # Tulis isi buffer kembali ke tile; tile yang masih kosong tidak dialokasikan.
+        # box: hanya bagian buffer di region dokumen itu (mis. bbox satu edit)
+        if box is None:
+            self.raster.paste(self.image, self.origin)
+            return
+        inner = self._overlap((math.floor(box[0]), math.floor(box[1]), math.ceil(box[2]), math.ceil(box[3])))
+        if inner:
+            ox, oy = self.origin
+            self.raster.paste(self.image.crop((inner[0] - ox, inner[1] - oy, inner[2] - ox, inner[3] - oy)),
+                              inner[:2])
+
+    def move(self, origin, width=None, height=None):
+        """Geser (pan) atau ubah ukuran viewport. Mengembalikan origin setelah di-clamp."""
+        width = width or self.image.width
+        height = height or self.image.height
+        if width > self.raster.width or height > self.raster.height:
+            self.flush()
+            self.raster.resize_canvas(max(width, self.raster.width), max(height, self.raster.height))
+        ox = min(max(int(origin[0]), 0), self.raster.width - width)
+        oy = min(max(int(origin[1]), 0), self.raster.height - height)
+        if (ox, oy) != self.origin or (width, height) != self.image.size:
+            self.flush()
+            self.origin = (ox, oy)
+            self._load(width, height)
+        return self.origin
+
+    def _overlap(self, box):
+        vx0, vy0, vx1, vy1 = self.box
+        x0, y0 = max(box[0], vx0), max(box[1], vy0)
+        x1, y1 = min(box[2], vx1), min(box[3], vy1)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return x0, y0, x1, y1
+
+    def crop(self, box):
+        box = tuple(int(v) for v in box)
+        inner = self._overlap(box)
+        ox, oy = self.origin
+        if inner == box:
+            return self.image.crop((box[0] - ox, box[1] - oy, box[2] - ox, box[3] - oy))
+        out = self.raster.crop(box)
+        if inner:
+            part = self.image.crop((inner[0] - ox, inner[1] - oy, inner[2] - ox, inner[3] - oy))
+            out.paste(part, (inner[0] - box[0], inner[1] - box[1]))
+        return out
+
+    def paste(self, image, xy):
+        x, y = int(xy[0]), int(xy[1])
+        box = (x, y, x + image.width, y + image.height)
+        inner = self._overlap(box)
+        ox, oy = self.origin
+        if inner != box:
+            self.raster.paste(image, (x, y))
+        if inner:
+            part = image.crop((inner[0] - x, inner[1] - y, inner[2] - x, inner[3] - y))
+            self.image.paste(part, (inner[0] - ox, inner[1] - oy))
+
+    def paint(self, box, paint):
+        """paint(image, origin) pada salinan region dokumen box, lalu ditulis balik.
+
+        Bagian di dalam buffer masuk ke buffer, sisanya langsung ke tile, jadi
+        region boleh di luar area yang terlihat (zoom, replay journal).
+        """
+        x0, y0 = math.floor(box[0]), math.floor(box[1])
+        x1, y1 = math.ceil(box[2]), math.ceil(box[3])
+        region = self.crop((x0, y0, x1, y1))
+        paint(region, (x0, y0))
+        self.paste(region, (x0, y0))
+
+    def clear(self):
+        # Kosongkan seluruh dokumen; kembalikan state lama untuk undo
+        state = (self.raster.swap_tiles({}), self.image.copy(), self.origin)
+        self.image.paste(self.raster.background, (0, 0) + self.image.size)
+        return state
+
+    def restore(self, state):
+        tiles, image, origin = state
+        self.raster.drop(self.raster.swap_tiles(tiles).values())
+        self.raster.paste(image, origin)
+        self._load(*self.image.size)
+
+    def save_png(self, path):
+        self.flush()
+        self.raster.save_png(path)
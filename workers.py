@@ -0,0 +1,104 @@
+"""I/O di thread pool: hasil dan progress dikirim balik ke thread Tk lewat root.after."""
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Job:
+    """Handle pekerjaan background; dipakai fungsi worker untuk lapor progress."""
+
+    def __init__(self, label, inbox):
+        self.label = label
+        self.progress = 0.0
+        self.cancelled = False
+        self.inbox = inbox
+
+    def report(self, fraction):
+        # Dipanggil dari worker; sekaligus titik pembatalan
+        self.progress = fraction
+        if self.cancelled:
+            raise Cancelled()
+
+    def post(self, fn, *args):
+        """Jalankan fn(*args) di thread Tk (mis. menampilkan preview)."""
+        self.inbox.put((fn, args))
+
+
+class BackgroundIO:
+    """Menjalankan fungsi di thread pool dan menampilkan progress di status bar.
+
+    Tk tidak thread-safe, jadi worker tidak pernah menyentuh widget: callback
+    dikumpulkan di antrean dan dijalankan oleh poll root.after di thread Tk.
+    """
+
+    POLL_MS = 50
+
+    def __init__(self, root, status_var, workers=2):
+        self.root = root
+        self.status_var = status_var
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="minipaint-io")
+        self.inbox = queue.SimpleQueue()
+        self.jobs = {}  # Job -> Future
+        self.polling = False
+
+    def busy(self, label=None):
+        return any(label is None or job.label == label for job in self.jobs)
+
+    def submit(self, label, fn, on_done, on_error, cleanup=None):
+        """fn(job) di worker; on_done(hasil) / on_error(exc) lalu cleanup() di thread Tk."""
+        job = Job(label, self.inbox)
+
+        def finished(future):
+            self.inbox.put((self._finish, (job, future, on_done, on_error, cleanup)))
+
+        future = self.pool.submit(fn, job)
+        self.jobs[job] = future
+        future.add_done_callback(finished)
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.POLL_MS, self._poll)
+        return job
+
+    def cancel(self, event=None):
+        for job in self.jobs:
+            job.cancelled = True
+
+    def _finish(self, job, future, on_done, on_error, cleanup):
+        del self.jobs[job]
+        exc = future.exception()
+        try:
+            if exc is None:
+                self.status_var.set(f"{job.label}: selesai")
+                on_done(future.result())
+        except Exception as e:
+            exc = e  # Gagal saat memasang hasil di thread Tk
+        try:
+            if isinstance(exc, Cancelled):
+                self.status_var.set(f"{job.label}: dibatalkan")
+            elif exc is not None:
+                self.status_var.set(f"{job.label}: gagal")
+                on_error(exc)
+        finally:
+            if cleanup:
+                cleanup(exc is None)
+
+    def _poll(self):
+        while True:
+            try:
+                fn, args = self.inbox.get_nowait()
+            except queue.Empty:
+                break
+            fn(*args)
+        if self.jobs:
+            self.status_var.set(" | ".join(f"{job.label}... {job.progress:.0%}" for job in self.jobs)
+                                + " (Esc untuk batal)")
+            self.root.after(self.POLL_MS, self._poll)
+        else:
+            self.polling = False
+
+    def shutdown(self):
+        self.cancel()
+        self.pool.shutdown(wait=True)